@@ -6,15 +6,27 @@
 # ==============================================================================
 
 import streamlit as st
-import pandas as pd
 import time
 import json
-import uuid
-from faker import Faker
 from datetime import datetime
-from functools import reduce, lru_cache
-from typing import NamedTuple, Optional, List, Tuple, Callable
+from itertools import chain
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.analytics import SalesCube
+from core.catalog import get_catalog
+from core.domain import Bolid, Garage
+from core.inventory import InventoryService, SQLiteInventory
+from core.journal import OrderJournal
+from core.loader import iter_seed_records, iter_section
+from core.predicates import EraIn, compile_plan
+from core.recursion import build_era_tree
+from core.sales import SalesAggregator
+from core.snapshot import load_snapshot
+from core.storage import SQLiteStore
+from core.transforms import (by_price_range, by_tags, by_team, add_to_garage, remove_from_garage,
+                             update_garage_quantity)
 
 # ==============================================================================
 # СТИЛИЗАЦИЯ (CSS)
@@ -117,118 +129,13 @@ def load_css():
         </style>
     """, unsafe_allow_html=True)
 
-# ==============================================================================
-# МОДЕЛИ ДАННЫХ
-# ==============================================================================
-class CarEra(NamedTuple):
-    id: str; name: str; parent: Optional[str]
-
-class Bolid(NamedTuple):
-    id: str; name: str; team: str; year: int; price: int; era_id: str; tags: List[str]; quantity_available: int; image_url: str
-
-class Collector(NamedTuple):
-    id: str; name: str; tier: str
-
-class GarageItem(NamedTuple):
-    bolid_id: str; quantity: int
-
-class Garage(NamedTuple):
-    collector_id: str; items: List[GarageItem]
-
-class PurchaseOrder(NamedTuple):
-    id: str; collector_id: str; items: List[GarageItem]; total_price: int; timestamp: str
-
-# ==============================================================================
-# УТИЛИТАРНЫЕ ФУНКЦИИ
-# ==============================================================================
-def get_children(eras: Tuple[CarEra, ...], era_id: Optional[str]) -> Tuple[CarEra, ...]:
-    return tuple(e for e in eras if e.parent == era_id)
-
-def flatten_eras(eras: Tuple[CarEra, ...], root_id: Optional[str]) -> Tuple[CarEra, ...]:
-    flat_list = []; recurse_ids = set()
-    def recurse(current_id: Optional[str]):
-        if current_id in recurse_ids: return
-        recurse_ids.add(current_id)
-        for child in get_children(eras, current_id): flat_list.append(child); recurse(child.id)
-    root_era = next((e for e in eras if e.id == root_id), None)
-    if root_era: flat_list.append(root_era)
-    recurse(root_id)
-    return tuple(flat_list)
-
-def collect_bolids_recursive(eras: Tuple[CarEra, ...], bolids: Tuple[Bolid, ...], root_id: str) -> Tuple[Bolid, ...]:
-    target_era_ids = {e.id for e in flatten_eras(eras, root_id)}
-    return tuple(b for b in bolids if b.era_id in target_era_ids)
-
-def load_seed_data(path: str) -> Tuple:
-    with open(path, 'r', encoding='utf-8') as f: data = json.load(f)
-    return (tuple(CarEra(**e) for e in data.get('eras', [])),
-            tuple(Bolid(**b) for b in data.get('bolids', [])),
-            tuple(Collector(**c) for c in data.get('collectors', [])),
-            tuple(PurchaseOrder(**o) for o in data.get('purchase_orders', [])))
-
-def add_to_garage(garage: Garage, bolid_id: str, quantity: int) -> Garage:
-    new_items = list(g for g in garage.items if g.bolid_id != bolid_id)
-    found_item = next((item for item in garage.items if item.bolid_id == bolid_id), None)
-    new_quantity = (found_item.quantity if found_item else 0) + quantity
-    new_items.append(GarageItem(bolid_id, new_quantity))
-    return Garage(garage.collector_id, new_items)
-
-def finalize_purchase(garage: Garage, bolids: Tuple[Bolid, ...], timestamp: str) -> PurchaseOrder:
-    bolid_map = {b.id: b for b in bolids}
-    total = sum(bolid_map[item.bolid_id].price * item.quantity for item in garage.items)
-    return PurchaseOrder(str(uuid.uuid4()), garage.collector_id, list(garage.items), total, timestamp)
-
-def total_sales(orders: Tuple[PurchaseOrder, ...]) -> int:
-    return reduce(lambda acc, o: acc + o.total_price, orders, 0)
-
-def by_price_range(min_p: int, max_p: int) -> Callable:
-    return lambda b: min_p <= b.price <= max_p
-
-def by_team(team: str) -> Callable:
-    return lambda b: b.team == team
-
-@lru_cache(maxsize=128)
-def top_selling_bolids(orders: Tuple[PurchaseOrder, ...], bolids: Tuple[Bolid, ...], k: int = 10) -> Tuple:
-    time.sleep(1)
-    sales = {b.id: 0 for b in bolids}
-    for order in orders:
-        for item in order.items:
-            if item.bolid_id in sales: sales[item.bolid_id] += item.quantity
-    sorted_ids = sorted(sales, key=sales.get, reverse=True)[:k]
-    bolid_map = {b.id: b for b in bolids}
-    return tuple(bolid_map[bid] for bid in sorted_ids)
-
 # ==============================================================================
 # ГЕНЕРАЦИЯ ДАННЫХ
 # ==============================================================================
 def generate_f1_mock_data(seed_path='data/seed.json', num_bolids=50, num_collectors=20, num_orders=40):
-    fake = Faker(); Faker.seed(0)
-    with open(seed_path, 'r', encoding='utf-8') as f: data = json.load(f)
-    eras = data.get('eras', []); era_ids = [e['id'] for e in eras]
-    teams = ["Mercedes", "Ferrari", "Red Bull Racing", "McLaren", "Williams", "Renault", "Jordan"]
-    tags = ["Чемпионский", "V10", "V8", "Гибрид", "Аэродинамический"]
-    image_urls = [
-        "https://www.mercedesamgf1.com/wp-content/uploads/sites/3/2023/02/W14_render_34_front_16x9_g-1.jpg",
-        "https://media.formula1.com/image/upload/f_auto,c_limit,w_1920,q_auto/f_auto,c_limit,w_1920,q_auto/f1-website/2023/Car-launches/Ferrari/SF-23_side_view.jpg",
-        "https://media.formula1.com/image/upload/f_auto,c_limit,w_1920,q_auto/f_auto,c_limit,w_1920,q_auto/f1-website/2023/Car-launches/Red-Bull-Racing/Red-Bull-RB19-side-2.jpg",
-        "https://media.formula1.com/image/upload/f_auto,c_limit,w_1920,q_auto/f_auto,c_limit,w_1920,q_auto/f1-website/2023/Car-launches/McLaren/MCL60-side.jpg",
-        "https://media.formula1.com/image/upload/f_auto,c_limit,w_1920,q_auto/f_auto,c_limit,w_1920,q_auto/f1-website/2023/Car-launches/Alpine/A523-side.jpg"
-    ]
-    bolids = []
-    for i in range(1, num_bolids + 1):
-        year = fake.random_int(min=1990, max=2023); team = fake.random_element(elements=teams)
-        bolids.append({"id": f"bolid_{i}", "name": f"{team} {fake.word().capitalize()}{year}", "team": team, "year": year, "price": fake.random_int(min=100000, max=5000000), "era_id": fake.random_element(elements=era_ids), "tags": fake.random_elements(elements=tags, length=fake.random_int(min=1, max=2), unique=True), "quantity_available": fake.random_int(min=0, max=5), "image_url": fake.random_element(elements=image_urls)})
-    collectors = [{"id": f"coll_{i}", "name": fake.name(), "tier": fake.random_element(elements=("Paddock Club", "Grandstand"))} for i in range(1, num_collectors + 1)]
-    orders = []
-    collector_ids = [c['id'] for c in collectors]; bolid_ids = [b['id'] for b in bolids]
-    if not bolid_ids: return
-    for i in range(1, num_orders + 1):
-        garage_items = [{"bolid_id": bid, "quantity": 1} for bid in fake.random_elements(elements=bolid_ids, length=fake.random_int(min=1, max=3), unique=True)]
-        if not garage_items: continue
-        total_price = sum(next((b['price'] for b in bolids if b['id'] == item['bolid_id']), 0) * item['quantity'] for item in garage_items)
-        orders.append({"id": f"order_{i}", "collector_id": fake.random_element(elements=collector_ids), "items": garage_items, "total_price": total_price, "timestamp": fake.iso8601()})
-    data.update({'bolids': bolids, 'collectors': collectors, 'purchase_orders': orders})
-    with open(seed_path, 'w', encoding='utf-8') as f: json.dump(data, f, indent=2, ensure_ascii=False)
+    from core.generator import MockSpec, write_dataset  # нужен только генератору данных
+    eras = [record for _, record in iter_seed_records(seed_path, ('eras',))]
+    if eras: write_dataset(seed_path, MockSpec(num_bolids, num_collectors, num_orders), eras)
 
 # ==============================================================================
 # ИНТЕРФЕЙС ПРИЛОЖЕНИЯ (UI)
@@ -236,18 +143,70 @@ def generate_f1_mock_data(seed_path='data/seed.json', num_bolids=50, num_collect
 st.set_page_config(layout="wide", page_title="F1 Collection Analytics")
 load_css()
 SEED_FILE = 'data/seed.json'
+INVENTORY_FILE = 'data/inventory.sqlite'
+JOURNAL_DIR = 'data/orders'
+DB_FILE = 'data/f1.sqlite'
+# 'json' - seed.json через снапшот в памяти, 'sqlite' - запросы страниц выполняет база DB_FILE
+STORAGE = os.environ.get('F1_STORAGE', 'json')
 if not os.path.exists('data'): os.makedirs('data')
 try:
-    with open(SEED_FILE, 'r', encoding='utf-8') as f: data = json.load(f)
-    if not data.get('bolids'): generate_f1_mock_data(SEED_FILE)
+    if next(iter_section(SEED_FILE, 'bolids'), None) is None: generate_f1_mock_data(SEED_FILE)
 except (FileNotFoundError, json.JSONDecodeError):
     st.error(f"Не удалось загрузить или создать файл {SEED_FILE}. Убедитесь, что папка 'data' и файл 'seed.json' с базовыми 'eras' существуют."); st.stop()
 
-@st.cache_data
-def load_app_data(): return load_seed_data(SEED_FILE)
-
-ERAS, BOLIDS, COLLECTORS, ORDERS = load_app_data()
-BOLID_MAP = {b.id: b for b in BOLIDS}; ERA_MAP = {e.id: e for e in ERAS}
+@st.cache_resource
+def load_app_data():
+    # Снапшот отображается в память, записи собираются лениво - старт не зависит от размера каталога
+    snapshot = load_snapshot(SEED_FILE)
+    return tuple(snapshot.eras), snapshot.bolids, snapshot.collectors, snapshot.purchase_orders
+
+@st.cache_resource
+def load_journal():
+    # Оформленные в приложении заказы; каждый сразу сбрасывается на диск
+    return OrderJournal(JOURNAL_DIR, sync_every=1)
+
+JOURNAL = load_journal()
+
+@st.cache_resource
+def load_store():
+    # Одно хранилище на процесс: соединения переживают перезапуски скрипта Streamlit
+    store = SQLiteStore(DB_FILE)
+    store.sync_from_seed(SEED_FILE)
+    # Заказы журнала, которых еще нет в базе: после импорта - все, иначе - оформленные с прошлого открытия
+    store.sync_journal(JOURNAL)
+    return store
+
+STORE = load_store() if STORAGE == 'sqlite' else None
+
+if STORE is None:
+    ERAS, BOLIDS, COLLECTORS, ORDERS = load_app_data()
+else:
+    ERAS = STORE.eras()
+ERA_MAP = {e.id: e for e in ERAS}
+
+# Индексы, остатки и агрегаты строятся при первом обращении со страницы, которой они нужны,
+# а не при старте: стартовый прогон скрипта не проходит по всем болидам и заказам.
+@st.cache_resource
+def load_catalog():
+    # Индексы каталога строятся один раз на версию данных и общие с core.transforms
+    return get_catalog(BOLIDS)
+
+@st.cache_resource
+def load_inventory():
+    store = SQLiteInventory(INVENTORY_FILE)
+    store.load(load_catalog().stock_table() if STORE is None else STORE.stock_table(), replace=False)
+    return InventoryService(store)
+
+@st.cache_resource
+def load_sales_cube():
+    # Продажи агрегируются один раз (seed.json + журнал); новые заказы дописываются в тот же куб
+    return SalesCube(BOLIDS, COLLECTORS, chain(ORDERS, JOURNAL.replay()))
+
+@st.cache_resource
+def load_top_sales():
+    # Продажи по болидам для отчетов: история (seed.json + журнал) считается при первом обращении,
+    # дальше оформленные заказы дописываются в тот же агрегатор
+    return SalesAggregator(BOLIDS, chain(ORDERS, JOURNAL.replay()))
 
 if 'garage' not in st.session_state:
     st.session_state.garage = Garage("coll_1", [])
@@ -275,21 +234,48 @@ def display_bolid_card(bolid: Bolid):
 if menu_choice == "Обзор":
     st.header("🏁 Обзор коллекции")
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Коллекционеров", f"{len(COLLECTORS)} 👥")
-    col2.metric("Уникальных болидов", f"{len(BOLIDS)} 🏎️")
-    col3.metric("Всего покупок", f"{len(ORDERS)} 🛒")
-    col4.metric("Объем рынка", f"${total_sales(ORDERS):,}")
+    if STORE is None:
+        sales = load_sales_cube()
+        num_collectors, num_bolids = len(COLLECTORS), len(BOLIDS)
+        num_orders, revenue = sales.total('orders'), sales.total()
+        by_month = {m.strftime("%Y-%m"): value for m, value in sales.series('month').items()}
+        by_team = {team: sales.total(team=team) for team in load_catalog().teams}
+    else:
+        num_collectors, num_bolids = STORE.count('collectors'), STORE.count('bolids')
+        num_orders, revenue = STORE.order_stats()
+        by_month = STORE.revenue_by_month()
+        by_team = STORE.revenue_by_team()
+    col1.metric("Коллекционеров", f"{num_collectors} 👥")
+    col2.metric("Уникальных болидов", f"{num_bolids} 🏎️")
+    col3.metric("Всего покупок", f"{num_orders} 🛒")
+    col4.metric("Объем рынка", f"${revenue:,}")
+    if by_month:
+        st.subheader("Выручка по месяцам")
+        st.bar_chart({"Месяц": list(by_month), "Выручка": list(by_month.values())}, x="Месяц", y="Выручка")
+    st.subheader("Выручка по командам")
+    st.dataframe([{"Команда": team, "Выручка": revenue} for team, revenue in sorted(by_team.items(), key=lambda kv: -kv[1])],
+                 use_container_width=True)
 
 elif menu_choice == "Каталог болидов":
     st.header("🏎️ Каталог болидов")
-    teams = sorted(list(set(b.team for b in BOLIDS)))
+    teams = sorted(load_catalog().teams) if STORE is None else list(STORE.teams())
     col1, col2, col3 = st.columns(3)
     with col1: selected_era_id = st.selectbox("Фильтр по эре", options=list(ERA_MAP.keys()), format_func=lambda x: ERA_MAP[x].name)
     with col2: price_range = st.slider("Диапазон цен ($)", 0, 5000000, (0, 5000000))
     with col3: selected_team = st.selectbox("Фильтр по команде", options=["Все"] + teams)
-    filtered_bolids = list(collect_bolids_recursive(ERAS, BOLIDS, selected_era_id))
-    filtered_bolids = list(filter(by_price_range(price_range[0], price_range[1]), filtered_bolids))
-    if selected_team != "Все": filtered_bolids = list(filter(by_team(selected_team), filtered_bolids))
+    era_ids = build_era_tree(ERAS).subtree_ids(selected_era_id) if STORE is None else STORE.era_subtree(selected_era_id)
+    criteria = EraIn(era_ids) & by_price_range(price_range[0], price_range[1])
+    if selected_team != "Все": criteria &= by_team(selected_team)
+    tag_query = st.text_input("Теги", placeholder="например: V10 & Чемпионский & ~Гибрид")
+    if tag_query.strip():
+        try: criteria &= by_tags(tag_query)
+        except ValueError as e: st.warning(f"Не удалось разобрать запрос по тегам: {e}")
+    if STORE is None:
+        plan = compile_plan(criteria, load_catalog())
+        filtered_bolids, explanation = plan.execute(), plan.explain()
+    else:
+        filtered_bolids, explanation = STORE.select_bolids(criteria), STORE.explain(criteria)
+    with st.expander("План фильтрации"): st.code(explanation)
     st.write(f"Найдено болидов: {len(filtered_bolids)}"); st.markdown("---")
     cols = st.columns(3)
     for i, bolid in enumerate(filtered_bolids):
@@ -302,21 +288,43 @@ elif menu_choice == "Мой гараж":
     if not garage.items:
         st.info("Ваш гараж пуст. Добавьте болиды из каталога.")
     else:
-        total = sum(BOLID_MAP[item.bolid_id].price * item.quantity for item in garage.items)
+        if STORE is None:
+            catalog = load_catalog()
+            garage_bolids = {item.bolid_id: catalog[item.bolid_id] for item in garage.items}
+            total = sum(garage_bolids[item.bolid_id].price * item.quantity for item in garage.items)
+        else:
+            garage_bolids, total = STORE.get_bolids(item.bolid_id for item in garage.items), STORE.garage_total(garage)
         for item in garage.items:
-            bolid = BOLID_MAP[item.bolid_id]
-            col1, col2, col3 = st.columns([3, 1, 1])
+            bolid = garage_bolids[item.bolid_id]
+            col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
             col1.write(f"**{bolid.name}**")
-            col2.write(f"Кол-во: {item.quantity}")
+            new_quantity = col2.number_input("Кол-во", min_value=0, value=item.quantity, key=f"qty_{item.bolid_id}")
             col3.write(f"${bolid.price * item.quantity:,}")
+            if col4.button("Убрать", key=f"remove_{item.bolid_id}"):
+                st.session_state.garage = remove_from_garage(garage, item.bolid_id); st.rerun()
+            if new_quantity != item.quantity:
+                st.session_state.garage = update_garage_quantity(garage, item.bolid_id, new_quantity); st.rerun()
         st.markdown("---")
         st.subheader(f"Итого: ${total:,}")
         if st.button("Оформить покупку"):
-            finalize_purchase(garage, BOLIDS, datetime.now().isoformat())
-            st.success("Покупка успешно оформлена!")
-            st.session_state.garage = Garage("coll_1", [])
-            time.sleep(2)
-            st.rerun()
+            # Остатки резервируются через общую базу: параллельные сессии не купят последний болид дважды
+            # Агрегаты берутся до записи в журнал: если они строятся сейчас, заказ не попадет в них дважды
+            sales, top_sales = (load_sales_cube(), load_top_sales()) if STORE is None else (None, None)
+            # В режиме sqlite каталог - несколько болидов гаража: список не кешируется и не вытесняет общий каталог
+            order = load_inventory().checkout(garage, BOLIDS if STORE is None else list(garage_bolids.values()),
+                                              datetime.now().isoformat())
+            if order is None:
+                st.error("Не хватает болидов на складе - покупка не оформлена.")
+            else:
+                JOURNAL.append(order)
+                if STORE is None:
+                    sales.add_order(order)
+                    top_sales.add_order(order)
+                else: STORE.sync_journal(JOURNAL)  # заодно заказы других процессов, оформленные в режиме json
+                st.success("Покупка успешно оформлена!")
+                st.session_state.garage = Garage("coll_1", [])
+                time.sleep(2)
+                st.rerun()
 
 elif menu_choice == "Отчеты":
     st.header("📊 Отчеты")
@@ -324,14 +332,19 @@ elif menu_choice == "Отчеты":
     k_top = st.slider("Количество топ-болидов", 1, 10, 5)
     if st.button("Сгенерировать отчет"):
         with st.spinner("Анализируем данные..."):
-            top_selling_bolids.cache_clear()
-            top_bolids = top_selling_bolids(ORDERS, BOLIDS, k_top)
+            top_bolids = load_top_sales().top_bolids(k_top) if STORE is None else STORE.top_selling_bolids(k_top)
         st.success("Отчет готов!")
-        st.dataframe(pd.DataFrame(top_bolids), use_container_width=True)
+        st.dataframe([bolid._asdict() for bolid in top_bolids], use_container_width=True)
 
 elif menu_choice == "Данные":
     st.header("📄 Сырые данные (seed.json)")
-    with st.expander("Эры Формулы 1"): st.dataframe(pd.DataFrame(ERAS))
-    with st.expander("Болиды"): st.dataframe(pd.DataFrame(BOLIDS))
-    with st.expander("Коллекционеры"): st.dataframe(pd.DataFrame(COLLECTORS))
-    with st.expander("История покупок"): st.dataframe(pd.DataFrame(ORDERS))
\ No newline at end of file
+    import pandas as pd  # pandas нужен только этой странице - не замедляет старт приложения
+    if STORE is None:
+        sections = {'bolids': BOLIDS, 'collectors': COLLECTORS, 'purchase_orders': ORDERS}
+    else:
+        # Тот же загрузчик, что для seed.json, читает разделы из базы
+        sections = {name: tuple(iter_section(DB_FILE, name)) for name in ('bolids', 'collectors', 'purchase_orders')}
+    with st.expander("Эры Формулы 1"): st.dataframe(pd.DataFrame(list(ERAS)))
+    with st.expander("Болиды"): st.dataframe(pd.DataFrame(list(sections['bolids'])))
+    with st.expander("Коллекционеры"): st.dataframe(pd.DataFrame(list(sections['collectors'])))
+    with st.expander("История покупок"): st.dataframe(pd.DataFrame(list(sections['purchase_orders'])))
\ No newline at end of file
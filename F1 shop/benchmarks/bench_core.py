@@ -0,0 +1,233 @@
+"""
+Время и пиковая память основных преобразований core на синтетических данных разного размера.
+
+    python -m benchmarks.bench_core --sizes 100,1000,10000,100000,1000000 --out bench.json
+    python -m benchmarks.bench_core --sizes 100,10000 --compare bench.json --threshold 1.25
+
+Данные строит core.generator (одинаковые при одинаковом --seed). Перед каждым
+прогоном кеши core сбрасываются, поэтому меряется сама работа, а не попадание в кеш.
+Время - минимум и медиана по повторам без tracemalloc; пик памяти - отдельный
+прогон под tracemalloc. Отчет - JSON с отсортированными ключами: отчеты разных
+коммитов сравниваются через --compare, регрессии завершают запуск с ошибкой.
+Полный прогон до 10^6 занимает десятки минут (в основном - проход под tracemalloc).
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.catalog import get_catalog
+from core.domain import CarEra, Discount, Garage, GarageItem
+from core.ftypes import _discount_table, validate_order
+from core.generator import MockSpec, iter_dataset, write_dataset
+from core.loader import SECTIONS
+from core.recursion import build_era_tree, collect_bolids_recursive, flatten_eras
+from core.transforms import (add_to_garage, by_era, by_price_range, by_tag, by_tags, by_team, finalize_purchase,
+                             load_seed_data, top_selling_bolids, total_sales)
+
+FORMAT = 1
+SIZES = (100, 1000, 10_000, 100_000, 1_000_000)
+BASE_ERAS = [{"id": f"era_{i}", "name": f"Эра {i}", "parent": None} for i in range(1, 6)]
+
+
+class Case(NamedTuple):
+    """Сценарий: setup(size, data) готовит аргументы (вне замера), run(args) - измеряемая работа."""
+    setup: Callable[[int, 'Data'], Any]
+    run: Callable[[Any], Any]
+
+
+class Data:
+    """Синтетический набор на size заказов, строится один раз на размер и общий для сценариев."""
+
+    def __init__(self, size: int, seed: int):
+        self.size = size
+        self.spec = MockSpec(bolids=max(10, size // 10), collectors=max(10, size // 10), orders=size, seed=seed)
+        self._sections: Optional[Dict[str, Tuple[Any, ...]]] = None
+        self._tmp = tempfile.TemporaryDirectory()
+        self._seed_path: Optional[str] = None
+
+    def section(self, name: str) -> Tuple[Any, ...]:
+        if self._sections is None:
+            sections: Dict[str, List[Any]] = {name: [] for name in SECTIONS}
+            for section, record in iter_dataset(self.spec, BASE_ERAS):
+                sections[section].append(SECTIONS[section](record))
+            self._sections = {name: tuple(items) for name, items in sections.items()}
+        return self._sections[name]
+
+    def seed_path(self) -> str:
+        if self._seed_path is None:
+            self._seed_path = write_dataset(os.path.join(self._tmp.name, "seed.json"), self.spec, BASE_ERAS)
+        return self._seed_path
+
+    def close(self) -> None:
+        self._tmp.cleanup()
+
+
+def era_tree(size: int) -> Tuple[CarEra, ...]:
+    # Четверичное дерево: глубина log4(size), у корня era_1 четверть всех эр.
+    return tuple(CarEra(f"era_{i}", f"Эра {i}", None if i < 4 else f"era_{i // 4 - 1}") for i in range(size))
+
+
+def clear_caches() -> None:
+    build_era_tree.cache_clear()
+    get_catalog.cache_clear()
+    top_selling_bolids.cache_clear()
+    _discount_table.cache_clear()
+
+
+def _filter_case(make_predicate: Callable[[], Any]) -> Case:
+    return Case(lambda size, data: (make_predicate(), data.section('bolids')),
+                lambda args: tuple(filter(args[0], args[1])))
+
+
+def _collect_setup(size: int, data: 'Data') -> Tuple[Any, ...]:
+    bolids = data.section('bolids')
+    eras = era_tree(max(5, len(bolids) // 10))
+    # Болиды перераспределяются по всем эрам дерева
+    bolids = tuple(b._replace(era_id=eras[n % len(eras)].id) for n, b in enumerate(bolids))
+    return eras, bolids
+
+
+def _add_to_garage(ids: Tuple[str, ...]) -> Garage:
+    garage = Garage("coll_1")
+    for bolid_id in ids:
+        garage = add_to_garage(garage, bolid_id, 1)
+    return garage
+
+
+def _finalize_setup(size: int, data: 'Data') -> Tuple[Any, ...]:
+    bolids = data.section('bolids')
+    garage = Garage("coll_1", [GarageItem(b.id, 1) for b in bolids[:100]])
+    return garage, bolids
+
+
+def _validate_setup(size: int, data: 'Data') -> Tuple[Any, ...]:
+    bolids = data.section('bolids')
+    stock = {b.id: b.quantity_available * 1000 for b in bolids}
+    discounts = tuple(Discount(b.id, 10.0) for b in bolids[::10])
+    return data.section('purchase_orders'), stock, discounts
+
+
+CASES: Dict[str, Case] = {
+    'flatten_eras': Case(lambda size, data: era_tree(size), lambda eras: flatten_eras(eras, "era_1")),
+    'collect_bolids_recursive': Case(_collect_setup, lambda args: collect_bolids_recursive(args[0], args[1], "era_1")),
+    'by_era': _filter_case(lambda: by_era("era_1")),
+    'by_team': _filter_case(lambda: by_team("Ferrari")),
+    'by_price_range': _filter_case(lambda: by_price_range(1_000_000, 2_000_000)),
+    'by_tag': _filter_case(lambda: by_tag("V10")),
+    'by_tags': _filter_case(lambda: by_tags("V10 & ~Гибрид")),
+    'add_to_garage': Case(lambda size, data: tuple(f"bolid_{i}" for i in range(size)), _add_to_garage),
+    'finalize_purchase': Case(_finalize_setup, lambda args: finalize_purchase(args[0], args[1], "2024-01-01T00:00:00")),
+    'total_sales': Case(lambda size, data: data.section('purchase_orders'), total_sales),
+    'top_selling_bolids': Case(lambda size, data: (data.section('purchase_orders'), data.section('bolids')),
+                               lambda args: top_selling_bolids(args[0], args[1], 10)),
+    'validate_order': Case(_validate_setup,
+                           lambda args: [validate_order(order, args[1], args[2]) for order in args[0]]),
+    'load_seed_data': Case(lambda size, data: data.seed_path(), load_seed_data),
+}
+
+
+def measure(case: Case, args: Any, repeat: int, budget: float) -> Dict[str, Any]:
+    timings = []
+    while len(timings) < repeat and (not timings or sum(timings) < budget):
+        clear_caches()
+        gc.collect()
+        started = time.perf_counter()
+        case.run(args)
+        timings.append(time.perf_counter() - started)
+    clear_caches()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        case.run(args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(min(timings), 7), "median": round(statistics.median(timings), 7), "repeats": len(timings),
+            "peak_kib": round(peak / 1024, 1)}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any], threshold: float, floor: float) -> List[str]:
+    """Регрессии: время или пик памяти выросли больше чем в threshold раз (время - только выше floor секунд)."""
+    regressions = []
+    for name, sizes in sorted(new["results"].items()):
+        for size, result in sorted(sizes.items(), key=lambda kv: int(kv[0])):
+            before = old["results"].get(name, {}).get(size)
+            if before is None:
+                continue
+            if result["seconds"] > floor and result["seconds"] > before["seconds"] * threshold:
+                regressions.append(f"{name}[{size}] time {before['seconds']:.6f}s -> {result['seconds']:.6f}s")
+            if result["peak_kib"] > 64 and result["peak_kib"] > before["peak_kib"] * threshold:
+                regressions.append(f"{name}[{size}] peak {before['peak_kib']} KiB -> {result['peak_kib']} KiB")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)))
+    parser.add_argument("--cases", default=",".join(CASES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=2.0, help="секунд на повторы одного замера")
+    parser.add_argument("--out")
+    parser.add_argument("--compare", help="отчет предыдущего запуска")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    parser.add_argument("--floor", type=float, default=0.005, help="более быстрые замеры не считаются регрессией")
+    args = parser.parse_args()
+
+    names = args.cases.split(",")
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        raise SystemExit(f"Unknown cases: {', '.join(unknown)}")
+    report: Dict[str, Any] = {
+        "format": FORMAT,
+        "meta": {"commit": git_commit(), "python": platform.python_version(), "platform": platform.platform(),
+                 "seed": args.seed},
+        "results": {name: {} for name in names},
+    }
+    for size in map(int, args.sizes.split(",")):
+        data = Data(size, args.seed)
+        try:
+            for name in names:
+                case = CASES[name]
+                result = measure(case, case.setup(size, data), args.repeat, args.budget)
+                report["results"][name][str(size)] = result
+                print({"case": name, "size": size, **result})
+        finally:
+            data.close()
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True, ensure_ascii=False)
+            f.write("\n")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("format") != FORMAT:
+            raise SystemExit(f"Incompatible report format in {args.compare}")
+        regressions = compare(baseline, report, args.threshold, args.floor)
+        print({"compared_with": baseline["meta"].get("commit"), "regressions": len(regressions)})
+        if regressions:
+            raise SystemExit("Regressions:\n" + "\n".join(regressions))
+
+
+if __name__ == "__main__":
+    main()
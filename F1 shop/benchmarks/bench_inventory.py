@@ -0,0 +1,90 @@
+"""
+Стресс-тест резервирования остатков под конкуренцией.
+
+    python -m benchmarks.bench_inventory --workers 8 --stock 2000
+
+Несколько потоков (MemoryInventory) или процессов (SQLiteInventory) одновременно
+списывают по одной единице одного и того же болида. Проверяется, что продано
+ровно столько, сколько было на складе, и измеряется число резервирований в секунду.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.domain import GarageItem
+from core.inventory import InventoryService, MemoryInventory, SQLiteInventory
+
+BOLID_ID = "bolid_1"
+
+
+def _buy_until_sold_out(service: InventoryService) -> int:
+    sold = 0
+    while service.reserve([GarageItem(BOLID_ID, 1)]):
+        sold += 1
+    return sold
+
+
+def run_threads(workers: int, stock: int) -> dict:
+    service = InventoryService(MemoryInventory({BOLID_ID: stock}))
+    sold = [0] * workers
+
+    def worker(i: int) -> None:
+        sold[i] = _buy_until_sold_out(service)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    seconds = time.perf_counter() - started
+    return {"backend": "memory/threads", "workers": workers, "stock": stock, "sold": sum(sold),
+            "left": service.available(BOLID_ID), "conflicts": service.conflicts,
+            "seconds": round(seconds, 4), "reservations_per_second": round(sum(sold) / seconds, 1)}
+
+
+def _process_worker(path: str) -> int:
+    store = SQLiteInventory(path)
+    try:
+        return _buy_until_sold_out(InventoryService(store))
+    finally:
+        store.close()
+
+
+def run_processes(workers: int, stock: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "inventory.sqlite")
+        store = SQLiteInventory(path)
+        store.load({BOLID_ID: stock})
+        started = time.perf_counter()
+        with multiprocessing.Pool(workers) as pool:
+            sold = pool.map(_process_worker, [path] * workers)
+        seconds = time.perf_counter() - started
+        left = InventoryService(store).available(BOLID_ID)
+        store.close()
+    return {"backend": "sqlite/processes", "workers": workers, "stock": stock, "sold": sum(sold),
+            "left": left, "seconds": round(seconds, 4),
+            "reservations_per_second": round(sum(sold) / seconds, 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--stock", type=int, default=2000)
+    args = parser.parse_args()
+
+    for report in (run_threads(args.workers, args.stock), run_processes(args.workers, args.stock)):
+        oversold = report["sold"] > report["stock"] or report["left"] != report["stock"] - report["sold"]
+        print(report)
+        if oversold:
+            raise SystemExit(f"OVERSELL detected: {report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Пропускная способность журнала заказов по мере роста истории.
+
+    python -m benchmarks.bench_journal --rounds 10 --orders 20000
+
+Каждый раунд дописывает одинаковую пачку заказов в один и тот же журнал
+(с повторным открытием между раундами) и меряет заказы в секунду.
+Скорость не должна падать с ростом числа уже записанных заказов.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.domain import GarageItem, PurchaseOrder
+from core.journal import OrderJournal
+
+
+def make_orders(count: int, start: int, rng: random.Random) -> list:
+    return [
+        PurchaseOrder(f"order_{start + i}", f"coll_{rng.randrange(1000)}",
+                      [GarageItem(f"bolid_{rng.randrange(500)}", rng.randint(1, 3)) for _ in range(rng.randint(1, 4))],
+                      rng.randrange(10 ** 8), "2023-06-01T12:00:00")
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--segment-mib", type=int, default=4)
+    parser.add_argument("--sync-every", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        written = 0
+        for round_no in range(args.rounds):
+            batch = make_orders(args.orders, written, rng)
+            started = time.perf_counter()
+            with OrderJournal(tmp, segment_bytes=args.segment_mib << 20, sync_every=args.sync_every) as journal:
+                for order in batch:
+                    journal.append(order)
+            seconds = time.perf_counter() - started
+            written += len(batch)
+            print({"round": round_no, "history": written - len(batch), "orders": len(batch),
+                   "orders_per_second": round(len(batch) / seconds, 1)})
+
+        with OrderJournal(tmp) as journal:
+            started = time.perf_counter()
+            compacted = journal.compact()
+            compact_seconds = time.perf_counter() - started
+            started = time.perf_counter()
+            replayed = sum(1 for _ in journal.replay())
+            replay_seconds = time.perf_counter() - started
+        print({"compacted_upto": compacted, "compact_seconds": round(compact_seconds, 3),
+               "replayed": replayed, "replay_seconds": round(replay_seconds, 3)})
+        if replayed != written:
+            raise SystemExit(f"Replayed {replayed} orders, expected {written}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Микробенчмарк цепочек Maybe.
+
+    python -m benchmarks.bench_maybe --orders 200000
+
+Сравниваются три способа провести заказ через проверку остатков и расчет суммы:
+прежний Maybe (без __slots__, новый Nothing на каждый шаг), текущий Maybe и
+MaybeChain. Для каждого - время и пик памяти на сохраненных результатах.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.domain import GarageItem, PurchaseOrder
+from core.ftypes import Maybe, MaybeChain
+
+
+class LegacyMaybe:
+    """Maybe в том виде, в каком он был до __slots__ и общего Nothing."""
+
+    def __init__(self, value: Optional[Any]):
+        self._value = value
+
+    @staticmethod
+    def Some(value: Any) -> 'LegacyMaybe':
+        if value is None:
+            raise ValueError("Some value cannot be None.")
+        return LegacyMaybe(value)
+
+    @staticmethod
+    def Nothing() -> 'LegacyMaybe':
+        return LegacyMaybe(None)
+
+    def is_some(self) -> bool:
+        return self._value is not None
+
+    def is_nothing(self) -> bool:
+        return self._value is None
+
+    def bind(self, func: Callable) -> 'LegacyMaybe':
+        if self.is_nothing():
+            return LegacyMaybe.Nothing()
+        return func(self._value)
+
+    def map(self, func: Callable) -> 'LegacyMaybe':
+        if self.is_nothing():
+            return LegacyMaybe.Nothing()
+        return LegacyMaybe.Some(func(self._value))
+
+
+def make_orders(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [
+        PurchaseOrder(f"order_{i}", f"coll_{i % 100}",
+                      [GarageItem(f"bolid_{rng.randrange(50)}", rng.randint(1, 3)) for _ in range(rng.randint(1, 4))],
+                      0, "")
+        for i in range(count)
+    ]
+
+
+def make_steps(cls: Any, stock: dict, prices: dict) -> tuple:
+    def check_stock(order):
+        for item in order.items:
+            if stock.get(item.bolid_id, 0) < item.quantity:
+                return cls.Nothing()
+        return cls.Some(order)
+
+    def check_items(order):
+        return cls.Some(order) if order.items else cls.Nothing()
+
+    def total(order):
+        return sum(prices[item.bolid_id] * item.quantity for item in order.items)
+
+    return check_stock, check_items, total, round
+
+
+def run(name: str, validate: Callable, orders: list) -> dict:
+    tracemalloc.start()
+    started = time.perf_counter()
+    results = [validate(order) for order in orders]
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    passed = sum(1 for r in results if r.is_some())
+    return {"variant": name, "orders": len(orders), "passed": passed,
+            "seconds": round(seconds, 4), "peak_kib": peak // 1024}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--orders", type=int, default=200000)
+    args = parser.parse_args()
+
+    orders = make_orders(args.orders)
+    stock = {f"bolid_{i}": 2 for i in range(50)}
+    prices = {f"bolid_{i}": 1000 * (i + 1) for i in range(50)}
+
+    def step_by_step(cls):
+        check_stock, check_items, total, rounded = make_steps(cls, stock, prices)
+        return lambda o: cls.Some(o).bind(check_stock).bind(check_items).map(total).map(rounded)
+
+    check_stock, check_items, total, rounded = make_steps(Maybe, stock, prices)
+    fused = MaybeChain().bind(check_stock).bind(check_items).map(total).map(rounded).run
+    variants = (("legacy", step_by_step(LegacyMaybe)), ("slotted", step_by_step(Maybe)), ("fused", fused))
+
+    reports = [run(name, validate, orders) for name, validate in variants]
+    for report in reports:
+        print(report)
+    if len({r["passed"] for r in reports}) != 1:
+        raise SystemExit(f"Variants disagree: {reports}")
+
+
+if __name__ == "__main__":
+    main()
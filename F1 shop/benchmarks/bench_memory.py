@@ -0,0 +1,76 @@
+"""
+Память под каталог и историю заказов: NamedTuple-модели против компактных.
+
+    python -m benchmarks.bench_memory --bolids 100000 --orders 1000000
+
+Записи генерируются одинаковыми для обоих вариантов; замеряется прирост памяти
+(tracemalloc) после построения коллекции, включая строки.
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import tracemalloc
+from typing import Callable, Iterator
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.compact import CompactBolid, OrderTable
+from core.domain import Bolid, GarageItem, PurchaseOrder
+
+TEAMS = ("Ferrari", "McLaren", "Williams", "Red Bull Racing", "Mercedes", "Renault", "Jordan")
+TAGS = ("Чемпионский", "V10", "V8", "Гибрид", "Аэродинамический")
+
+
+def _fresh(value: str) -> str:
+    # Новый объект строки на каждую запись - как после разбора JSON.
+    return value.encode().decode()
+
+
+def generate_bolids(count: int, seed: int = 0) -> Iterator[Bolid]:
+    rng = random.Random(seed)
+    for i in range(count):
+        tags = [_fresh(tag) for tag in rng.sample(TAGS, rng.randint(0, 2))]
+        yield Bolid(f"bolid_{i}", f"Bolid {i}", _fresh(rng.choice(TEAMS)), 1950 + i % 75, rng.randrange(10 ** 7),
+                    f"era_{i % 9}", tags, rng.randint(0, 5))
+
+
+def generate_orders(count: int, bolids: int, seed: int = 0) -> Iterator[PurchaseOrder]:
+    rng = random.Random(seed)
+    for i in range(count):
+        items = [GarageItem(f"bolid_{rng.randrange(bolids)}", rng.randint(1, 3)) for _ in range(rng.randint(1, 4))]
+        yield PurchaseOrder(f"order_{i}", f"coll_{i % 1000}", items, rng.randrange(10 ** 8),
+                            f"2023-{i % 12 + 1:02d}-{i % 28 + 1:02d}T12:00:00")
+
+
+def measure(name: str, build: Callable[[], object], rows: int) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    data = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return {"variant": name, "rows": rows, "mib": round(current / 2 ** 20, 1),
+            "bytes_per_row": round(current / rows) if rows else 0}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bolids", type=int, default=100_000)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    reports = [
+        measure("Bolid", lambda: tuple(generate_bolids(args.bolids)), args.bolids),
+        measure("CompactBolid", lambda: tuple(map(CompactBolid.from_bolid, generate_bolids(args.bolids))),
+                args.bolids),
+        measure("PurchaseOrder", lambda: tuple(generate_orders(args.orders, args.bolids)), args.orders),
+        measure("OrderTable", lambda: OrderTable(generate_orders(args.orders, args.bolids)), args.orders),
+    ]
+    for report in reports:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
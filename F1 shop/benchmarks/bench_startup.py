@@ -0,0 +1,88 @@
+"""
+Время холодного импорта модулей core.
+
+    python -m benchmarks.bench_startup --repeat 5
+
+Каждый модуль импортируется в свежем интерпретаторе с -X importtime: так видно
+и собственное время модуля, и всю цепочку зависимостей. Из замера вычитается
+запуск пустого интерпретатора. Если после импорта в sys.modules оказались тяжелые
+библиотеки (pandas, faker, numpy, streamlit), бенчмарк завершается с ошибкой.
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("pandas", "faker", "numpy", "streamlit")
+
+_PROBE = "import sys, json, {module}; print(json.dumps(sorted(m for m in {heavy!r} if m in sys.modules)))"
+
+
+def core_modules() -> list:
+    paths = glob.glob(os.path.join(ROOT, "core", "*.py"))
+    return sorted("core." + os.path.splitext(os.path.basename(p))[0] for p in paths)
+
+
+def _run(args: list) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True)
+
+
+def _wall(args: list, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _run(args)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def _import_times(module: str) -> dict:
+    """Накопленное время (мкс) каждого импорта из отчета -X importtime."""
+    stderr = _run(["-X", "importtime", "-c", f"import {module}"]).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def measure(module: str, repeat: int, baseline: float) -> dict:
+    loaded_heavy = json.loads(_run(["-c", _PROBE.format(module=module, heavy=HEAVY)]).stdout)
+    times = _import_times(module)
+    own = {name: us for name, us in times.items() if name.split(".")[0] == "core"}
+    return {
+        "module": module,
+        "wall_ms": round((_wall(["-c", f"import {module}"], repeat) - baseline) * 1000, 2),
+        "import_ms": round(times.get(module, 0) / 1000, 2),
+        "slowest_dependency": max((n for n in times if n not in own), key=times.get, default=None),
+        "heavy": loaded_heavy,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("modules", nargs="*", help="по умолчанию - все модули core")
+    args = parser.parse_args()
+
+    baseline = _wall(["-c", "pass"], args.repeat)
+    print({"baseline_ms": round(baseline * 1000, 2)})
+    heavy = []
+    for module in args.modules or core_modules():
+        report = measure(module, args.repeat, baseline)
+        print(report)
+        if report["heavy"]:
+            heavy.append(report)
+    if heavy:
+        raise SystemExit(f"Heavy dependencies imported at startup: {heavy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Пиковая память конвейера filter -> map -> top-k: кортежи против потоковых стадий.
+
+    python -m benchmarks.bench_stream --rows 1000000
+
+Болиды генерируются на лету, поэтому в потоковом варианте пик не должен расти
+с числом строк; в варианте с кортежами он растет линейно.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from typing import Iterator
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.compose import filtering, lazy_pipe, mapping, pipe, top_k
+from core.domain import Bolid
+
+TEAMS = ("Ferrari", "McLaren", "Williams", "Red Bull Racing", "Mercedes")
+
+
+def generate_bolids(rows: int) -> Iterator[Bolid]:
+    for i in range(rows):
+        yield Bolid(f"bolid_{i}", f"Bolid {i}", TEAMS[i % len(TEAMS)], 1980 + i % 45,
+                    (i * 7919) % 5_000_000, f"era_{i % 7}", [], i % 3)
+
+
+def is_ferrari(bolid: Bolid) -> bool:
+    return bolid.team == "Ferrari"
+
+
+def price_and_id(bolid: Bolid) -> tuple:
+    return bolid.price, bolid.id
+
+
+def eager(k: int):
+    return pipe(tuple,
+                lambda bolids: tuple(filter(is_ferrari, bolids)),
+                lambda bolids: tuple(map(price_and_id, bolids)),
+                lambda rows: sorted(rows, reverse=True)[:k])
+
+
+def streaming(k: int):
+    return lazy_pipe(filtering(is_ferrari), mapping(price_and_id), top_k(k))
+
+
+def run(name: str, pipeline, rows: int) -> dict:
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = pipeline(generate_bolids(rows))
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"variant": name, "rows": rows, "seconds": round(seconds, 4), "peak_kib": peak // 1024, "top": result[0]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    reports = [run("eager", eager(args.k), args.rows), run("streaming", streaming(args.k), args.rows)]
+    for report in reports:
+        print(report)
+    if reports[0]["top"] != reports[1]["top"]:
+        raise SystemExit(f"Variants disagree: {reports}")
+
+
+if __name__ == "__main__":
+    main()
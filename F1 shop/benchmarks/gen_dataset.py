@@ -0,0 +1,46 @@
+"""
+Генерация нагрузочного набора данных (10^6-10^8 заказов) для бенчмарков.
+
+    python -m benchmarks.gen_dataset --orders 1000000 --out data/load.jsonl --workers 4
+
+Формат по расширению --out: .jsonl, .snap или .json (как seed.json). Эры берутся
+из --eras. Результат зависит только от параметров и --seed, но не от --workers.
+.snap строится в памяти (около 0.7 КБ на заказ), для 10^7 заказов и больше - .jsonl.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.generator import MockSpec, write_dataset
+from core.loader import iter_seed_records
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--bolids", type=int, default=10_000)
+    parser.add_argument("--collectors", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--shard-size", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--eras", default="data/seed.json")
+    args = parser.parse_args()
+
+    eras = [record for _, record in iter_seed_records(args.eras, ("eras",))]
+    if not eras:
+        raise SystemExit(f"No eras in {args.eras}")
+    spec = MockSpec(bolids=args.bolids, collectors=args.collectors, orders=args.orders, seed=args.seed,
+                    shard_size=args.shard_size)
+    started = time.perf_counter()
+    write_dataset(args.out, spec, eras, workers=args.workers)
+    seconds = time.perf_counter() - started
+    print({"out": args.out, "orders": args.orders, "workers": args.workers, "seconds": round(seconds, 2),
+           "orders_per_second": round(args.orders / seconds), "mib": round(os.path.getsize(args.out) / 2 ** 20, 1)})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+from datetime import date, datetime, timedelta
+from threading import Lock
+from typing import Any, Collection, Dict, Iterable, List, Optional, Tuple, Union
+
+from core.domain import Bolid, Collector, PurchaseOrder
+
+GRAINS = ('hour', 'day', 'month')
+
+# Фильтр измерения: None - без фильтра, строка - одно значение, коллекция - любое из них
+# (например, EraTree.subtree_ids(era_id) для эры вместе с подэрами).
+DimFilter = Union[None, str, Collection[Optional[str]]]
+
+# (команда, эра, уровень коллекционера)
+_Dims = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+def _buckets(moment: datetime) -> Tuple[int, int, int]:
+    """Номера часа, дня и месяца, в которые попадает момент."""
+    day = moment.toordinal()
+    return day * 24 + moment.hour, day, moment.year * 12 + moment.month - 1
+
+
+def _bucket_start(grain: str, bucket: int) -> datetime:
+    if grain == 'hour':
+        return datetime.fromordinal(bucket // 24) + timedelta(hours=bucket % 24)
+    if grain == 'day':
+        return datetime.fromordinal(bucket)
+    return datetime(bucket // 12, bucket % 12 + 1, 1)
+
+
+def _floor_hour(moment: Union[date, datetime]) -> datetime:
+    if not isinstance(moment, datetime):
+        return datetime(moment.year, moment.month, moment.day)
+    return moment.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+
+
+def _next_month(moment: datetime) -> datetime:
+    return datetime(moment.year + moment.month // 12, moment.month % 12 + 1, 1)
+
+
+def _cover(start: datetime, end: datetime) -> List[Tuple[int, int]]:
+    """
+    Разбивает [start, end) на минимальный набор ячеек: целые месяцы в середине,
+    дни и часы по краям. Возвращает (номер уровня, номер ячейки).
+    """
+    cells = []
+    moment = start
+    while moment < end:
+        hour, day, month = _buckets(moment)
+        if moment.day == 1 and moment.hour == 0 and _next_month(moment) <= end:
+            cells.append((2, month))
+            moment = _next_month(moment)
+        elif moment.hour == 0 and moment + timedelta(days=1) <= end:
+            cells.append((1, day))
+            moment += timedelta(days=1)
+        else:
+            cells.append((0, hour))
+            moment += timedelta(hours=1)
+    return cells
+
+
+def _split(total: int, weights: List[int]) -> List[int]:
+    """Целочисленно делит total пропорционально весам; сумма частей равна total."""
+    weight_sum = sum(weights)
+    if not weight_sum:
+        weights, weight_sum = [1] * len(weights), len(weights)
+    shares = [total * w // weight_sum for w in weights]
+    # Остаток от округления вниз достается позициям с наибольшей дробной частью.
+    remainders = sorted(range(len(weights)), key=lambda i: (-(total * weights[i] % weight_sum), i))
+    for i in remainders[:total - sum(shares)]:
+        shares[i] += 1
+    return shares
+
+
+def _matches(value: Optional[str], wanted: DimFilter) -> bool:
+    if wanted is None:
+        return True
+    if isinstance(wanted, str):
+        return value == wanted
+    return value in wanted
+
+
+class SalesCube:
+    """
+    Предагрегированные продажи в разрезе время x команда x эра x уровень коллекционера.
+    Время заказа разбирается один раз при добавлении; каждая позиция сразу
+    попадает в ячейки часа, дня и месяца. Запрос за период собирается из целых
+    месяцев и дней и только по краям - из часов, без прохода по заказам.
+
+    Выручка заказа (total_price) делится между его позициями пропорционально
+    цене каталога x количеству, поэтому сумма по командам или эрам в точности
+    равна сумме заказов. Часовой пояс в timestamp игнорируется - берется местное время заказа.
+    """
+
+    def __init__(self, bolids: Iterable[Bolid], collectors: Iterable[Collector],
+                 orders: Iterable[PurchaseOrder] = ()):
+        self._bolids: Dict[str, Tuple[str, str, int]] = {b.id: (b.team, b.era_id, b.price) for b in bolids}
+        self._tiers: Dict[str, str] = {c.id: c.tier for c in collectors}
+        # По уровню: номер ячейки -> измерения -> [выручка, штуки]; и номер ячейки -> уровень -> [заказы, выручка].
+        self._items: Tuple[Dict[int, Dict[_Dims, List[int]]], ...] = ({}, {}, {})
+        self._orders: Tuple[Dict[int, Dict[Optional[str], List[int]]], ...] = ({}, {}, {})
+        self._lock = Lock()
+        self.add_orders(orders)
+
+    def add_order(self, order: PurchaseOrder) -> None:
+        buckets = _buckets(_floor_hour(datetime.fromisoformat(order.timestamp)))
+        tier = self._tiers.get(order.collector_id)
+        rows = [self._bolids.get(item.bolid_id, (None, None, 0)) for item in order.items]
+        revenue = _split(order.total_price, [price * item.quantity for (_, _, price), item in zip(rows, order.items)])
+        with self._lock:
+            for level, bucket in enumerate(buckets):
+                cells = self._items[level].setdefault(bucket, {})
+                for (team, era_id, _), item, share in zip(rows, order.items, revenue):
+                    cell = cells.setdefault((team, era_id, tier), [0, 0])
+                    cell[0] += share
+                    cell[1] += item.quantity
+                if not order.items:
+                    cells.setdefault((None, None, tier), [0, 0])[0] += order.total_price
+                cell = self._orders[level].setdefault(bucket, {}).setdefault(tier, [0, 0])
+                cell[0] += 1
+                cell[1] += order.total_price
+
+    def add_orders(self, orders: Iterable[PurchaseOrder]) -> None:
+        for order in orders:
+            self.add_order(order)
+
+    def _cells(self, start: Optional[Union[date, datetime]],
+               end: Optional[Union[date, datetime]]) -> List[Tuple[int, int]]:
+        if start is None and end is None:
+            return [(2, month) for month in self._items[2]]
+        months = self._items[2]
+        if not months:
+            return []
+        first = _floor_hour(start) if start is not None else _bucket_start('month', min(months))
+        last = _floor_hour(end) if end is not None else _next_month(_bucket_start('month', max(months)))
+        return _cover(first, last)
+
+    def total(self, measure: str = 'revenue', start: Optional[Union[date, datetime]] = None,
+              end: Optional[Union[date, datetime]] = None, team: DimFilter = None,
+              era: DimFilter = None, tier: DimFilter = None) -> int:
+        """
+        Сумма measure ('revenue', 'units' или 'orders') за [start, end) с точностью до часа.
+        Для 'orders' доступен только фильтр по tier: заказ с болидами разных команд
+        нельзя честно приписать одной из них.
+        """
+        with self._lock:
+            if measure == 'orders':
+                if team is not None or era is not None:
+                    raise ValueError("orders can only be filtered by tier")
+                return sum(
+                    count
+                    for level, bucket in self._cells(start, end)
+                    for order_tier, (count, _) in self._orders[level].get(bucket, {}).items()
+                    if _matches(order_tier, tier)
+                )
+            index = self._measure_index(measure)
+            return sum(
+                values[index]
+                for level, bucket in self._cells(start, end)
+                for (cell_team, cell_era, cell_tier), values in self._items[level].get(bucket, {}).items()
+                if _matches(cell_team, team) and _matches(cell_era, era) and _matches(cell_tier, tier)
+            )
+
+    def series(self, grain: str = 'day', measure: str = 'revenue', by: Optional[str] = None,
+               start: Optional[Union[date, datetime]] = None, end: Optional[Union[date, datetime]] = None,
+               team: DimFilter = None, era: DimFilter = None, tier: DimFilter = None) -> Dict[Any, Any]:
+        """
+        Ряд по ячейкам grain ('hour', 'day', 'month') в хронологическом порядке:
+        начало ячейки -> значение, а с by ('team', 'era', 'tier') -> {значение измерения: сумма}.
+        Ячейка входит в ряд, если ее начало попадает в [start, end).
+        """
+        level = GRAINS.index(grain)
+        index = self._measure_index(measure)
+        dim = ('team', 'era', 'tier').index(by) if by is not None else None
+        lower = _floor_hour(start) if start is not None else None
+        upper = _floor_hour(end) if end is not None else None
+        result: Dict[Any, Any] = {}
+        with self._lock:
+            for bucket in sorted(self._items[level]):
+                label = _bucket_start(grain, bucket)
+                if (lower is not None and label < lower) or (upper is not None and label >= upper):
+                    continue
+                for dims, values in self._items[level][bucket].items():
+                    if not (_matches(dims[0], team) and _matches(dims[1], era) and _matches(dims[2], tier)):
+                        continue
+                    if dim is None:
+                        result[label] = result.get(label, 0) + values[index]
+                    else:
+                        row = result.setdefault(label, {})
+                        row[dims[dim]] = row.get(dims[dim], 0) + values[index]
+        return result
+
+    @staticmethod
+    def _measure_index(measure: str) -> int:
+        if measure not in ('revenue', 'units'):
+            raise ValueError(f"Unknown measure: {measure!r}")
+        return 0 if measure == 'revenue' else 1
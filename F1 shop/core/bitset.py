@@ -0,0 +1,32 @@
+from typing import Iterable, Iterator
+
+# Битовые множества строк на обычных int: бит i установлен, если строка i входит в выборку.
+# AND/OR/NOT над целыми масками выполняются в C, то есть векторно по всем строкам сразу.
+
+
+def from_positions(positions: Iterable[int]) -> int:
+    # Собираем биты в bytearray: сдвиги по большому int стоили бы O(n) на каждую позицию.
+    positions = list(positions)
+    if not positions:
+        return 0
+    buf = bytearray((max(positions) >> 3) + 1)
+    for i in positions:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, 'little')
+
+
+def full(size: int) -> int:
+    return (1 << size) - 1
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Номера установленных битов по возрастанию; поиск единиц идет по строке в C."""
+    bits = bin(mask)[:1:-1]
+    i = bits.find('1')
+    while i != -1:
+        yield i
+        i = bits.find('1', i + 1)
+
+
+def count(mask: int) -> int:
+    return mask.bit_count()
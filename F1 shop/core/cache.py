@@ -0,0 +1,99 @@
+import inspect
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+from typing import Any, Callable, Hashable, List, NamedTuple, Optional
+
+_SCALARS = (str, bytes, int, float, complex, bool, type(None), frozenset)
+
+
+class CacheInfo(NamedTuple):
+    """Статистика кеша, по образцу functools.lru_cache."""
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+def cache_token(value: Any) -> Optional[Hashable]:
+    """
+    Дешевый ключ версии значения, без обхода содержимого:
+    контейнеры с методом cache_token() (RecordView снапшота, OrderTable) сами сообщают
+    версию данных; кортеж неизменяем и ключуется идентичностью (кеш держит ссылку на него,
+    поэтому id не переиспользуется); скаляры - своим значением.
+    None - версию узнать нельзя (список, словарь и т.п.).
+    """
+    method = getattr(type(value), 'cache_token', None)
+    if method is not None:
+        return 'token', type(value), method(value)
+    if isinstance(value, tuple):
+        return 'id', id(value)
+    if isinstance(value, _SCALARS):
+        return type(value), value
+    return None
+
+
+def fingerprint_cache(maxsize: int = 128) -> Callable[[Callable], Callable]:
+    """
+    LRU-кеш результатов с ключом по версиям аргументов (cache_token): попадание стоит
+    O(число аргументов), а не O(размер данных). Аргументы приводятся к сигнатуре, так что
+    f(x, 2) и f(x, k=2) - один ключ. Вызов, где версию какого-то аргумента узнать нельзя,
+    выполняется без кеша. Предоставляет cache_info() и cache_clear(), как functools.lru_cache.
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        results: 'OrderedDict[Any, Any]' = OrderedDict()
+        stats = {'hits': 0, 'misses': 0}
+        lock = Lock()
+
+        def arguments(args: Any, kwargs: Any) -> List[Any]:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            values: List[Any] = []
+            for name, value in bound.arguments.items():
+                kind = signature.parameters[name].kind
+                if kind is inspect.Parameter.VAR_POSITIONAL:
+                    values.extend(value)
+                elif kind is inspect.Parameter.VAR_KEYWORD:
+                    for key in sorted(value):
+                        values.extend((key, value[key]))
+                else:
+                    values.append(value)
+            return values
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            values = arguments(args, kwargs)
+            key = tuple(map(cache_token, values))
+            if None in key:
+                with lock:
+                    stats['misses'] += 1
+                return func(*args, **kwargs)
+            with lock:
+                if key in results:
+                    results.move_to_end(key)
+                    stats['hits'] += 1
+                    return results[key][1]
+                stats['misses'] += 1
+            result = func(*args, **kwargs)
+            with lock:
+                # Запись держит аргументы: пока она жива, id кортежей в ключе не переиспользуются.
+                results[key] = (values, result)
+                results.move_to_end(key)
+                while len(results) > maxsize:
+                    results.popitem(last=False)
+            return result
+
+        def cache_info() -> CacheInfo:
+            with lock:
+                return CacheInfo(stats['hits'], stats['misses'], maxsize, len(results))
+
+        def cache_clear() -> None:
+            with lock:
+                results.clear()
+                stats['hits'] = stats['misses'] = 0
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
@@ -0,0 +1,184 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from core import bitset
+from core.cache import fingerprint_cache
+from core.domain import Bolid
+from core.tags import TagIndex, TagQuery
+
+
+class BolidCatalog:
+    """
+    Каталог болидов в виде колонок (struct-of-arrays).
+    Цена, год, остаток, коды команды и эры и маска тегов лежат в плоских массивах,
+    а фильтры считаются как битовые маски строк и комбинируются за одну операцию.
+    Объекты Bolid отдаются только для строк, прошедших все условия.
+    """
+
+    def __init__(self, bolids: Sequence[Bolid]):
+        self._bolids = bolids
+        self.size = len(bolids)
+
+        self.teams: List[str] = []
+        self.eras: List[str] = []
+        team_codes: Dict[str, int] = {}
+        era_codes: Dict[str, int] = {}
+        tag_lists: List[List[str]] = []
+
+        self.price = array('q')
+        self.year = array('q')
+        self.team_code = array('i')
+        self.era_code = array('i')
+        self.quantity = array('q')
+        # Хеш-индекс id -> номер строки (при повторах побеждает первый, как при поиске перебором).
+        self._id_rows: Dict[str, int] = {}
+
+        for row, bolid in enumerate(bolids):
+            self._id_rows.setdefault(bolid.id, row)
+            self.price.append(bolid.price)
+            self.year.append(bolid.year)
+            self.team_code.append(_code(team_codes, self.teams, bolid.team))
+            self.era_code.append(_code(era_codes, self.eras, bolid.era_id))
+            self.quantity.append(bolid.quantity_available)
+            tag_lists.append(bolid.tags)
+
+        # Маски строк по каждому значению кодированных колонок.
+        self._team_rows = _rows_by_code(self.team_code, len(self.teams))
+        self._era_rows = _rows_by_code(self.era_code, len(self.eras))
+        self._team_index = team_codes
+        self._era_index = era_codes
+        # Теги - инвертированный индекс на битовых масках, он же хранит маску тегов каждой строки.
+        self.tag_index = TagIndex(tag_lists)
+        self.tags = self.tag_index.tags
+        self.tag_bits = self.tag_index.row_bits
+
+        # Порядок строк по цене и году для диапазонных условий.
+        self._price_order = sorted(range(self.size), key=self.price.__getitem__)
+        self._price_sorted = [self.price[i] for i in self._price_order]
+        self._year_order = sorted(range(self.size), key=self.year.__getitem__)
+        self._year_sorted = [self.year[i] for i in self._year_order]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, bolid_id: object) -> bool:
+        return bolid_id in self._id_rows
+
+    def __getitem__(self, bolid_id: str) -> Bolid:
+        """Болид по id за O(1); KeyError, если такого нет."""
+        return self._bolids[self._id_rows[bolid_id]]
+
+    def get(self, bolid_id: str) -> Optional[Bolid]:
+        row = self._id_rows.get(bolid_id)
+        return None if row is None else self._bolids[row]
+
+    def price_of(self, bolid_id: str) -> int:
+        return self.price[self._id_rows[bolid_id]]
+
+    def row_of(self, bolid_id: str) -> Optional[int]:
+        return self._id_rows.get(bolid_id)
+
+    def stock_table(self) -> Dict[str, int]:
+        """Остатки quantity_available по id болида."""
+        return {bolid_id: self.quantity[row] for bolid_id, row in self._id_rows.items()}
+
+    def with_team(self, team: str) -> Tuple[Bolid, ...]:
+        return self.select(self.team_mask(team))
+
+    def with_era(self, era_id: str) -> Tuple[Bolid, ...]:
+        return self.select(self.era_mask((era_id,)))
+
+    def with_tag(self, tag: str) -> Tuple[Bolid, ...]:
+        return self.select(self.tag_mask(tag))
+
+    def with_tags(self, query: Union[str, TagQuery]) -> Tuple[Bolid, ...]:
+        return self.select(self.tag_query_mask(query))
+
+    def in_price_range(self, min_price: int, max_price: int) -> Tuple[Bolid, ...]:
+        """Болиды в диапазоне цен, по возрастанию цены (срез отсортированного индекса)."""
+        start = bisect_left(self._price_sorted, min_price)
+        stop = bisect_right(self._price_sorted, max_price)
+        return tuple(self._bolids[i] for i in self._price_order[start:stop])
+
+    def all(self) -> int:
+        return bitset.full(self.size)
+
+    def team_mask(self, team: str) -> int:
+        code = self._team_index.get(team)
+        return 0 if code is None else self._team_rows[code]
+
+    def era_mask(self, era_ids: Iterable[str]) -> int:
+        mask = 0
+        for era_id in era_ids:
+            code = self._era_index.get(era_id)
+            if code is not None:
+                mask |= self._era_rows[code]
+        return mask
+
+    def tag_mask(self, tag: str) -> int:
+        return self.tag_index.mask(tag)
+
+    def tag_query_mask(self, query: Union[str, TagQuery]) -> int:
+        """Маска строк по булеву запросу тегов, например 'V10 & Чемпионский & ~Гибрид'."""
+        return self.tag_index.evaluate(query)
+
+    def price_mask(self, min_price: int, max_price: int) -> int:
+        return _range_mask(self._price_order, self._price_sorted, min_price, max_price)
+
+    def price_count(self, min_price: int, max_price: int) -> int:
+        return max(0, bisect_right(self._price_sorted, max_price) - bisect_left(self._price_sorted, min_price))
+
+    def year_mask(self, min_year: int, max_year: int) -> int:
+        return _range_mask(self._year_order, self._year_sorted, min_year, max_year)
+
+    def select(self, mask: int) -> Tuple[Bolid, ...]:
+        """Болиды по маске строк, в исходном порядке каталога."""
+        return tuple(self._bolids[i] for i in bitset.iter_bits(mask))
+
+    def filter(self, era_ids: Optional[Iterable[str]] = None, team: Optional[str] = None,
+               price: Optional[Tuple[int, int]] = None, year: Optional[Tuple[int, int]] = None,
+               tags: Iterable[str] = ()) -> Tuple[Bolid, ...]:
+        """Совместный фильтр: условия пересекаются как маски, строки обходятся один раз."""
+        mask = self.all()
+        if era_ids is not None:
+            mask &= self.era_mask(era_ids)
+        if team is not None:
+            mask &= self.team_mask(team)
+        if price is not None:
+            mask &= self.price_mask(*price)
+        if year is not None:
+            mask &= self.year_mask(*year)
+        for tag in tags:
+            mask &= self.tag_mask(tag)
+        return self.select(mask)
+
+
+@fingerprint_cache(maxsize=8)
+def get_catalog(bolids: Sequence[Bolid]) -> BolidCatalog:
+    """
+    Каталог с индексами, общий для всех вызовов с той же версией данных (core.cache.cache_token):
+    кортеж или RecordView снапшота. Для списка версию узнать нельзя - каталог строится заново.
+    """
+    return BolidCatalog(bolids)
+
+
+def _code(codes: Dict[str, int], values: List[str], value: str) -> int:
+    code = codes.get(value)
+    if code is None:
+        code = codes[value] = len(values)
+        values.append(value)
+    return code
+
+
+def _rows_by_code(column: array, size: int) -> List[int]:
+    positions: List[List[int]] = [[] for _ in range(size)]
+    for row, code in enumerate(column):
+        positions[code].append(row)
+    return [bitset.from_positions(rows) for rows in positions]
+
+
+def _range_mask(order: List[int], sorted_values: List[int], low: int, high: int) -> int:
+    start = bisect_left(sorted_values, low)
+    stop = bisect_right(sorted_values, high)
+    return bitset.from_positions(order[start:stop])
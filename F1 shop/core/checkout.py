@@ -0,0 +1,89 @@
+import time
+import uuid
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from core.catalog import get_catalog
+from core.domain import Bolid, Garage, PurchaseOrder
+
+
+class CheckoutFailure(NamedTuple):
+    """Гараж, который не удалось оформить."""
+    garage_index: int
+    collector_id: str
+    reason: str                 # 'empty', 'unknown_bolid' или 'out_of_stock'
+    bolid_id: Optional[str]
+
+
+class CheckoutStats(NamedTuple):
+    garages: int
+    orders: int
+    failures: int
+    items: int
+    seconds: float
+
+    @property
+    def garages_per_second(self) -> float:
+        return self.garages / self.seconds if self.seconds else float('inf')
+
+
+class CheckoutResult(NamedTuple):
+    orders: Tuple[PurchaseOrder, ...]
+    failures: Tuple[CheckoutFailure, ...]
+    stock: Dict[str, int]       # остатки после резервирования
+    stats: CheckoutStats
+
+
+def batch_checkout(garages: Iterable[Garage], bolids: Sequence[Bolid], timestamp: str,
+                   stock: Optional[Dict[str, int]] = None,
+                   new_order_id: Callable[[], str] = lambda: str(uuid.uuid4())) -> CheckoutResult:
+    """
+    Оформляет много гаражей за один проход по общему индексу цен.
+    Гараж оформляется целиком или не оформляется вовсе: при нехватке остатка
+    ничего не резервируется, а причина попадает в failures.
+    Исходный stock не изменяется; остатки после резервирования возвращаются в результате.
+    """
+    started = time.perf_counter()
+    catalog = get_catalog(bolids)
+    remaining = dict(stock) if stock is not None else catalog.stock_table()
+    price = catalog.price
+
+    orders: List[PurchaseOrder] = []
+    failures: List[CheckoutFailure] = []
+    garage_count = 0
+    item_count = 0
+
+    for index, garage in enumerate(garages):
+        garage_count += 1
+        items = garage.items
+        item_count += len(items)
+        if not items:
+            failures.append(CheckoutFailure(index, garage.collector_id, 'empty', None))
+            continue
+
+        total = 0
+        failure = None
+        for item in items:
+            row = catalog.row_of(item.bolid_id)
+            if row is None:
+                failure = CheckoutFailure(index, garage.collector_id, 'unknown_bolid', item.bolid_id)
+                break
+            if remaining.get(item.bolid_id, 0) < item.quantity:
+                failure = CheckoutFailure(index, garage.collector_id, 'out_of_stock', item.bolid_id)
+                break
+            total += price[row] * item.quantity
+        if failure is not None:
+            failures.append(failure)
+            continue
+
+        for item in items:
+            remaining[item.bolid_id] -= item.quantity
+        orders.append(PurchaseOrder(
+            id=new_order_id(),
+            collector_id=garage.collector_id,
+            items=list(items),
+            total_price=total,
+            timestamp=timestamp
+        ))
+
+    stats = CheckoutStats(garage_count, len(orders), len(failures), item_count, time.perf_counter() - started)
+    return CheckoutResult(tuple(orders), tuple(failures), remaining, stats)
@@ -0,0 +1,177 @@
+import sys
+from array import array
+from collections.abc import Sequence
+from itertools import count
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from core.domain import Bolid, GarageItem, PurchaseOrder
+
+# Один экземпляр на каждый набор тегов: у тысяч болидов их всего несколько вариантов.
+# Таблица ограничена: наборы сверх TAG_TUPLES_MAX просто не разделяются.
+TAG_TUPLES_MAX = 4096
+_TAG_TUPLES: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+_table_ids = count()
+
+
+def _intern_tags(tags: Iterable[str]) -> Tuple[str, ...]:
+    key = tuple(map(sys.intern, tags))
+    found = _TAG_TUPLES.get(key)
+    if found is None:
+        if len(_TAG_TUPLES) >= TAG_TUPLES_MAX:
+            return key
+        found = _TAG_TUPLES.setdefault(key, key)
+    return found
+
+
+class CompactBolid:
+    """
+    Болид без накладных расходов NamedTuple и списка тегов.
+    Команда, эра и ссылка на картинку интернированы, теги - общий неизменяемый кортеж.
+    Атрибуты те же, что у Bolid.
+    """
+    __slots__ = Bolid._fields
+    _fields = Bolid._fields
+
+    def __init__(self, id: str, name: str, team: str, year: int, price: int, era_id: str,
+                 tags: Iterable[str], quantity_available: int, image_url: str = ""):
+        self.id = id
+        self.name = name
+        self.team = sys.intern(team)
+        self.year = year
+        self.price = price
+        self.era_id = sys.intern(era_id)
+        self.tags = _intern_tags(tags)
+        self.quantity_available = quantity_available
+        self.image_url = sys.intern(image_url)
+
+    @classmethod
+    def from_bolid(cls, bolid: Bolid) -> 'CompactBolid':
+        return cls(*bolid)
+
+    def to_bolid(self) -> Bolid:
+        return Bolid(self.id, self.name, self.team, self.year, self.price, self.era_id,
+                     list(self.tags), self.quantity_available, self.image_url)
+
+    def _astuple(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self._fields)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactBolid):
+            return NotImplemented
+        return self._astuple() == other._astuple()
+
+    def __repr__(self) -> str:
+        return 'CompactBolid(' + ', '.join(f'{name}={getattr(self, name)!r}' for name in self._fields) + ')'
+
+
+class OrderView:
+    """Заказ внутри OrderTable: атрибуты как у PurchaseOrder, данные читаются из колонок."""
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table: 'OrderTable', index: int):
+        self._table = table
+        self._index = index
+
+    @property
+    def id(self) -> str:
+        return self._table._ids[self._index]
+
+    @property
+    def collector_id(self) -> str:
+        table = self._table
+        return table._strings[table._collectors[self._index]]
+
+    @property
+    def items(self) -> List[GarageItem]:
+        table = self._table
+        start, stop = table._offsets[self._index], table._offsets[self._index + 1]
+        strings = table._strings
+        return [GarageItem(strings[table._item_bolids[i]], table._item_quantities[i]) for i in range(start, stop)]
+
+    @property
+    def total_price(self) -> int:
+        return self._table._totals[self._index]
+
+    @property
+    def timestamp(self) -> str:
+        return self._table._timestamps[self._index]
+
+    def to_order(self) -> PurchaseOrder:
+        return PurchaseOrder(self.id, self.collector_id, self.items, self.total_price, self.timestamp)
+
+    def __repr__(self) -> str:
+        return f'OrderView({self.to_order()!r})'
+
+
+class OrderTable(Sequence):
+    """
+    История заказов в плоских колонках.
+    Позиции всех заказов лежат подряд в двух array (болид, количество) со смещениями,
+    коллекционеры и болиды хранятся номерами в общей таблице строк.
+    Элементы таблицы - OrderView, совместимые с PurchaseOrder по атрибутам.
+    """
+
+    def __init__(self, orders: Iterable[PurchaseOrder] = ()):
+        self.uid = next(_table_ids)
+        self._strings: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._collectors = array('i')
+        self._totals = array('q')
+        self._timestamps: List[str] = []
+        self._offsets = array('q', [0])
+        self._item_bolids = array('i')
+        self._item_quantities = array('i')
+        self.extend(orders)
+
+    def _code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self._strings)
+            self._strings.append(value)
+        return code
+
+    def append(self, order: PurchaseOrder) -> None:
+        self._ids.append(order.id)
+        self._collectors.append(self._code(order.collector_id))
+        self._totals.append(order.total_price)
+        self._timestamps.append(order.timestamp)
+        for item in order.items:
+            self._item_bolids.append(self._code(item.bolid_id))
+            self._item_quantities.append(item.quantity)
+        self._offsets.append(len(self._item_quantities))
+
+    def extend(self, orders: Iterable[PurchaseOrder]) -> None:
+        for order in orders:
+            self.append(order)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return tuple(OrderView(self, i) for i in range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return OrderView(self, index)
+
+    def __iter__(self) -> Iterator[OrderView]:
+        return (OrderView(self, i) for i in range(len(self)))
+
+    def cache_token(self) -> Tuple[int, int]:
+        """Версия для core.cache: таблица только дополняется, поэтому версия - её длина."""
+        return self.uid, len(self)
+
+    def total_sales(self) -> int:
+        """То же, что transforms.total_sales, но прямо по колонке сумм."""
+        return sum(self._totals)
+
+    def sales_counts(self) -> Dict[str, int]:
+        """То же, что transforms.sales_counts (включая порядок ключей), без сборки объектов."""
+        counts: Dict[int, int] = {}
+        for code, quantity in zip(self._item_bolids, self._item_quantities):
+            counts[code] = counts.get(code, 0) + quantity
+        strings = self._strings
+        return {strings[code]: quantity for code, quantity in counts.items()}
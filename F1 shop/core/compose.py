@@ -1,11 +1,136 @@
-from functools import reduce
-from typing import Callable, Any, List
+import heapq
+from itertools import islice
+from time import perf_counter
+from typing import Callable, Any, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 
-def pipe(*funcs: Callable) -> Callable:
+
+class StageInfo(NamedTuple):
+    """Стадия конвейера и ее счетчики (заполняются, только когда включен timed)."""
+    name: str
+    func: Callable
+    calls: int
+    seconds: float
+
+
+def _stage_name(func: Callable) -> str:
+    return getattr(func, '__qualname__', None) or repr(func)
+
+
+class Pipeline:
+    """
+    Скомпилированная композиция функций: Pipeline((f, g, h))(x) == h(g(f(x))).
+    Вложенные конвейеры разворачиваются в плоский кортеж стадий при создании,
+    вызов - простой цикл по нему. С timed=True для каждой стадии копятся число
+    вызовов и суммарное время; включать и выключать можно на ходу.
+    """
+    __slots__ = ('funcs', 'timed', '_calls', '_seconds')
+
+    def __init__(self, funcs: Tuple[Callable, ...] = (), timed: bool = False):
+        flat: List[Callable] = []
+        for func in funcs:
+            if isinstance(func, Pipeline):
+                flat.extend(func.funcs)
+            else:
+                flat.append(func)
+        self.funcs = tuple(flat)
+        self.timed = timed
+        self._calls = [0] * len(self.funcs)
+        self._seconds = [0.0] * len(self.funcs)
+
+    def __call__(self, value: Any) -> Any:
+        if self.timed:
+            return self._call_timed(value)
+        for func in self.funcs:
+            value = func(value)
+        return value
+
+    def _call_timed(self, value: Any) -> Any:
+        calls, seconds = self._calls, self._seconds
+        for i, func in enumerate(self.funcs):
+            started = perf_counter()
+            value = func(value)
+            seconds[i] += perf_counter() - started
+            calls[i] += 1
+        return value
+
+    @property
+    def stages(self) -> Tuple[StageInfo, ...]:
+        return tuple(
+            StageInfo(_stage_name(func), func, calls, seconds)
+            for func, calls, seconds in zip(self.funcs, self._calls, self._seconds)
+        )
+
+    def reset_stats(self) -> None:
+        self._calls = [0] * len(self.funcs)
+        self._seconds = [0.0] * len(self.funcs)
+
+    def __len__(self) -> int:
+        return len(self.funcs)
+
+    def __repr__(self) -> str:
+        return 'pipe(' + ', '.join(_stage_name(func) for func in self.funcs) + ')'
+
+
+def pipe(*funcs: Callable, timed: bool = False) -> Pipeline:
     """
     Создает композицию функций, где результат одной передается в качестве аргумента следующей.
     pipe(f, g, h)(x) эквивалентно h(g(f(x))).
     """
-    def piped_function(initial_value: Any) -> Any:
-        return reduce(lambda acc, func: func(acc), funcs, initial_value)
-    return piped_function
+    return Pipeline(funcs, timed=timed)
+
+
+# --- Потоковые стадии ---
+# Каждая стадия - функция "итерируемое -> итератор", поэтому filter -> map -> top-k
+# над каталогом не создает промежуточных кортежей: в памяти в каждый момент
+# одна запись на стадию (чанк у chunked, k лучших у top_k).
+# Замеры timed для потоковых стадий показывают только создание генераторов,
+# сама работа выполняется при чтении результата.
+
+def lazy_pipe(*stages: Callable[[Iterable[Any]], Any], timed: bool = False) -> Pipeline:
+    """Конвейер над потоком: вход оборачивается в iter(), стадии передают друг другу итераторы."""
+    return Pipeline((iter,) + stages, timed=timed)
+
+
+def filtering(predicate: Callable[[Any], bool]) -> Callable[[Iterable[Any]], Iterator[Any]]:
+    def stage(items: Iterable[Any]) -> Iterator[Any]:
+        return filter(predicate, items)
+    stage.__qualname__ = f'filtering({_stage_name(predicate)})'
+    return stage
+
+
+def mapping(func: Callable[[Any], Any]) -> Callable[[Iterable[Any]], Iterator[Any]]:
+    def stage(items: Iterable[Any]) -> Iterator[Any]:
+        return map(func, items)
+    stage.__qualname__ = f'mapping({_stage_name(func)})'
+    return stage
+
+
+def chunked(size: int) -> Callable[[Iterable[Any]], Iterator[Tuple[Any, ...]]]:
+    """Разбивает поток на кортежи по size элементов (последний может быть короче)."""
+    if size < 1:
+        raise ValueError("size must be positive")
+
+    def stage(items: Iterable[Any]) -> Iterator[Tuple[Any, ...]]:
+        iterator = iter(items)
+        return iter(lambda: tuple(islice(iterator, size)), ())
+    stage.__qualname__ = f'chunked({size})'
+    return stage
+
+
+def take(n: int) -> Callable[[Iterable[Any]], Iterator[Any]]:
+    """Первые n элементов; остаток потока не читается."""
+    def stage(items: Iterable[Any]) -> Iterator[Any]:
+        return islice(items, n)
+    stage.__qualname__ = f'take({n})'
+    return stage
+
+
+def top_k(k: int, key: Optional[Callable[[Any], Any]] = None) -> Callable[[Iterable[Any]], List[Any]]:
+    """
+    Завершающая стадия: k наибольших по key за один проход с кучей размера k.
+    Порядок равных как у sorted(..., reverse=True)[:k].
+    """
+    def stage(items: Iterable[Any]) -> List[Any]:
+        return heapq.nlargest(k, items, key=key)
+    stage.__qualname__ = f'top_k({k})'
+    return stage
@@ -1,4 +1,6 @@
-from typing import NamedTuple, Optional, List
+from typing import NamedTuple, Optional, List, Iterable, Tuple
+
+from core.hamt import PersistentMap
 
 # --- Новые модели данных для темы Формулы 1 ---
 
@@ -18,6 +20,7 @@ class Bolid(NamedTuple):
     era_id: str        # ID эры (категории)
     tags: List[str]    # Теги, например "Чемпионский", "V10"
     quantity_available: int
+    image_url: str = ""  # Изображение для карточки в каталоге
 
 class Collector(NamedTuple):
     """Коллекционер (используется как пользователь)."""
@@ -32,10 +35,76 @@ class GarageItem(NamedTuple):
     bolid_id: str
     quantity: int
 
-class Garage(NamedTuple):
-    """Гараж коллекционера (аналог корзины)."""
-    collector_id: str
-    items: List[GarageItem]
+class Garage:
+    """
+    Гараж коллекционера (аналог корзины). Неизменяемый: add/remove/set_quantity
+    возвращают новый гараж за O(log n), разделяя структуру со старым (HAMT).
+    items отдаёт позиции в порядке первого добавления.
+    """
+    __slots__ = ('collector_id', '_entries', '_next_seq', '_items')
+
+    def __init__(self, collector_id: str, items: Iterable[GarageItem] = ()):
+        garage = Garage._build(collector_id, PersistentMap(), 0)
+        for item in items:
+            garage = garage.add(item.bolid_id, item.quantity)
+        self.collector_id = collector_id
+        self._entries = garage._entries
+        self._next_seq = garage._next_seq
+        self._items = None
+
+    @staticmethod
+    def _build(collector_id: str, entries: 'PersistentMap[str, Tuple[int, int]]', next_seq: int) -> 'Garage':
+        garage = object.__new__(Garage)
+        garage.collector_id = collector_id
+        garage._entries = entries  # bolid_id -> (порядковый номер, количество)
+        garage._next_seq = next_seq
+        garage._items = None
+        return garage
+
+    @property
+    def items(self) -> Tuple[GarageItem, ...]:
+        if self._items is None:
+            entries = sorted(self._entries.items(), key=lambda kv: kv[1][0])
+            self._items = tuple(GarageItem(bolid_id, quantity) for bolid_id, (_, quantity) in entries)
+        return self._items
+
+    def quantity(self, bolid_id: str) -> int:
+        entry = self._entries.get(bolid_id)
+        return entry[1] if entry else 0
+
+    def add(self, bolid_id: str, quantity: int) -> 'Garage':
+        entry = self._entries.get(bolid_id)
+        if entry is None:
+            entries = self._entries.set(bolid_id, (self._next_seq, quantity))
+            return Garage._build(self.collector_id, entries, self._next_seq + 1)
+        entries = self._entries.set(bolid_id, (entry[0], entry[1] + quantity))
+        return Garage._build(self.collector_id, entries, self._next_seq)
+
+    def set_quantity(self, bolid_id: str, quantity: int) -> 'Garage':
+        """Задает количество; ноль или меньше удаляет позицию."""
+        if quantity <= 0:
+            return self.remove(bolid_id)
+        entry = self._entries.get(bolid_id)
+        if entry is None:
+            return self.add(bolid_id, quantity)
+        return Garage._build(self.collector_id, self._entries.set(bolid_id, (entry[0], quantity)), self._next_seq)
+
+    def remove(self, bolid_id: str) -> 'Garage':
+        return Garage._build(self.collector_id, self._entries.delete(bolid_id), self._next_seq)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, bolid_id: object) -> bool:
+        return bolid_id in self._entries
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Garage):
+            return NotImplemented
+        return self.collector_id == other.collector_id and self.items == other.items
+
+    def __repr__(self) -> str:
+        return f"Garage(collector_id={self.collector_id!r}, items={list(self.items)!r})"
 
 class PurchaseOrder(NamedTuple):
     """Оформленная покупка (аналог заказа)."""
@@ -1,14 +1,26 @@
-from typing import TypeVar, Generic, Callable, Optional, Any
+import operator
+from functools import lru_cache
+from itertools import accumulate, chain, compress, repeat
+from operator import attrgetter
+from typing import TypeVar, Generic, Callable, Optional, Any, Tuple, Dict, Sequence, Set
 
 T = TypeVar('T')
 U = TypeVar('U')
 
 
 class Maybe(Generic[T]):
-    """Контейнер Maybe для обработки возможных отсутствующих значений."""
+    """
+    Контейнер Maybe для обработки возможных отсутствующих значений.
+    Пустой Maybe один на весь процесс: Maybe(None) и Maybe.Nothing() возвращают его же.
+    """
+    __slots__ = ('_value',)
 
-    def __init__(self, value: Optional[T]):
+    def __new__(cls, value: Optional[T] = None) -> 'Maybe[T]':
+        if value is None:
+            return _NOTHING
+        self = object.__new__(cls)
         self._value = value
+        return self
 
     @staticmethod
     def Some(value: T) -> 'Maybe[T]':
@@ -18,7 +30,7 @@ class Maybe(Generic[T]):
 
     @staticmethod
     def Nothing() -> 'Maybe[Any]':
-        return Maybe(None)
+        return _NOTHING
 
     def is_some(self) -> bool:
         return self._value is not None
@@ -28,66 +40,190 @@ class Maybe(Generic[T]):
 
     def bind(self, func: Callable[[T], 'Maybe[U]']) -> 'Maybe[U]':
         """Применяет функцию к значению, если оно есть."""
-        if self.is_nothing():
-            return Maybe.Nothing()
+        if self._value is None:
+            return _NOTHING
         return func(self._value)
 
     def map(self, func: Callable[[T], U]) -> 'Maybe[U]':
         """Применяет функцию к значению и оборачивает результат в Maybe."""
-        if self.is_nothing():
-            return Maybe.Nothing()
+        if self._value is None:
+            return _NOTHING
         return Maybe.Some(func(self._value))
 
     def get_or_else(self, default: T) -> T:
         """Возвращает значение или значение по умолчанию."""
-        return self._value if self.is_some() else default
+        return self._value if self._value is not None else default
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # pickle и copy восстанавливают через Maybe(value): пустой снова станет общим _NOTHING,
+        # а не получит состояние в свой __new__ без аргументов
+        return Maybe, (self._value,)
 
     def __repr__(self) -> str:
         return f"Some({self._value})" if self.is_some() else "Nothing"
 
 
+_NOTHING: Maybe[Any] = object.__new__(Maybe)
+_NOTHING._value = None
+
+
+class MaybeChain:
+    """
+    Заранее собранная цепочка шагов map/bind.
+    chain(m) дает тот же результат, что m.map(f).bind(g)..., но значение
+    передается между шагами напрямую, без промежуточных контейнеров Maybe.
+
+        validate = MaybeChain().bind(check_stock).map(to_invoice)
+        validate(Maybe.Some(order))
+    """
+    __slots__ = ('steps',)
+
+    def __init__(self, steps: Tuple[Tuple[bool, Callable[[Any], Any]], ...] = ()):
+        # (is_bind, func) - для bind функция возвращает Maybe, для map - голое значение.
+        self.steps = steps
+
+    def map(self, func: Callable[[Any], Any]) -> 'MaybeChain':
+        return MaybeChain(self.steps + ((False, func),))
+
+    def bind(self, func: Callable[[Any], Maybe[Any]]) -> 'MaybeChain':
+        return MaybeChain(self.steps + ((True, func),))
+
+    def __call__(self, maybe: Maybe[Any]) -> Maybe[Any]:
+        return self.run(maybe._value)
+
+    def run(self, value: Any) -> Maybe[Any]:
+        """Прогоняет цепочку над голым значением; None считается пустым Maybe."""
+        if value is None:
+            return _NOTHING
+        for is_bind, func in self.steps:
+            if is_bind:
+                value = func(value)._value
+                if value is None:
+                    return _NOTHING
+            else:
+                value = func(value)
+                if value is None:
+                    raise ValueError("Some value cannot be None.")
+        return Maybe(value)
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+
 # --- Функции для Лабы №4 ---
 
-from .domain import Order, Product, Discount, Cart
+from .domain import Bolid, PurchaseOrder, Discount
+from .catalog import get_catalog
 
 
-def safe_product_find(products: Tuple[Product, ...], pid: str) -> Maybe[Product]:
-    """Безопасный поиск товара по ID."""
-    product = next((p for p in products if p.id == pid), None)
+def safe_product_find(products: Tuple[Bolid, ...], pid: str) -> Maybe[Bolid]:
+    """Безопасный поиск болида по ID."""
+    product = get_catalog(products).get(pid)
     return Maybe.Some(product) if product else Maybe.Nothing()
 
 
-def validate_order(order: Order, stock: Dict[str, int], discounts: Tuple[Discount, ...]) -> Maybe[Dict[str, Any]]:
+@lru_cache(maxsize=32)
+def _discount_table(discounts: Tuple[Discount, ...]) -> Dict[str, float]:
+    # Кортеж скидок неизменяем, так что таблицу достаточно построить один раз.
+    return {d.bolid_id: d.discount_percent for d in discounts}
+
+
+def validate_order(order: PurchaseOrder, stock: Dict[str, int], discounts: Tuple[Discount, ...]) -> Maybe[Dict[str, Any]]:
     """
-    Проверяет заказ: наличие товаров на складе и применяет скидки.
+    Проверяет заказ: наличие болидов на складе и применяет скидки.
     Возвращает Maybe с информацией о заказе или Nothing, если проверка не пройдена.
     """
     validated_items = []
-    total_price = 0.0
 
-    product_discounts = {d.product_id: d.discount_percent for d in discounts}
+    bolid_discounts = _discount_table(tuple(discounts))
 
     for item in order.items:
         # Проверка наличия на складе
-        if stock.get(item.product_id, 0) < item.quantity:
-            return Maybe.Nothing()  # Товара нет на складе в нужном количестве
+        if stock.get(item.bolid_id, 0) < item.quantity:
+            return Maybe.Nothing()  # Болида нет на складе в нужном количестве
 
         # Намеренно не используем safe_product_find, т.к. в этой логике
-        # предполагается, что товар существует, если он есть в заказе.
+        # предполагается, что болид существует, если он есть в заказе.
         # Цена будет взята из `order.total_price` после всех расчетов.
 
         # Просто собираем информацию
         validated_items.append({
-            "product_id": item.product_id,
+            "bolid_id": item.bolid_id,
             "quantity": item.quantity,
-            "discount": product_discounts.get(item.product_id, 0.0)
+            "discount": bolid_discounts.get(item.bolid_id, 0.0)
         })
 
     # Эта функция просто валидирует, а не пересчитывает цену.
     # Для простоты вернем словарь с проверенными данными.
     return Maybe.Some({
         "order_id": order.id,
-        "user_id": order.user_id,
+        "collector_id": order.collector_id,
         "items": validated_items,
         "is_valid": True
     })
+
+
+class _PackedOrders:
+    """
+    Пакет заказов в плоских массивах: позиции всех заказов подряд,
+    номер заказа для каждой позиции и коды болидов для соединения со складом и скидками.
+    Массивы заполняются через map/chain, без цикла интерпретатора по позициям.
+    """
+
+    def __init__(self, orders: Sequence[PurchaseOrder], stock: Dict[str, int], discounts: Tuple[Discount, ...]):
+        item_lists = list(map(attrgetter('items'), orders))
+        lengths = list(map(len, item_lists))
+        items = list(chain.from_iterable(item_lists))
+
+        self.bolid_ids = list(map(attrgetter('bolid_id'), items))
+        self.quantity = list(map(attrgetter('quantity'), items))
+        self.order_of = list(chain.from_iterable(map(repeat, range(len(orders)), lengths)))
+        self.offsets = list(accumulate(lengths, initial=0))
+
+        # Справочник болидов из склада и скидок; код 0 - болид, которого нет ни там, ни там.
+        discount_table = _discount_table(tuple(discounts))
+        known = list(dict.fromkeys(chain(stock, discount_table)))
+        codes = {bolid_id: code for code, bolid_id in enumerate(known, start=1)}
+        self.code = list(map(codes.get, self.bolid_ids, repeat(0)))
+        self.stock = [0] + list(map(stock.get, known, repeat(0)))
+        self.discount = [0.0] + list(map(discount_table.get, known, repeat(0.0)))
+
+    def failed_orders(self) -> Set[int]:
+        item_stock = map(self.stock.__getitem__, self.code)
+        short = map(operator.gt, self.quantity, item_stock)
+        return set(compress(self.order_of, short))
+
+
+def validation_mask(orders: Sequence[PurchaseOrder], stock: Dict[str, int],
+                    discounts: Tuple[Discount, ...] = ()) -> Tuple[bool, ...]:
+    """Для каждого заказа - пройдет ли он validate_order, без построения результатов."""
+    failed = _PackedOrders(orders, stock, discounts).failed_orders()
+    return tuple(i not in failed for i in range(len(orders)))
+
+
+def validate_orders(orders: Sequence[PurchaseOrder], stock: Dict[str, int],
+                    discounts: Tuple[Discount, ...] = ()) -> Tuple[Maybe[Dict[str, Any]], ...]:
+    """
+    Пакетный validate_order: проверка остатков и соединение со скидками выполняются
+    над упакованными массивами сразу для всех заказов. Результат совпадает
+    с поэлементным [validate_order(o, stock, discounts) for o in orders].
+    """
+    packed = _PackedOrders(orders, stock, discounts)
+    failed = packed.failed_orders()
+    item_discount = map(packed.discount.__getitem__, packed.code)
+    # Словари позиций строятся одним проходом, каждому заказу достается срез.
+    items = [
+        {"bolid_id": bolid_id, "quantity": quantity, "discount": discount}
+        for bolid_id, quantity, discount in zip(packed.bolid_ids, packed.quantity, item_discount)
+    ]
+    offsets = packed.offsets
+
+    return tuple(
+        Maybe.Nothing() if index in failed else Maybe.Some({
+            "order_id": order.id,
+            "collector_id": order.collector_id,
+            "items": items[offsets[index]:offsets[index + 1]],
+            "is_valid": True
+        })
+        for index, order in enumerate(orders)
+    )
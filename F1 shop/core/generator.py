@@ -0,0 +1,234 @@
+import json
+import os
+import random
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import accumulate, groupby
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from core.loader import JSONL_SUFFIX, SECTIONS
+from core.parallel import ParallelExecutor
+from core.snapshot import SNAPSHOT_SUFFIX, write_records
+
+TEAMS = ("Mercedes", "Ferrari", "Red Bull Racing", "McLaren", "Williams", "Renault", "Jordan")
+TAGS = ("Чемпионский", "V10", "V8", "Гибрид", "Аэродинамический")
+TIERS = ("Paddock Club", "Grandstand")
+WORDS = ("Arrow", "Blaze", "Comet", "Dart", "Ember", "Falcon", "Ghost", "Hawk", "Ion", "Jet",
+         "Kite", "Lance", "Meteor", "Nova", "Orbit", "Pulse", "Quasar", "Raven", "Storm", "Tempest")
+FIRST_NAMES = ("Иван", "Анна", "Петр", "Мария", "Алексей", "Ольга", "Дмитрий", "Елена", "Сергей", "Наталья",
+               "Lewis", "Charlotte", "Max", "Sofia", "Carlos", "Emma", "Lando", "Mia", "George", "Lucia")
+LAST_NAMES = ("Иванов", "Смирнова", "Кузнецов", "Попова", "Соколов", "Лебедева", "Морозов", "Волкова",
+              "Hamilton", "Verstappen", "Leclerc", "Norris", "Russell", "Alonso", "Sainz", "Piastri")
+IMAGE_URLS = (
+    "https://www.mercedesamgf1.com/wp-content/uploads/sites/3/2023/02/W14_render_34_front_16x9_g-1.jpg",
+    "https://media.formula1.com/image/upload/f_auto,c_limit,w_1920,q_auto/f_auto,c_limit,w_1920,q_auto/f1-website/2023/Car-launches/Ferrari/SF-23_side_view.jpg",
+    "https://media.formula1.com/image/upload/f_auto,c_limit,w_1920,q_auto/f_auto,c_limit,w_1920,q_auto/f1-website/2023/Car-launches/Red-Bull-Racing/Red-Bull-RB19-side-2.jpg",
+    "https://media.formula1.com/image/upload/f_auto,c_limit,w_1920,q_auto/f_auto,c_limit,w_1920,q_auto/f1-website/2023/Car-launches/McLaren/MCL60-side.jpg",
+    "https://media.formula1.com/image/upload/f_auto,c_limit,w_1920,q_auto/f_auto,c_limit,w_1920,q_auto/f1-website/2023/Car-launches/Alpine/A523-side.jpg",
+)
+
+# Распределения позиций заказа: число позиций и количество болида в позиции (накопленные веса).
+ITEM_COUNTS, ITEM_COUNT_WEIGHTS = (1, 2, 3), (60, 90, 100)
+QUANTITIES, QUANTITY_WEIGHTS = (1, 2, 3), (85, 97, 100)
+
+
+class MockSpec(NamedTuple):
+    """
+    Параметры набора данных. Одинаковый spec дает байт в байт одинаковый результат
+    при любом числе процессов: у каждого шарда заказов свой генератор, засеянный
+    (seed, номер шарда).
+    """
+    bolids: int = 50
+    collectors: int = 20
+    orders: int = 40
+    seed: int = 0
+    start: str = '1970-01-01T00:00:00'
+    end: str = '2024-01-01T00:00:00'
+    shard_size: int = 100_000
+    popularity: float = 0.8  # показатель Ципфа для выбора болидов в заказах (0 - равномерно)
+
+    def shards(self) -> int:
+        return -(-self.orders // self.shard_size)
+
+
+def _rng(spec: MockSpec, stream: str) -> random.Random:
+    # Строковое зерно хешируется детерминированно (не зависит от PYTHONHASHSEED)
+    return random.Random(f"{spec.seed}:{stream}")
+
+
+@lru_cache(maxsize=8)
+def _prices(spec: MockSpec) -> Tuple[int, ...]:
+    """Цены болидов по номеру - таблица id -> цена для подсчета сумм заказов."""
+    return tuple(_rng(spec, 'prices').choices(range(100_000, 5_000_001), k=spec.bolids))
+
+
+@lru_cache(maxsize=8)
+def _popularity(spec: MockSpec) -> Tuple[float, ...]:
+    """Накопленные веса выбора болидов: популярность по Ципфу в случайном порядке рангов."""
+    ranks = list(range(1, spec.bolids + 1))
+    _rng(spec, 'popularity').shuffle(ranks)
+    return tuple(accumulate(rank ** -spec.popularity for rank in ranks))
+
+
+def bolid_records(spec: MockSpec, era_ids: Sequence[str]) -> Iterator[Dict[str, Any]]:
+    rng = _rng(spec, 'bolids')
+    for i, price in enumerate(_prices(spec), 1):
+        year = rng.randint(1990, 2023)
+        team = rng.choice(TEAMS)
+        yield {"id": f"bolid_{i}", "name": f"{team} {rng.choice(WORDS)}{year}", "team": team, "year": year,
+               "price": price, "era_id": rng.choice(era_ids), "tags": rng.sample(TAGS, rng.randint(1, 2)),
+               "quantity_available": rng.randint(0, 5), "image_url": rng.choice(IMAGE_URLS)}
+
+
+def collector_records(spec: MockSpec) -> Iterator[Dict[str, Any]]:
+    rng = _rng(spec, 'collectors')
+    for i in range(1, spec.collectors + 1):
+        yield {"id": f"coll_{i}", "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+               "tier": rng.choice(TIERS)}
+
+
+def _sample_orders(spec: MockSpec, shard: int) -> Iterator[Tuple[int, int, List[Tuple[int, int]], int, str]]:
+    """
+    Заказы шарда shard (по spec.shard_size штук) как (номер, коллекционер, [(болид, кол-во)],
+    сумма, время). Все случайные величины шарда выбираются пачками через choices,
+    суммы считаются по таблице цен.
+    """
+    first = shard * spec.shard_size
+    count = max(0, min(spec.shard_size, spec.orders - first))
+    if not count or not spec.bolids or not spec.collectors:
+        return
+    rng = _rng(spec, f'orders-{shard}')
+    prices = _prices(spec)
+    sizes = rng.choices(ITEM_COUNTS, cum_weights=ITEM_COUNT_WEIGHTS, k=count)
+    picks = rng.choices(range(spec.bolids), cum_weights=_popularity(spec), k=sum(sizes))
+    quantities = rng.choices(QUANTITIES, cum_weights=QUANTITY_WEIGHTS, k=len(picks))
+    collectors = rng.choices(range(1, spec.collectors + 1), k=count)
+    start = datetime.fromisoformat(spec.start)
+    span = max(1, int((datetime.fromisoformat(spec.end) - start).total_seconds()))
+    seconds = rng.choices(range(span), k=count)
+
+    position = 0
+    for n, size in enumerate(sizes):
+        if size == 1:
+            bolid, quantity = picks[position], quantities[position]
+            items = [(bolid, quantity)]
+            total = prices[bolid] * quantity
+        else:
+            merged: Dict[int, int] = {}
+            for k in range(position, position + size):
+                merged[picks[k]] = merged.get(picks[k], 0) + quantities[k]
+            items = list(merged.items())
+            total = sum(prices[b] * q for b, q in items)
+        position += size
+        yield first + n + 1, collectors[n], items, total, (start + timedelta(seconds=seconds[n])).isoformat()
+
+
+def order_records(spec: MockSpec, shard: int) -> List[Dict[str, Any]]:
+    """Заказы шарда словарями в формате seed.json; одинаковые позиции - общие словари."""
+    cache: Dict[Tuple[int, int], Dict[str, Any]] = {}
+
+    def item(pair: Tuple[int, int]) -> Dict[str, Any]:
+        found = cache.get(pair)
+        if found is None:
+            found = cache[pair] = {"bolid_id": f"bolid_{pair[0] + 1}", "quantity": pair[1]}
+        return found
+
+    return [{"id": f"order_{n}", "collector_id": f"coll_{collector}", "items": list(map(item, items)),
+             "total_price": total, "timestamp": timestamp}
+            for n, collector, items, total, timestamp in _sample_orders(spec, shard)]
+
+
+def order_lines(spec: MockSpec, shard: int) -> List[str]:
+    """
+    То же, что order_records, но сразу строками JSON. Все строки в заказе - сгенерированные
+    id и время без спецсимволов, поэтому запись собирается шаблоном без json.dumps.
+    """
+    cache: Dict[Tuple[int, int], str] = {}
+
+    def item(pair: Tuple[int, int]) -> str:
+        found = cache.get(pair)
+        if found is None:
+            found = cache[pair] = f'{{"bolid_id":"bolid_{pair[0] + 1}","quantity":{pair[1]}}}'
+        return found
+
+    return [f'{{"id":"order_{n}","collector_id":"coll_{collector}","items":[{",".join(map(item, items))}],'
+            f'"total_price":{total},"timestamp":"{timestamp}"}}'
+            for n, collector, items, total, timestamp in _sample_orders(spec, shard)]
+
+
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+
+class _ShardStage:
+    """Стадия для ParallelExecutor: номера шардов -> их заказы (словари или готовые строки JSON)."""
+
+    def __init__(self, spec: MockSpec, encoded: bool):
+        self.spec = spec
+        self.encoded = encoded
+
+    def __call__(self, shards: List[int]) -> List[Any]:
+        generate = order_lines if self.encoded else order_records
+        return [record for shard in shards for record in generate(self.spec, shard)]
+
+
+def iter_dataset(spec: MockSpec, eras: Sequence[Dict[str, Any]],
+                 executor: Optional[ParallelExecutor] = None,
+                 encoded: bool = False) -> Iterator[Tuple[str, Any]]:
+    """
+    Пары (раздел, запись) набора в порядке seed.json; заказы генерируются
+    по шардам, при executor с несколькими процессами - параллельно
+    (executor.chunk_size - число шардов на задачу).
+    """
+    era_ids = [era['id'] for era in eras]
+    encode = _encode if encoded else (lambda record: record)
+    for era in eras:
+        yield 'eras', encode(era)
+    for record in bolid_records(spec, era_ids):
+        yield 'bolids', encode(record)
+    for record in collector_records(spec):
+        yield 'collectors', encode(record)
+    executor = executor or ParallelExecutor(workers=1, chunk_size=1)
+    for chunk in executor.map(_ShardStage(spec, encoded), range(spec.shards())):
+        for record in chunk:
+            yield 'purchase_orders', record
+
+
+def write_dataset(path: str, spec: MockSpec, eras: Sequence[Dict[str, Any]], workers: int = 1) -> str:
+    """
+    Пишет набор в path потоково. Формат по расширению: .jsonl - строка [раздел, запись]
+    на запись, .snap - бинарный снапшот, иначе - JSON в формате seed.json.
+    Текстовые форматы память не копят. Снапшот собирает колонки и таблицу строк в памяти
+    (пик около 0.7 КБ на заказ: ~0.7 ГБ на 10^6), поэтому размер .snap ограничен памятью;
+    больше 10^7 заказов - только .jsonl или .json.
+    """
+    tmp_path = path + '.tmp'
+    with ParallelExecutor(workers, chunk_size=1) as executor:
+        if path.endswith(SNAPSHOT_SUFFIX):
+            write_records(iter_dataset(spec, eras, executor), path)
+            return path
+        records = iter_dataset(spec, eras, executor, encoded=True)
+        with open(tmp_path, 'w', encoding='utf-8', newline='\n') as f:
+            if path.endswith(JSONL_SUFFIX):
+                f.writelines(f'["{section}",{record}]\n' for section, record in records)
+            else:
+                _write_seed(f, records)
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+
+def _write_seed(f: Any, records: Iterable[Tuple[str, str]]) -> None:
+    written = []
+    for section, group in groupby(records, key=itemgetter(0)):
+        f.write(('{' if not written else ',') + f'\n"{section}": [')
+        for n, (_, record) in enumerate(group):
+            f.write((',\n' if n else '\n') + record)
+        f.write('\n]')
+        written.append(section)
+    for section in SECTIONS:
+        if section not in written:
+            f.write(('{' if not written else ',') + f'\n"{section}": []')
+            written.append(section)
+    f.write('\n}\n')
@@ -0,0 +1,204 @@
+from typing import Any, Generic, Hashable, Iterator, Optional, Tuple, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_BITS = 64
+
+
+def _hash(key: Hashable) -> int:
+    return hash(key) & ((1 << _HASH_BITS) - 1)
+
+
+class _Leaf:
+    __slots__ = ('hash', 'key', 'value')
+
+    def __init__(self, h: int, key: Any, value: Any):
+        self.hash = h
+        self.key = key
+        self.value = value
+
+
+class _Collision:
+    """Ключи с полностью совпадающим хешем."""
+    __slots__ = ('hash', 'pairs')
+
+    def __init__(self, h: int, pairs: Tuple[Tuple[Any, Any], ...]):
+        self.hash = h
+        self.pairs = pairs
+
+
+class _Node:
+    """Узел HAMT: bitmap отмечает занятые из 32 слотов, children хранит только занятые."""
+    __slots__ = ('bitmap', 'children')
+
+    def __init__(self, bitmap: int, children: tuple):
+        self.bitmap = bitmap
+        self.children = children
+
+
+_EMPTY_NODE = _Node(0, ())
+
+
+def _index(bitmap: int, bit: int) -> int:
+    return (bitmap & (bit - 1)).bit_count()
+
+
+def _merge(shift: int, a: Any, b: _Leaf) -> Any:
+    """Узел из двух записей с разными ключами, начиная с уровня shift."""
+    if a.hash == b.hash:
+        pairs = a.pairs if isinstance(a, _Collision) else ((a.key, a.value),)
+        return _Collision(a.hash, pairs + ((b.key, b.value),))
+    if shift >= _HASH_BITS:
+        raise AssertionError("distinct hashes must diverge before the last level")
+    bit_a = 1 << ((a.hash >> shift) & _MASK)
+    bit_b = 1 << ((b.hash >> shift) & _MASK)
+    if bit_a == bit_b:
+        return _Node(bit_a, (_merge(shift + _BITS, a, b),))
+    children = (a, b) if bit_a < bit_b else (b, a)
+    return _Node(bit_a | bit_b, children)
+
+
+def _assoc(node: _Node, shift: int, leaf: _Leaf) -> Tuple[_Node, bool]:
+    """Новый узел с записью leaf; второй элемент - был ли ключ добавлен (а не заменен)."""
+    bit = 1 << ((leaf.hash >> shift) & _MASK)
+    idx = _index(node.bitmap, bit)
+    if not node.bitmap & bit:
+        children = node.children[:idx] + (leaf,) + node.children[idx:]
+        return _Node(node.bitmap | bit, children), True
+    child = node.children[idx]
+    if isinstance(child, _Node):
+        new_child, added = _assoc(child, shift + _BITS, leaf)
+    elif isinstance(child, _Leaf) and child.key == leaf.key:
+        new_child, added = leaf, False
+    elif isinstance(child, _Collision) and child.hash == leaf.hash:
+        pairs = tuple(p for p in child.pairs if p[0] != leaf.key)
+        added = len(pairs) == len(child.pairs)
+        new_child = _Collision(child.hash, pairs + ((leaf.key, leaf.value),))
+    else:
+        new_child, added = _merge(shift + _BITS, child, leaf), True
+    return _Node(node.bitmap, node.children[:idx] + (new_child,) + node.children[idx + 1:]), added
+
+
+def _dissoc(node: _Node, shift: int, h: int, key: Any) -> Optional[Any]:
+    """Узел без ключа key; None, если узел опустел. Возвращает тот же узел, если ключа нет."""
+    bit = 1 << ((h >> shift) & _MASK)
+    if not node.bitmap & bit:
+        return node
+    idx = _index(node.bitmap, bit)
+    child = node.children[idx]
+    if isinstance(child, _Node):
+        new_child = _dissoc(child, shift + _BITS, h, key)
+        if new_child is child:
+            return node
+    elif isinstance(child, _Leaf):
+        if child.key != key:
+            return node
+        new_child = None
+    else:
+        pairs = tuple(p for p in child.pairs if p[0] != key)
+        if len(pairs) == len(child.pairs):
+            return node
+        new_child = _Collision(h, pairs) if len(pairs) > 1 else _Leaf(h, *pairs[0])
+    if new_child is None:
+        bitmap = node.bitmap & ~bit
+        children = node.children[:idx] + node.children[idx + 1:]
+        if not bitmap:
+            return None
+        # Единственная оставшаяся запись поднимается на уровень выше.
+        if len(children) == 1 and not isinstance(children[0], _Node) and shift > 0:
+            return children[0]
+        return _Node(bitmap, children)
+    if len(node.children) == 1 and not isinstance(new_child, _Node) and shift > 0:
+        return new_child
+    return _Node(node.bitmap, node.children[:idx] + (new_child,) + node.children[idx + 1:])
+
+
+def _iter(node: Any) -> Iterator[Tuple[Any, Any]]:
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, _Node):
+            stack.extend(reversed(current.children))
+        elif isinstance(current, _Leaf):
+            yield current.key, current.value
+        else:
+            yield from current.pairs
+
+
+class PersistentMap(Generic[K, V]):
+    """
+    Неизменяемое отображение на hash array mapped trie.
+    set/delete возвращают новую карту за O(log32 n), разделяя с исходной
+    все нетронутые поддеревья.
+    """
+    __slots__ = ('_root', '_size')
+
+    def __init__(self, root: _Node = _EMPTY_NODE, size: int = 0):
+        self._root = root
+        self._size = size
+
+    @classmethod
+    def from_items(cls, items: Any) -> 'PersistentMap[K, V]':
+        result: PersistentMap[K, V] = cls()
+        for key, value in items:
+            result = result.set(key, value)
+        return result
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[K]:
+        return (key for key, _ in _iter(self._root))
+
+    def __contains__(self, key: object) -> bool:
+        sentinel = object()
+        return self.get(key, sentinel) is not sentinel
+
+    def __getitem__(self, key: K) -> V:
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        h = _hash(key)
+        node: Any = self._root
+        shift = 0
+        while isinstance(node, _Node):
+            bit = 1 << ((h >> shift) & _MASK)
+            if not node.bitmap & bit:
+                return default
+            node = node.children[_index(node.bitmap, bit)]
+            shift += _BITS
+        if isinstance(node, _Leaf):
+            return node.value if node.key == key else default
+        for k, v in node.pairs:
+            if k == key:
+                return v
+        return default
+
+    def set(self, key: K, value: V) -> 'PersistentMap[K, V]':
+        root, added = _assoc(self._root, 0, _Leaf(_hash(key), key, value))
+        return PersistentMap(root, self._size + added)
+
+    def delete(self, key: K) -> 'PersistentMap[K, V]':
+        root = _dissoc(self._root, 0, _hash(key), key)
+        if root is self._root:
+            return self
+        return PersistentMap(root if root is not None else _EMPTY_NODE, self._size - 1)
+
+    def items(self) -> Iterator[Tuple[K, V]]:
+        return _iter(self._root)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PersistentMap) or len(self) != len(other):
+            return False
+        sentinel = object()
+        return all(other.get(k, sentinel) == v for k, v in self.items())
+
+    def __repr__(self) -> str:
+        return 'PersistentMap({' + ', '.join(f'{k!r}: {v!r}' for k, v in self.items()) + '})'
@@ -0,0 +1,149 @@
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from core.domain import Bolid, Garage, GarageItem, PurchaseOrder
+from core.transforms import finalize_purchase
+
+
+class MemoryInventory:
+    """Остатки в памяти процесса; compare-and-swap защищен блокировкой."""
+
+    def __init__(self, stock: Dict[str, int]):
+        self._rows: Dict[str, Tuple[int, int]] = {bid: (qty, 0) for bid, qty in stock.items()}
+        self._lock = threading.Lock()
+
+    def read(self, bolid_id: str) -> Optional[Tuple[int, int]]:
+        """(остаток, версия) или None, если болида нет."""
+        return self._rows.get(bolid_id)
+
+    def compare_and_swap(self, bolid_id: str, expected_version: int, quantity: int) -> bool:
+        with self._lock:
+            current = self._rows.get(bolid_id)
+            if current is None or current[1] != expected_version:
+                return False
+            self._rows[bolid_id] = (quantity, expected_version + 1)
+            return True
+
+
+class SQLiteInventory:
+    """
+    Остатки в локальной базе SQLite, общей для нескольких процессов.
+    Версия строки растет при каждом изменении; UPDATE ... WHERE version = ?
+    выполняется атомарно, поэтому двое не могут списать одну и ту же версию.
+    Потоки процесса делят одно соединение под блокировкой.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS inventory ("
+            " bolid_id TEXT PRIMARY KEY,"
+            " quantity INTEGER NOT NULL,"
+            " version INTEGER NOT NULL DEFAULT 0)"
+        )
+
+    def load(self, stock: Dict[str, int], replace: bool = True) -> None:
+        """
+        Записывает начальные остатки. С replace=False добавляются только
+        отсутствующие болиды, уже идущие продажи не затираются. Замена увеличивает
+        версию строки, а не сбрасывает её: CAS по прочитанной до замены версии не пройдет.
+        """
+        on_conflict = ("DO UPDATE SET quantity = excluded.quantity, version = inventory.version + 1" if replace
+                       else "DO NOTHING")
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT INTO inventory (bolid_id, quantity, version) VALUES (?, ?, 0) "
+                    f"ON CONFLICT(bolid_id) {on_conflict}",
+                    stock.items(),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def read(self, bolid_id: str) -> Optional[Tuple[int, int]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT quantity, version FROM inventory WHERE bolid_id = ?", (bolid_id,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def compare_and_swap(self, bolid_id: str, expected_version: int, quantity: int) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE inventory SET quantity = ?, version = version + 1 WHERE bolid_id = ? AND version = ?",
+                (quantity, bolid_id, expected_version),
+            )
+            return cursor.rowcount == 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class InventoryService:
+    """
+    Резервирование остатков через оптимистичные версии.
+    Каждое списание - цикл "прочитать (остаток, версия) -> CAS"; при конфликте
+    версия перечитывается. Заказ из нескольких позиций резервируется по одной,
+    и при нехватке любой из них уже списанное возвращается.
+    """
+
+    def __init__(self, store, max_retries: int = 1000):
+        self.store = store
+        self.max_retries = max_retries
+        self.conflicts = 0
+        self._lock = threading.Lock()  # += над счетчиком не атомарен между потоками
+
+    def _adjust(self, bolid_id: str, delta: int) -> bool:
+        for _ in range(self.max_retries):
+            current = self.store.read(bolid_id)
+            if current is None:
+                return False
+            quantity, version = current
+            if quantity + delta < 0:
+                return False
+            if self.store.compare_and_swap(bolid_id, version, quantity + delta):
+                return True
+            with self._lock:
+                self.conflicts += 1
+        raise RuntimeError(f"Too much contention on {bolid_id}")
+
+    def available(self, bolid_id: str) -> int:
+        current = self.store.read(bolid_id)
+        return current[0] if current else 0
+
+    def reserve(self, items: Iterable[GarageItem]) -> bool:
+        reserved: List[GarageItem] = []
+        try:
+            for item in items:
+                if not self._adjust(item.bolid_id, -item.quantity):
+                    self.release(reserved)
+                    return False
+                reserved.append(item)
+        except BaseException:
+            # Исчерпаны попытки CAS или ошибка базы - уже списанное возвращается
+            self.release(reserved)
+            raise
+        return True
+
+    def release(self, items: Iterable[GarageItem]) -> None:
+        for item in items:
+            self._adjust(item.bolid_id, item.quantity)
+
+    def checkout(self, garage: Garage, bolids: Sequence[Bolid], timestamp: str) -> Optional[PurchaseOrder]:
+        """Резервирует остатки и оформляет заказ; None, если чего-то не хватило."""
+        if not self.reserve(garage.items):
+            return None
+        try:
+            return finalize_purchase(garage, bolids, timestamp)
+        except Exception:
+            self.release(garage.items)
+            raise
@@ -0,0 +1,263 @@
+import json
+import os
+import re
+import struct
+import time
+import zlib
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Tuple
+
+from core.domain import GarageItem, PurchaseOrder
+from core.snapshot import Snapshot, write_records
+
+# Запись журнала: длина и crc32 поля длины вместе с нагрузкой (little-endian), затем сама
+# нагрузка - заказ в JSON того же вида, что в seed.json. Нагрузка не бывает пустой.
+_RECORD = struct.Struct('<II')
+_LENGTH = struct.Struct('<I')
+
+_SEGMENT = re.compile(r'^segment-(\d{8})\.log$')
+_BASE = re.compile(r'^base-(\d{8})\.snap$')
+_BASE_TMP = re.compile(r'^base-\d{8}\.snap\.tmp$')
+
+
+class JournalCorrupted(ValueError):
+    """Поврежденная запись не в хвосте последнего сегмента - ее нельзя списать на оборванную запись."""
+
+
+def order_record(order: PurchaseOrder) -> Dict[str, Any]:
+    return {
+        'id': order.id,
+        'collector_id': order.collector_id,
+        'items': [{'bolid_id': item.bolid_id, 'quantity': item.quantity} for item in order.items],
+        'total_price': order.total_price,
+        'timestamp': order.timestamp,
+    }
+
+
+def _checksum(length: int, payload: bytes) -> int:
+    # Длина входит в crc: иначе нули (length=0, crc32(b'')=0) выглядели бы целой записью
+    return zlib.crc32(payload, zlib.crc32(_LENGTH.pack(length)))
+
+
+def encode_order(order: PurchaseOrder) -> bytes:
+    payload = json.dumps(order_record(order), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return _RECORD.pack(len(payload), _checksum(len(payload), payload)) + payload
+
+
+def decode_order(record: Dict[str, Any]) -> PurchaseOrder:
+    return PurchaseOrder(record['id'], record['collector_id'],
+                         [GarageItem(item['bolid_id'], item['quantity']) for item in record['items']],
+                         record['total_price'], record['timestamp'])
+
+
+def _read_records(path: str) -> Tuple[List[Dict[str, Any]], int, bool]:
+    """Записи сегмента, смещение конца последней целой записи и был ли за ним мусор."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    records = []
+    offset = 0
+    while offset + _RECORD.size <= len(data):
+        length, checksum = _RECORD.unpack_from(data, offset)
+        start = offset + _RECORD.size
+        payload = data[start:start + length]
+        if not length or len(payload) < length or _checksum(length, payload) != checksum:
+            break
+        try:
+            records.append(json.loads(payload))
+        except ValueError:  # JSONDecodeError и UnicodeDecodeError - запись не дописана
+            break
+        offset = start + length
+    return records, offset, offset != len(data)
+
+
+def _fsync_dir(path: str) -> None:
+    # Новое имя файла переживает сбой, только если синхронизирован каталог (на Windows так нельзя).
+    if hasattr(os, 'O_DIRECTORY'):
+        fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class OrderJournal:
+    """
+    Журнал заказов только на дозапись.
+
+    Заказы пишутся в сегменты segment-NNNNNNNN.log; при превышении segment_bytes
+    открывается следующий. fsync выполняется пачками: после sync_every записей
+    или если с прошлого прошло sync_interval секунд (и всегда в sync()/close()).
+    Запись, оборванная сбоем, отсекается при открытии по длине и crc32, поэтому
+    стоимость открытия и записи зависит от размера сегмента, а не всей истории.
+
+    compact() сворачивает закрытые сегменты вместе с прежней базой в снапшот
+    base-NNNNNNNN.snap (NNNNNNNN - последний вошедший сегмент); replay() читает
+    базу, затем оставшиеся сегменты. Свернутые файлы удаляются, когда их не читает
+    ни один replay().
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 16 << 20,
+                 sync_every: int = 100, sync_interval: float = 0.05):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self._lock = Lock()
+        self._readers = 0  # незавершенные replay(): пока они есть, свернутые файлы не удаляются
+        self._cleanup_pending = False
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+        self._remove_compacted()
+        self._remove_temporary()
+        segments = self._segments()
+        self._segment = segments[-1] if segments else self.base() + 1
+        self._recover(self._segment_path(self._segment))
+        self._file = open(self._segment_path(self._segment), 'ab')
+        if not segments:
+            _fsync_dir(directory)
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, f'segment-{number:08d}.log')
+
+    def _listing(self, pattern: 're.Pattern[str]') -> List[int]:
+        return sorted(int(m.group(1)) for m in map(pattern.match, os.listdir(self.directory)) if m)
+
+    def _segments(self) -> List[int]:
+        base = self.base()
+        return [n for n in self._listing(_SEGMENT) if n > base]
+
+    def base(self) -> int:
+        """Номер последнего сегмента, уже свернутого в снапшот (0 - снапшота нет)."""
+        bases = self._listing(_BASE)
+        return bases[-1] if bases else 0
+
+    def _remove_compacted(self) -> None:
+        # Сбой между записью снапшота и удалением сегментов оставляет дубликаты - дочищаем.
+        base = self.base()
+        for number in self._listing(_SEGMENT):
+            if number <= base:
+                os.remove(self._segment_path(number))
+        for number in self._listing(_BASE):
+            if number < base:
+                os.remove(os.path.join(self.directory, f'base-{number:08d}.snap'))
+
+    def _remove_temporary(self) -> None:
+        # Недописанный снапшот compact(), прерванного сбоем до переименования.
+        for name in os.listdir(self.directory):
+            if _BASE_TMP.match(name):
+                os.remove(os.path.join(self.directory, name))
+
+    @staticmethod
+    def _recover(path: str) -> None:
+        if not os.path.exists(path):
+            return
+        _, end, torn = _read_records(path)
+        if torn:
+            with open(path, 'r+b') as f:
+                f.truncate(end)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def append(self, order: PurchaseOrder) -> None:
+        record = encode_order(order)
+        with self._lock:
+            self._file.write(record)
+            self._pending += 1
+            if self._file.tell() >= self.segment_bytes:
+                self._rotate()
+            elif self._pending >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+                self._sync()
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def _rotate(self) -> None:
+        self._sync()
+        self._file.close()
+        self._segment += 1
+        self._file = open(self._segment_path(self._segment), 'ab')
+        _fsync_dir(self.directory)
+
+    def sync(self) -> None:
+        """Гарантирует, что все добавленные заказы на диске."""
+        with self._lock:
+            if self._pending:
+                self._sync()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+
+    def __enter__(self) -> 'OrderJournal':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _replay(self, base: int, segments: List[int], start: int = 0) -> Iterator[PurchaseOrder]:
+        # Пропущенные заказы не собираются: в базе - по индексу, в сегментах - без decode_order.
+        if base:
+            snapshot = Snapshot(os.path.join(self.directory, f'base-{base:08d}.snap'))
+            try:
+                orders = snapshot.purchase_orders
+                yield from map(orders.__getitem__, range(min(start, len(orders)), len(orders)))
+                start = max(0, start - len(orders))
+            finally:
+                snapshot.close()
+        for number in segments:
+            records, _, torn = _read_records(self._segment_path(number))
+            if torn and number != self._segment:
+                raise JournalCorrupted(f"{self._segment_path(number)} is corrupted")
+            yield from map(decode_order, records[start:])
+            start = max(0, start - len(records))
+
+    def replay(self, start: int = 0) -> Iterator[PurchaseOrder]:
+        """
+        Заказы журнала в порядке записи, начиная с номера start, - для восстановления
+        состояния в памяти: SalesCube(bolids, collectors, journal.replay()).
+        Нумерация сквозная и не меняется при compact().
+        """
+        self.sync()
+        return self._replay_current(start)
+
+    def _replay_current(self, start: int) -> Iterator[PurchaseOrder]:
+        # Список файлов берется при первом обращении, с ним же регистрируется читатель.
+        with self._lock:
+            base, segments = self.base(), self._segments()
+            self._readers += 1
+        try:
+            yield from self._replay(base, segments, start)
+        finally:
+            with self._lock:
+                self._readers -= 1
+                if not self._readers and self._cleanup_pending:
+                    self._cleanup_pending = False
+                    self._remove_compacted()
+
+    def compact(self) -> int:
+        """
+        Сворачивает закрытые сегменты в новый снапшот-базу и удаляет их.
+        Активный сегмент не трогается, запись в журнал во время сжатия не блокируется.
+        Возвращает номер последнего свернутого сегмента.
+        """
+        with self._lock:
+            base = self.base()
+            sealed = [n for n in self._segments() if n < self._segment]
+        if not sealed:
+            return base
+        upto = sealed[-1]
+        records = (('purchase_orders', order_record(order)) for order in self._replay(base, sealed))
+        write_records(records, os.path.join(self.directory, f'base-{upto:08d}.snap'))
+        _fsync_dir(self.directory)
+        with self._lock:
+            if self._readers:
+                self._cleanup_pending = True  # удалит последний из читающих
+            else:
+                self._remove_compacted()
+        return upto
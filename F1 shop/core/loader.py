@@ -0,0 +1,184 @@
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, NamedTuple, Optional, TextIO, Tuple
+
+from core.domain import CarEra, Bolid, Collector, PurchaseOrder, GarageItem
+
+CHUNK_SIZE = 1 << 16
+DATABASE_SUFFIXES = ('.sqlite', '.sqlite3', '.db')  # такие пути читаются из базы core.storage
+JSONL_SUFFIX = '.jsonl'  # JSON Lines: строка [раздел, запись] на каждую запись
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\r\n'
+_STRUCTURE = re.compile(r'["\[\]{}]')  # вне строки важны только кавычки и скобки
+_STRING_END = re.compile(r'["\\]')
+_NUMBER_TAIL = re.compile(r'[0-9.eE+\-]*\Z')  # конец буфера, где число еще может продолжаться
+
+
+def _purchase_order(record: Dict[str, Any]) -> PurchaseOrder:
+    items = [GarageItem(**item) for item in record.get('items', [])]
+    return PurchaseOrder(**{**record, 'items': items})
+
+
+# Разделы seed.json и конструкторы доменных объектов для них.
+SECTIONS: Dict[str, Callable[[Dict[str, Any]], NamedTuple]] = {
+    'eras': lambda record: CarEra(**record),
+    'bolids': lambda record: Bolid(**record),
+    'collectors': lambda record: Collector(**record),
+    'purchase_orders': _purchase_order,
+}
+
+
+class _JsonReader:
+    """
+    Минимальный потоковый разбор JSON: в памяти держится только текущий
+    кусок файла и один разбираемый элемент, а не весь документ.
+    """
+
+    def __init__(self, stream: TextIO, chunk_size: int):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size: int) -> bool:
+        data = self._stream.read(size)
+        if not data:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill(self._chunk_size):
+                return ''
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self._buf, self._pos)
+        self._pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        size = self._chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+                # Число у конца буфера может продолжаться в следующем куске: "1." | "5", "1e" | "5".
+                if self._eof or not _NUMBER_TAIL.match(self._buf, end):
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            if not self._fill(size):
+                continue
+            size *= 2
+
+    def skip(self) -> None:
+        """
+        Пропускает значение без разбора: ищет парную скобку, следя только за строками.
+        Прочитанное сразу отбрасывается, поэтому память не зависит от размера значения.
+        """
+        if self.peek() not in '[{"':
+            self.value()  # число, true/false/null - короткие
+            return
+        pos, depth, in_string = self._pos, 0, False
+        while True:
+            match = (_STRING_END if in_string else _STRUCTURE).search(self._buf, pos)
+            if match is None:
+                pos = self._more(len(self._buf))
+                continue
+            char, pos = match.group(), match.end()
+            if char == '\\':
+                # Экранированный символ (в том числе кавычка) пропускается целиком.
+                pos = self._more(len(self._buf)) + 1 if pos == len(self._buf) else pos + 1
+                continue
+            if char == '"':
+                in_string = not in_string
+            elif char in '[{':
+                depth += 1
+            else:
+                depth -= 1
+            if not depth and not in_string:
+                self._pos = pos
+                return
+
+    def _more(self, pos: int) -> int:
+        """Отбрасывает буфер до pos и дочитывает кусок; возвращает pos в новом буфере."""
+        self._pos = pos
+        if not self._fill(self._chunk_size):
+            raise json.JSONDecodeError('Unterminated value', self._buf, self._pos)
+        return 0
+
+
+def iter_seed_records(path: str, sections: Optional[Iterable[str]] = None,
+                      chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Лениво отдаёт пары (раздел, запись) из seed-файла в порядке следования в файле.
+    Разбирает по одной записи за раз, поэтому пиковая память не зависит от размера файла.
+    Ненужные разделы пропускаются без разбора, чтение заканчивается на последнем нужном.
+    Файлы JSON Lines и базы SQLite (см. JSONL_SUFFIX, DATABASE_SUFFIXES) читаются так же.
+    """
+    if path.endswith(DATABASE_SUFFIXES):
+        from core.storage import SQLiteStore  # core.storage сам импортирует загрузчик
+        store = SQLiteStore(path)
+        try:
+            yield from store.iter_records(sections)
+        finally:
+            store.close()
+        return
+    wanted = set(SECTIONS if sections is None else sections)
+    remaining = set(wanted)
+    if path.endswith(JSONL_SUFFIX):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                # Раздел - первая строка в массиве; запись ненужного раздела не разбирается.
+                section, _ = _decoder.raw_decode(line, 1)
+                if section in wanted:
+                    remaining.discard(section)
+                    yield section, json.loads(line)[1]
+                elif not remaining:
+                    return  # разделы идут блоками, все нужные уже прочитаны
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = _JsonReader(f, chunk_size)
+        reader.expect('{')
+        while remaining and reader.peek() != '}':
+            key = reader.value()
+            reader.expect(':')
+            if key in wanted and reader.peek() == '[':
+                reader.expect('[')
+                while reader.peek() != ']':
+                    yield key, reader.value()
+                    if reader.peek() == ',':
+                        reader.expect(',')
+                reader.expect(']')
+                remaining.discard(key)
+            else:
+                reader.skip()
+            if reader.peek() == ',':
+                reader.expect(',')
+        if remaining:
+            reader.expect('}')
+
+
+def iter_seed(path: str, sections: Optional[Iterable[str]] = None,
+              chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, NamedTuple]]:
+    """Как iter_seed_records, но отдаёт готовые доменные объекты."""
+    for section, record in iter_seed_records(path, sections, chunk_size):
+        yield section, SECTIONS[section](record)
+
+
+def iter_section(path: str, section: str, chunk_size: int = CHUNK_SIZE) -> Iterator[NamedTuple]:
+    """Доменные объекты одного раздела, например iter_section(path, 'bolids')."""
+    for _, obj in iter_seed(path, (section,), chunk_size):
+        yield obj
@@ -0,0 +1,152 @@
+import os
+from array import array
+from collections import defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import reduce
+from itertools import accumulate, chain, count
+from operator import add, attrgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from core.compose import chunked
+from core.domain import GarageItem, PurchaseOrder
+from core.transforms import sales_counts, total_sales
+
+
+class PlainCodec:
+    """Чанк передается как есть (обычный pickle списка)."""
+
+    def encode(self, items: Sequence[Any]) -> Any:
+        return list(items)
+
+    def decode(self, payload: Any) -> List[Any]:
+        return payload
+
+
+class OrderCodec:
+    """
+    Чанк заказов в колонках: строки один раз в таблице, ссылки на них и числа
+    в array (pickle кладет array одним блоком байт). Позиции всех заказов -
+    плоские колонки bolid/quantity со смещениями, как в снапшоте.
+    """
+
+    def encode(self, orders: Sequence[PurchaseOrder]) -> Tuple[Any, ...]:
+        # Номер строки выдается при первом обращении к ключу.
+        codes: Dict[str, int] = defaultdict(count().__next__)
+        code = codes.__getitem__
+        ids = array('i', map(code, map(attrgetter('id'), orders)))
+        collectors = array('i', map(code, map(attrgetter('collector_id'), orders)))
+        stamps = array('i', map(code, map(attrgetter('timestamp'), orders)))
+        totals = list(map(attrgetter('total_price'), orders))
+        # Целые суммы - int64; если в чанке есть дробные, вся колонка - double.
+        totals = array('q' if all(type(total) is int for total in totals) else 'd', totals)
+        item_lists = list(map(attrgetter('items'), orders))
+        offsets = array('q', accumulate(map(len, item_lists), initial=0))
+        items = list(chain.from_iterable(item_lists))
+        bolid_ids = array('i', map(code, map(attrgetter('bolid_id'), items)))
+        quantities = array('q', map(attrgetter('quantity'), items))
+        return tuple(codes), ids, collectors, stamps, totals, offsets, bolid_ids, quantities
+
+    def decode(self, payload: Tuple[Any, ...]) -> List[PurchaseOrder]:
+        strings, ids, collectors, stamps, totals, offsets, bolid_ids, quantities = payload
+        string = strings.__getitem__
+        items = list(map(GarageItem._make, zip(map(string, bolid_ids), quantities)))
+        item_lists = map(items.__getitem__, map(slice, offsets, offsets[1:]))
+        return list(map(PurchaseOrder._make, zip(
+            map(string, ids), map(string, collectors), item_lists, totals, map(string, stamps))))
+
+
+PLAIN = PlainCodec()
+ORDERS = OrderCodec()
+
+
+def _run_chunk(stage: Callable[[List[Any]], Any], codec: Any, payload: Any) -> Any:
+    return stage(codec.decode(payload))
+
+
+def _bounded_map(pool: ProcessPoolExecutor, stage: Callable[[List[Any]], Any], codec: Any,
+                 payloads: Iterable[Any], window: int) -> Iterator[Any]:
+    """
+    Как pool.map, но в работе не больше window чанков: следующий отправляется, когда
+    отдан результат самого старого. Память не растет с длиной потока, даже если
+    потребитель медленнее пула.
+    """
+    pending: 'deque[Future]' = deque()
+    try:
+        for payload in payloads:
+            pending.append(pool.submit(_run_chunk, stage, codec, payload))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+class ParallelExecutor:
+    """
+    Map/reduce по чанкам в пуле процессов.
+    stage должен быть чистой функцией уровня модуля (или pipe из таких) - она
+    передается в процессы через pickle. Результаты чанков сливаются строго
+    в порядке чанков, поэтому итог не зависит от того, какой процесс закончил первым.
+    Пул создается на вызов либо один раз на блок with. Одновременно в работе
+    не больше max_pending чанков (по умолчанию - два на процесс).
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 10000, max_pending: Optional[int] = None):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending or 2 * (workers or os.cpu_count() or 1)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> 'ParallelExecutor':
+        if self.workers != 1:
+            self._pool = ProcessPoolExecutor(self.workers)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def map(self, stage: Callable[[List[Any]], Any], items: Iterable[Any], codec: Any = PLAIN) -> Iterator[Any]:
+        """Результат stage для каждого чанка, в порядке чанков."""
+        chunks = chunked(self.chunk_size)(items)
+        if self.workers == 1:
+            return map(stage, map(list, chunks))
+        payloads = map(codec.encode, chunks)
+        if self._pool is not None:
+            return _bounded_map(self._pool, stage, codec, payloads, self.max_pending)
+        return self._map_once(stage, codec, payloads)
+
+    def _map_once(self, stage: Callable[[List[Any]], Any], codec: Any, payloads: Iterable[Any]) -> Iterator[Any]:
+        with ProcessPoolExecutor(self.workers) as pool:
+            yield from _bounded_map(pool, stage, codec, payloads, self.max_pending)
+
+    def map_reduce(self, stage: Callable[[List[Any]], Any], merge: Callable[[Any, Any], Any],
+                   items: Iterable[Any], initial: Any, codec: Any = PLAIN) -> Any:
+        return reduce(merge, self.map(stage, items, codec), initial)
+
+
+def merge_counts(acc: Dict[str, int], part: Dict[str, int]) -> Dict[str, int]:
+    """Сливает счетчики чанка в общий; новые ключи добавляются в порядке их появления в чанке."""
+    for key, value in part.items():
+        acc[key] = acc.get(key, 0) + value
+    return acc
+
+
+def parallel_total_sales(orders: Iterable[PurchaseOrder],
+                         executor: Optional[ParallelExecutor] = None) -> Union[int, float]:
+    """
+    То же, что total_sales, но по чанкам в пуле процессов. Для целых сумм результат
+    совпадает точно; дробные складываются по чанкам и могут отличаться в последних битах.
+    """
+    executor = executor or ParallelExecutor()
+    return executor.map_reduce(total_sales, add, orders, 0, codec=ORDERS)
+
+
+def parallel_sales_counts(orders: Iterable[PurchaseOrder],
+                          executor: Optional[ParallelExecutor] = None) -> Dict[str, int]:
+    """То же, что sales_counts, включая порядок ключей."""
+    executor = executor or ParallelExecutor()
+    return executor.map_reduce(sales_counts, merge_counts, orders, {}, codec=ORDERS)
@@ -0,0 +1,317 @@
+from abc import ABC, abstractmethod
+from typing import Any, Callable, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from core.catalog import BolidCatalog
+from core.domain import Bolid
+from core.tags import matches, parse_tag_query
+
+
+class Predicate(ABC):
+    """
+    Условие на болид. Вызывается как обычная функция (подходит для filter),
+    комбинируется через &, | и ~ (в том числе с обычными функциями с любой стороны),
+    а планировщик compile_plan выполняет дерево условий за один проход по каталогу,
+    начиная с самых селективных индексов.
+    """
+
+    @abstractmethod
+    def __call__(self, bolid: Bolid) -> bool:
+        ...
+
+    def __and__(self, other: Any) -> 'Predicate':
+        return And(self, other)
+
+    def __rand__(self, other: Any) -> 'Predicate':
+        return And(other, self)
+
+    def __or__(self, other: Any) -> 'Predicate':
+        return Or(self, other)
+
+    def __ror__(self, other: Any) -> 'Predicate':
+        return Or(other, self)
+
+    def __invert__(self) -> 'Predicate':
+        return Not(self)
+
+    def indexed(self) -> bool:
+        """Можно ли вычислить условие целиком по индексам каталога."""
+        return False
+
+    def mask(self, catalog: BolidCatalog) -> int:
+        """Маска подходящих строк; есть только у индексных условий (indexed())."""
+        raise NotImplementedError(f"{type(self).__name__} is not indexed")
+
+    def estimate(self, catalog: BolidCatalog) -> int:
+        """Оценка числа подходящих строк; неиндексные условия считаются неселективными."""
+        return len(catalog)
+
+    def estimate_with_mask(self, catalog: BolidCatalog) -> Tuple[int, Optional[int]]:
+        """Оценка и маска, если она посчитана ради оценки - планировщик не считает её второй раз."""
+        return self.estimate(catalog), None
+
+    @abstractmethod
+    def describe(self) -> str:
+        ...
+
+    def __repr__(self) -> str:
+        return self.describe()
+
+
+class _MaskCounted(Predicate):
+    """Индексное условие, оценка которого - точное число строк его маски."""
+
+    def indexed(self) -> bool:
+        return True
+
+    def estimate(self, catalog: BolidCatalog) -> int:
+        return self.mask(catalog).bit_count()
+
+    def estimate_with_mask(self, catalog: BolidCatalog) -> Tuple[int, Optional[int]]:
+        mask = self.mask(catalog)
+        return mask.bit_count(), mask
+
+
+class EraIn(_MaskCounted):
+    def __init__(self, era_ids: Iterable[str]):
+        self.era_ids: FrozenSet[str] = frozenset(era_ids)
+
+    def __call__(self, bolid: Bolid) -> bool:
+        return bolid.era_id in self.era_ids
+
+    def mask(self, catalog: BolidCatalog) -> int:
+        return catalog.era_mask(self.era_ids)
+
+    def describe(self) -> str:
+        if len(self.era_ids) == 1:
+            return f"era == {next(iter(self.era_ids))!r}"
+        return f"era in {sorted(self.era_ids)!r}"
+
+
+class TeamIs(_MaskCounted):
+    def __init__(self, team: str):
+        self.team = team
+
+    def __call__(self, bolid: Bolid) -> bool:
+        return bolid.team == self.team
+
+    def mask(self, catalog: BolidCatalog) -> int:
+        return catalog.team_mask(self.team)
+
+    def describe(self) -> str:
+        return f"team == {self.team!r}"
+
+
+class HasTag(_MaskCounted):
+    def __init__(self, tag: str):
+        self.tag = tag
+
+    def __call__(self, bolid: Bolid) -> bool:
+        return self.tag in bolid.tags
+
+    def mask(self, catalog: BolidCatalog) -> int:
+        return catalog.tag_mask(self.tag)
+
+    def describe(self) -> str:
+        return f"{self.tag!r} in tags"
+
+
+class TagsMatch(_MaskCounted):
+    """Булев запрос по тегам; по каталогу считается на инвертированном индексе тегов."""
+
+    def __init__(self, query: str):
+        self.query = query
+        self.node = parse_tag_query(query)
+
+    def __call__(self, bolid: Bolid) -> bool:
+        return matches(self.node, set(bolid.tags))
+
+    def mask(self, catalog: BolidCatalog) -> int:
+        return catalog.tag_query_mask(self.node)
+
+    def describe(self) -> str:
+        return f"tags ~ {self.query!r}"
+
+
+class PriceBetween(Predicate):
+    def __init__(self, min_price: int, max_price: int):
+        self.min_price = min_price
+        self.max_price = max_price
+
+    def __call__(self, bolid: Bolid) -> bool:
+        return self.min_price <= bolid.price <= self.max_price
+
+    def indexed(self) -> bool:
+        return True
+
+    def mask(self, catalog: BolidCatalog) -> int:
+        return catalog.price_mask(self.min_price, self.max_price)
+
+    def estimate(self, catalog: BolidCatalog) -> int:
+        return catalog.price_count(self.min_price, self.max_price)
+
+    def describe(self) -> str:
+        return f"price in [{self.min_price}, {self.max_price}]"
+
+
+class Where(Predicate):
+    """Произвольная функция-условие; проверяется построчно, индексы не использует."""
+
+    def __init__(self, func: Callable[[Bolid], bool]):
+        self.func = func
+
+    def __call__(self, bolid: Bolid) -> bool:
+        return bool(self.func(bolid))
+
+    def describe(self) -> str:
+        return f"where({getattr(self.func, '__name__', repr(self.func))})"
+
+
+class And(Predicate):
+    def __init__(self, *parts: Predicate):
+        self.parts: Tuple[Predicate, ...] = _flatten(And, parts)
+
+    def __call__(self, bolid: Bolid) -> bool:
+        return all(p(bolid) for p in self.parts)
+
+    def indexed(self) -> bool:
+        return all(p.indexed() for p in self.parts)
+
+    def mask(self, catalog: BolidCatalog) -> int:
+        return _intersect(catalog, _ranked(self.parts, catalog))
+
+    def estimate(self, catalog: BolidCatalog) -> int:
+        return min((p.estimate(catalog) for p in self.parts), default=len(catalog))
+
+    def describe(self) -> str:
+        return "(" + " & ".join(p.describe() for p in self.parts) + ")"
+
+
+class Or(Predicate):
+    def __init__(self, *parts: Predicate):
+        self.parts: Tuple[Predicate, ...] = _flatten(Or, parts)
+
+    def __call__(self, bolid: Bolid) -> bool:
+        return any(p(bolid) for p in self.parts)
+
+    def indexed(self) -> bool:
+        return all(p.indexed() for p in self.parts)
+
+    def mask(self, catalog: BolidCatalog) -> int:
+        mask = 0
+        for part in self.parts:
+            mask |= part.mask(catalog)
+        return mask
+
+    def estimate(self, catalog: BolidCatalog) -> int:
+        return min(len(catalog), sum(p.estimate(catalog) for p in self.parts))
+
+    def describe(self) -> str:
+        return "(" + " | ".join(p.describe() for p in self.parts) + ")"
+
+
+class Not(Predicate):
+    def __init__(self, part: Predicate):
+        self.part = part
+
+    def __call__(self, bolid: Bolid) -> bool:
+        return not self.part(bolid)
+
+    def indexed(self) -> bool:
+        return self.part.indexed()
+
+    def mask(self, catalog: BolidCatalog) -> int:
+        return catalog.all() & ~self.part.mask(catalog)
+
+    def estimate(self, catalog: BolidCatalog) -> int:
+        return len(catalog) - self.part.estimate(catalog)
+
+    def estimate_with_mask(self, catalog: BolidCatalog) -> Tuple[int, Optional[int]]:
+        count, mask = self.part.estimate_with_mask(catalog)
+        if mask is None:
+            return len(catalog) - count, None
+        mask = catalog.all() & ~mask
+        return mask.bit_count(), mask
+
+    def describe(self) -> str:
+        return f"~{self.part.describe()}"
+
+
+def _flatten(kind: type, parts: Iterable[Predicate]) -> Tuple[Predicate, ...]:
+    flat: List[Predicate] = []
+    for part in parts:
+        if not isinstance(part, Predicate):
+            part = Where(part)
+        flat.extend(part.parts if isinstance(part, kind) else (part,))
+    return tuple(flat)
+
+
+class _Ranked(NamedTuple):
+    """Индексный терм с оценкой и маской, если её уже пришлось посчитать для оценки."""
+    estimate: int
+    term: Predicate
+    mask: Optional[int]
+
+
+def _rank(term: Predicate, catalog: BolidCatalog) -> _Ranked:
+    estimate, mask = term.estimate_with_mask(catalog)
+    return _Ranked(estimate, term, mask)
+
+
+def _ranked(terms: Iterable[Predicate], catalog: BolidCatalog) -> List[_Ranked]:
+    """Термы по возрастанию оценки числа строк."""
+    return sorted((_rank(term, catalog) for term in terms), key=lambda r: r.estimate)
+
+
+def _intersect(catalog: BolidCatalog, ranked: Iterable[_Ranked]) -> int:
+    mask = catalog.all()
+    for r in ranked:
+        mask &= r.term.mask(catalog) if r.mask is None else r.mask
+        if not mask:
+            break
+    return mask
+
+
+class Plan:
+    """Скомпилированный фильтр: пересечение индексных масок плюс построчная проверка остатка."""
+
+    def __init__(self, catalog: BolidCatalog, index_terms: List[Predicate], residual: List[Predicate],
+                 ranked: Optional[List[_Ranked]] = None):
+        self.catalog = catalog
+        self.index_terms = index_terms
+        self.residual = residual
+        # Оценки и маски, посчитанные при планировании, переиспользуются в mask() и explain()
+        self._ranked = ranked if ranked is not None else [_rank(term, catalog) for term in index_terms]
+
+    def mask(self) -> int:
+        return _intersect(self.catalog, self._ranked)
+
+    def execute(self) -> Tuple[Bolid, ...]:
+        candidates = self.catalog.select(self.mask())
+        if not self.residual:
+            return candidates
+        checks = self.residual
+        return tuple(b for b in candidates if all(check(b) for check in checks))
+
+    def explain(self) -> str:
+        lines = [f"Plan over {len(self.catalog)} bolids: "
+                 f"{len(self.index_terms)} index term(s), {len(self.residual)} residual check(s)"]
+        for r in self._ranked:
+            lines.append(f"  index  {r.term.describe()}  ~{r.estimate} rows")
+        for check in self.residual:
+            lines.append(f"  scan   {check.describe()}")
+        return "\n".join(lines)
+
+
+def compile_plan(predicate: Predicate, catalog: BolidCatalog) -> Plan:
+    """
+    Раскладывает дерево условий на индексные термы (по возрастанию оценки числа строк)
+    и остаточные проверки, выполняемые за один проход по уцелевшим строкам.
+    """
+    parts = predicate.parts if isinstance(predicate, And) else (predicate,)
+    ranked = _ranked((p for p in parts if p.indexed()), catalog)
+    residual = [p for p in parts if not p.indexed()]
+    return Plan(catalog, [r.term for r in ranked], residual, ranked)
+
+
+def select(predicate: Predicate, catalog: BolidCatalog) -> Tuple[Bolid, ...]:
+    return compile_plan(predicate, catalog).execute()
@@ -1,29 +1,120 @@
-from typing import Tuple, List, Optional
+from functools import lru_cache
+from itertools import chain
+from typing import Tuple, List, Optional, Dict, FrozenSet, Iterable, Iterator, Callable, Set
 from core.domain import CarEra, Bolid
 
 
-def get_children(eras: Tuple[CarEra, ...], era_id: Optional[str]) -> Tuple[CarEra, ...]:
-    return tuple(e for e in eras if e.parent == era_id)
+def walk_preorder(roots: Iterable[CarEra],
+                  get_children: Callable[[str], Iterable[CarEra]],
+                  visited: Optional[Set[str]] = None) -> Iterator[Tuple[CarEra, int]]:
+    """
+    Прямой обход дерева эр на явном стеке, без рекурсии.
+    Отдаёт пары (эра, глубина) лениво; уже посещённые эры пропускаются,
+    поэтому цикл в данных не приводит к бесконечному обходу.
+    """
+    if visited is None:
+        visited = set()
+    stack: List[Iterator[CarEra]] = [iter(roots)]
+    while stack:
+        era = next(stack[-1], None)
+        if era is None:
+            stack.pop()
+            continue
+        if era.id in visited:
+            continue
+        visited.add(era.id)
+        yield era, len(stack) - 1
+        stack.append(iter(get_children(era.id)))
 
 
-def flatten_eras(eras: Tuple[CarEra, ...], root_id: Optional[str]) -> Tuple[CarEra, ...]:
-    flat_list = []
+class EraTree:
+    """
+    Индекс дерева эр, строится один раз по кортежу CarEra.
+    Хранит отображение родитель -> дети и номера входа/выхода прямого обхода,
+    поэтому поддерево любой эры лежит в self.order непрерывным отрезком.
+    """
+
+    def __init__(self, eras: Tuple[CarEra, ...]):
+        self.by_id: Dict[str, CarEra] = {e.id: e for e in eras}
+        children: Dict[Optional[str], List[CarEra]] = {}
+        for era in eras:
+            children.setdefault(era.parent, []).append(era)
+        self._children: Dict[Optional[str], Tuple[CarEra, ...]] = {p: tuple(c) for p, c in children.items()}
+
+        self.order: List[CarEra] = []
+        self.enter: Dict[str, int] = {}
+        self.exit: Dict[str, int] = {}
+
+        # Корни: эры без родителя или с родителем, которого нет в списке.
+        # Затем эры, недостижимые от корней (цикл в данных) - они нумеруются отдельно.
+        roots = chain((e for e in eras if e.parent is None or e.parent not in self.by_id), eras)
+        open_eras: List[Tuple[int, str]] = []
+        for era, depth in walk_preorder(roots, self.children):
+            while open_eras and open_eras[-1][0] >= depth:
+                self.exit[open_eras.pop()[1]] = len(self.order)
+            self.enter[era.id] = len(self.order)
+            self.order.append(era)
+            open_eras.append((depth, era.id))
+        for _, era_id in open_eras:
+            self.exit[era_id] = len(self.order)
+
+    def children(self, era_id: Optional[str]) -> Tuple[CarEra, ...]:
+        return self._children.get(era_id, ())
+
+    def _slice(self, start: int, stop: int) -> Iterator[CarEra]:
+        # islice по списку пропускает первые start элементов поштучно, поэтому идём по индексам.
+        return (self.order[i] for i in range(start, stop))
+
+    def iter_descendants(self, era_id: Optional[str]) -> Iterator[CarEra]:
+        """Лениво отдаёт потомков эры в порядке прямого обхода."""
+        if era_id in self.enter:
+            return self._slice(self.enter[era_id] + 1, self.exit[era_id])
+        # Виртуальный корень (None или несуществующий родитель): склеиваем поддеревья детей.
+        return chain.from_iterable(
+            self._slice(self.enter[child.id], self.exit[child.id]) for child in self.children(era_id)
+        )
+
+    def descendants(self, era_id: Optional[str]) -> Tuple[CarEra, ...]:
+        """Все потомки эры в порядке прямого обхода, за O(k)."""
+        if era_id in self.enter:
+            return tuple(self.order[self.enter[era_id] + 1:self.exit[era_id]])
+        return tuple(self.iter_descendants(era_id))
 
-    def recurse(current_id: Optional[str]):
-        children = get_children(eras, current_id)
-        for child in children:
-            flat_list.append(child)
-            recurse(child.id)
+    def is_under(self, era_id: str, ancestor_id: str) -> bool:
+        """Лежит ли эра era_id в поддереве ancestor_id (включая её саму), за O(1)."""
+        if era_id not in self.enter or ancestor_id not in self.enter:
+            return False
+        return self.enter[ancestor_id] <= self.enter[era_id] < self.exit[ancestor_id]
 
-    root_era = next((e for e in eras if e.id == root_id), None)
+    def subtree_ids(self, root_id: Optional[str]) -> FrozenSet[str]:
+        ids = {e.id for e in self.descendants(root_id)}
+        if root_id in self.by_id:
+            ids.add(root_id)
+        return frozenset(ids)
+
+
+@lru_cache(maxsize=8)
+def build_era_tree(eras: Tuple[CarEra, ...]) -> EraTree:
+    return EraTree(eras)
+
+
+def get_children(eras: Tuple[CarEra, ...], era_id: Optional[str]) -> Tuple[CarEra, ...]:
+    return build_era_tree(eras).children(era_id)
+
+
+def iter_eras(eras: Tuple[CarEra, ...], root_id: Optional[str]) -> Iterator[CarEra]:
+    """Потоковый вариант flatten_eras: можно остановиться, не обходя всё поддерево."""
+    tree = build_era_tree(eras)
+    root_era = tree.by_id.get(root_id)
     if root_era:
-        flat_list.append(root_era)
+        yield root_era
+    yield from tree.iter_descendants(root_id)
 
-    recurse(root_id)
-    return tuple(flat_list)
+
+def flatten_eras(eras: Tuple[CarEra, ...], root_id: Optional[str]) -> Tuple[CarEra, ...]:
+    return tuple(iter_eras(eras, root_id))
 
 
 def collect_bolids_recursive(eras: Tuple[CarEra, ...], bolids: Tuple[Bolid, ...], root_id: str) -> Tuple[Bolid, ...]:
-    target_eras = flatten_eras(eras, root_id)
-    target_era_ids = {e.id for e in target_eras}
-    return tuple(b for b in bolids if b.era_id in target_era_ids)
\ No newline at end of file
+    target_era_ids = build_era_tree(eras).subtree_ids(root_id)
+    return tuple(b for b in bolids if b.era_id in target_era_ids)
@@ -0,0 +1,72 @@
+import heapq
+from threading import Lock
+from typing import Dict, Iterable, List, Tuple
+
+from core.domain import Bolid, PurchaseOrder
+
+
+class SalesAggregator:
+    """
+    Инкрементальный подсчет продаж по болидам.
+    Заказы добавляются по мере поступления, топ-k отдается за O(k log n)
+    без пересчета всей истории. Результат совпадает с top_selling_bolids.
+    Один агрегатор можно делить между потоками (сессиями приложения).
+    """
+
+    def __init__(self, bolids: Iterable[Bolid], orders: Iterable[PurchaseOrder] = ()):
+        self._bolid_map: Dict[str, Bolid] = {b.id: b for b in bolids}
+        self._counts: Dict[str, int] = {}
+        # Порядок первого появления болида - так же разрешает ничьи sorted() в пакетной версии.
+        self._first_seen: Dict[str, int] = {}
+        # Куча с ленивым удалением: устаревшие записи отбрасываются при чтении.
+        self._heap: List[Tuple[int, int, str]] = []
+        self._lock = Lock()
+        self.add_orders(orders)
+
+    def add_order(self, order: PurchaseOrder) -> None:
+        with self._lock:
+            for item in order.items:
+                self._add(item.bolid_id, item.quantity)
+
+    def add_orders(self, orders: Iterable[PurchaseOrder]) -> None:
+        for order in orders:
+            self.add_order(order)
+
+    def _add(self, bolid_id: str, quantity: int) -> None:
+        seq = self._first_seen.setdefault(bolid_id, len(self._first_seen))
+        count = self._counts.get(bolid_id, 0) + quantity
+        self._counts[bolid_id] = count
+        heapq.heappush(self._heap, (-count, seq, bolid_id))
+        if len(self._heap) > 2 * len(self._counts) + 64:
+            self._compact()
+
+    def _compact(self) -> None:
+        self._heap = [(-count, self._first_seen[bid], bid) for bid, count in self._counts.items()]
+        heapq.heapify(self._heap)
+
+    def count(self, bolid_id: str) -> int:
+        return self._counts.get(bolid_id, 0)
+
+    def top_k_ids(self, k: int) -> Tuple[str, ...]:
+        """ID k самых продаваемых болидов (включая отсутствующие в каталоге)."""
+        with self._lock:
+            return self._top_k_ids(k)
+
+    def _top_k_ids(self, k: int) -> Tuple[str, ...]:
+        result: List[str] = []
+        seen = set()
+        taken: List[Tuple[int, int, str]] = []
+        while self._heap and len(result) < k:
+            entry = heapq.heappop(self._heap)
+            neg_count, _, bolid_id = entry
+            if self._counts[bolid_id] != -neg_count or bolid_id in seen:
+                continue
+            result.append(bolid_id)
+            seen.add(bolid_id)
+            taken.append(entry)
+        for entry in taken:
+            heapq.heappush(self._heap, entry)
+        return tuple(result)
+
+    def top_bolids(self, k: int = 10) -> Tuple[Bolid, ...]:
+        return tuple(self._bolid_map[bid] for bid in self.top_k_ids(k) if bid in self._bolid_map)
@@ -0,0 +1,279 @@
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+from itertools import count
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from core.domain import CarEra, Bolid, Collector, PurchaseOrder, GarageItem
+from core.loader import iter_seed_records
+
+# Формат снапшота (все числа little-endian):
+#   заголовок  - MAGIC, mtime_ns и размер исходного JSON, его blake2b, число колонок;
+#   каталог    - для каждой колонки: имя, код типа array, смещение, число элементов;
+#   колонки    - сырые массивы, выровненные на 8 байт.
+# Строки хранятся один раз в таблице strings.offsets/strings.data, колонки ссылаются
+# на них номерами (-1 означает None). Списки (теги, позиции заказа) - плоская колонка
+# значений плюс колонка смещений длины n + 1.
+MAGIC = b'F1SNAP01'
+_HEADER = struct.Struct('<8sqq16sI')
+_MTIME = struct.Struct('<q')  # mtime_ns в заголовке сразу после MAGIC
+_ENTRY = struct.Struct('<32s1sxxxxxxxQQ')
+_ALIGN = 8
+
+SNAPSHOT_SUFFIX = '.snap'
+_snapshot_ids = count()
+
+# Поля разделов и способ их хранения: str - номер строки, int - int64,
+# tags - список строк, items - позиции заказа (bolid_id, quantity).
+SCHEMA: Dict[str, Tuple[type, Tuple[Tuple[str, str], ...]]] = {
+    'eras': (CarEra, (('id', 'str'), ('name', 'str'), ('parent', 'str'))),
+    'bolids': (Bolid, (('id', 'str'), ('name', 'str'), ('team', 'str'), ('year', 'int'), ('price', 'int'),
+                       ('era_id', 'str'), ('tags', 'tags'), ('quantity_available', 'int'), ('image_url', 'str'))),
+    'collectors': (Collector, (('id', 'str'), ('name', 'str'), ('tier', 'str'))),
+    'purchase_orders': (PurchaseOrder, (('id', 'str'), ('collector_id', 'str'), ('items', 'items'),
+                                        ('total_price', 'int'), ('timestamp', 'str'))),
+}
+
+
+class SourceStamp(NamedTuple):
+    """Отметка исходного JSON, по которой проверяется актуальность снапшота."""
+    mtime_ns: int
+    size: int
+    digest: bytes
+
+
+def _file_digest(path: str) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.digest()
+
+
+def source_stamp(path: str, with_digest: bool = True) -> SourceStamp:
+    st = os.stat(path)
+    return SourceStamp(st.st_mtime_ns, st.st_size, _file_digest(path) if with_digest else b'')
+
+
+def write_snapshot(seed_path: str, snapshot_path: Optional[str] = None) -> str:
+    """Строит бинарный снапшот из seed.json. Запись атомарная (через временный файл)."""
+    snapshot_path = snapshot_path or seed_path + SNAPSHOT_SUFFIX
+    stamp = source_stamp(seed_path)
+    return write_records(iter_seed_records(seed_path), snapshot_path, stamp)
+
+
+def write_records(records: Iterable[Tuple[str, Dict[str, Any]]], snapshot_path: str,
+                  stamp: SourceStamp = SourceStamp(0, 0, bytes(16))) -> str:
+    """
+    Снапшот из произвольного потока (раздел, запись-словарь) в формате seed.json.
+    Разделы, которых нет в потоке, остаются пустыми.
+    """
+    strings: Dict[str, int] = {}
+
+    def intern(value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        return strings.setdefault(value, len(strings))
+
+    columns: Dict[str, array] = {}
+    for section, (_, fields) in SCHEMA.items():
+        for name, kind in fields:
+            if kind == 'str':
+                columns[f'{section}.{name}'] = array('i')
+            elif kind == 'int':
+                columns[f'{section}.{name}'] = array('q')
+            elif kind == 'tags':
+                columns[f'{section}.{name}'] = array('i')
+                columns[f'{section}.{name}.offsets'] = array('q', [0])
+            elif kind == 'items':
+                columns[f'{section}.{name}.bolid_id'] = array('i')
+                columns[f'{section}.{name}.quantity'] = array('q')
+                columns[f'{section}.{name}.offsets'] = array('q', [0])
+
+    for section, record in records:
+        factory, fields = SCHEMA[section]
+        for name, kind in fields:
+            key = f'{section}.{name}'
+            value = record.get(name, factory._field_defaults.get(name))
+            if kind == 'str':
+                columns[key].append(intern(value))
+            elif kind == 'int':
+                columns[key].append(value)
+            elif kind == 'tags':
+                columns[key].extend(intern(tag) for tag in value)
+                columns[key + '.offsets'].append(len(columns[key]))
+            elif kind == 'items':
+                for item in value:
+                    columns[key + '.bolid_id'].append(intern(item['bolid_id']))
+                    columns[key + '.quantity'].append(item['quantity'])
+                columns[key + '.offsets'].append(len(columns[key + '.quantity']))
+
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = array('q', [0])
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    columns['strings.offsets'] = offsets
+    columns['strings.data'] = array('B', b''.join(encoded))
+
+    position = _HEADER.size + _ENTRY.size * len(columns)
+    entries = []
+    for name, values in columns.items():
+        position += -position % _ALIGN
+        entries.append((name, values, position))
+        position += len(values) * values.itemsize
+
+    tmp_path = snapshot_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, stamp.mtime_ns, stamp.size, stamp.digest, len(columns)))
+        for name, values, offset in entries:
+            f.write(_ENTRY.pack(name.encode('ascii'), values.typecode.encode('ascii'), offset, len(values)))
+        for _, values, offset in entries:
+            f.write(b'\0' * (offset - f.tell()))
+            values.tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, snapshot_path)
+    return snapshot_path
+
+
+class RecordView(Sequence):
+    """
+    Ленивая последовательность доменных объектов поверх колонок снапшота.
+    Объект собирается только при обращении к нему.
+    """
+
+    def __init__(self, snapshot: 'Snapshot', section: str):
+        self._snapshot = snapshot
+        self._section = section
+        self._factory, self._fields = SCHEMA[section]
+        self._length = len(snapshot.column(f'{section}.{self._fields[0][0]}'))
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return tuple(self[i] for i in range(*index.indices(self._length)))
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return self._factory(*(self._snapshot.field(self._section, name, kind, index) for name, kind in self._fields))
+
+    def cache_token(self) -> Tuple[int, str]:
+        # Снапшот неизменяем: версия данных - сам открытый снапшот и раздел.
+        return self._snapshot.uid, self._section
+
+    def __repr__(self) -> str:
+        return f"RecordView({self._section!r}, {self._snapshot.stamp.digest.hex()}, {self._length})"
+
+
+class Snapshot:
+    """Снапшот, отображенный в память: открытие стоит O(число колонок), а не O(размер каталога)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.uid = next(_snapshot_ids)
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+        self._columns: Dict[str, memoryview] = {}
+        try:
+            self._read_header()
+        except BaseException:
+            self.close()
+            raise
+        self._strings: Dict[int, str] = {}
+        self.eras = RecordView(self, 'eras')
+        self.bolids = RecordView(self, 'bolids')
+        self.collectors = RecordView(self, 'collectors')
+        self.purchase_orders = RecordView(self, 'purchase_orders')
+
+    def _read_header(self) -> None:
+        magic, mtime_ns, size, digest, count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not an F1 snapshot")
+        self.stamp = SourceStamp(mtime_ns, size, digest)
+        for i in range(count):
+            name, typecode, offset, length = _ENTRY.unpack_from(self._mm, _HEADER.size + i * _ENTRY.size)
+            typecode = typecode.decode('ascii')
+            stop = offset + length * array(typecode).itemsize
+            # Оборванный или испорченный файл: колонка не должна выходить за его конец
+            if stop > len(self._mm):
+                raise ValueError(f"{self.path} is truncated")
+            self._columns[name.rstrip(b'\0').decode('ascii')] = self._view[offset:stop].cast(typecode)
+
+    def column(self, name: str) -> memoryview:
+        return self._columns[name]
+
+    def string(self, string_id: int) -> Optional[str]:
+        if string_id < 0:
+            return None
+        value = self._strings.get(string_id)
+        if value is None:
+            offsets = self._columns['strings.offsets']
+            value = bytes(self._columns['strings.data'][offsets[string_id]:offsets[string_id + 1]]).decode('utf-8')
+            self._strings[string_id] = value
+        return value
+
+    def field(self, section: str, name: str, kind: str, index: int) -> Any:
+        key = f'{section}.{name}'
+        if kind == 'str':
+            return self.string(self._columns[key][index])
+        if kind == 'int':
+            return self._columns[key][index]
+        offsets = self._columns[key + '.offsets']
+        start, stop = offsets[index], offsets[index + 1]
+        if kind == 'tags':
+            values = self._columns[key]
+            return [self.string(values[i]) for i in range(start, stop)]
+        bolid_ids = self._columns[key + '.bolid_id']
+        quantities = self._columns[key + '.quantity']
+        return [GarageItem(self.string(bolid_ids[i]), quantities[i]) for i in range(start, stop)]
+
+    def is_fresh(self, seed_path: str) -> bool:
+        """Сверяет mtime и размер исходника; при расхождении - его хеш."""
+        current = source_stamp(seed_path, with_digest=False)
+        if (current.mtime_ns, current.size) == (self.stamp.mtime_ns, self.stamp.size):
+            return True
+        return current.size == self.stamp.size and _file_digest(seed_path) == self.stamp.digest
+
+    def restamp(self, mtime_ns: int) -> None:
+        """Переписывает mtime исходника в заголовке, когда содержимое совпало по хешу."""
+        with open(self.path, 'r+b') as f:
+            f.seek(len(MAGIC))
+            f.write(_MTIME.pack(mtime_ns))
+        self.stamp = self.stamp._replace(mtime_ns=mtime_ns)
+
+    def close(self) -> None:
+        for column in self._columns.values():
+            column.release()
+        self._columns.clear()
+        self._view.release()
+        self._mm.close()
+
+
+def load_snapshot(seed_path: str, snapshot_path: Optional[str] = None) -> Snapshot:
+    """Открывает снапшот для seed.json, пересобирая его, если он отсутствует или устарел."""
+    snapshot_path = snapshot_path or seed_path + SNAPSHOT_SUFFIX
+    if os.path.exists(snapshot_path):
+        try:
+            snapshot = Snapshot(snapshot_path)
+        except (ValueError, struct.error):
+            snapshot = None
+        if snapshot is not None and snapshot.is_fresh(seed_path):
+            mtime_ns = os.stat(seed_path).st_mtime_ns
+            if mtime_ns != snapshot.stamp.mtime_ns:
+                # Иначе хеш всего исходника считался бы заново при каждом открытии
+                try:
+                    snapshot.restamp(mtime_ns)
+                except OSError:
+                    pass
+            return snapshot
+        if snapshot is not None:
+            snapshot.close()
+    write_snapshot(seed_path, snapshot_path)
+    return Snapshot(snapshot_path)
@@ -0,0 +1,407 @@
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from core.compose import chunked
+from core.domain import Bolid, CarEra, Collector, Garage, GarageItem, PurchaseOrder
+from core.loader import iter_seed_records
+from core.predicates import And, EraIn, HasTag, Not, Or, Predicate, PriceBetween, TagsMatch, TeamIs
+from core.snapshot import source_stamp
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+CREATE TABLE IF NOT EXISTS eras (
+    id TEXT PRIMARY KEY, name TEXT NOT NULL, parent TEXT);
+CREATE INDEX IF NOT EXISTS eras_parent ON eras (parent);
+CREATE TABLE IF NOT EXISTS bolids (
+    id TEXT PRIMARY KEY, name TEXT NOT NULL, team TEXT NOT NULL, year INTEGER NOT NULL,
+    price INTEGER NOT NULL, era_id TEXT NOT NULL, quantity_available INTEGER NOT NULL,
+    image_url TEXT NOT NULL DEFAULT '');
+CREATE INDEX IF NOT EXISTS bolids_team ON bolids (team);
+CREATE INDEX IF NOT EXISTS bolids_era ON bolids (era_id);
+CREATE INDEX IF NOT EXISTS bolids_price ON bolids (price);
+CREATE TABLE IF NOT EXISTS bolid_tags (
+    bolid_id TEXT NOT NULL, position INTEGER NOT NULL, tag TEXT NOT NULL,
+    PRIMARY KEY (bolid_id, position));
+CREATE INDEX IF NOT EXISTS bolid_tags_tag ON bolid_tags (tag, bolid_id);
+CREATE TABLE IF NOT EXISTS collectors (
+    id TEXT PRIMARY KEY, name TEXT NOT NULL, tier TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS purchase_orders (
+    id TEXT NOT NULL, collector_id TEXT NOT NULL, total_price INTEGER NOT NULL, timestamp TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS orders_collector ON purchase_orders (collector_id);
+CREATE INDEX IF NOT EXISTS orders_timestamp ON purchase_orders (timestamp);
+CREATE TABLE IF NOT EXISTS order_items (
+    order_rowid INTEGER NOT NULL, position INTEGER NOT NULL, bolid_id TEXT NOT NULL, quantity INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS order_items_order ON order_items (order_rowid);
+CREATE INDEX IF NOT EXISTS order_items_bolid ON order_items (bolid_id);
+"""
+
+_BOLID_COLUMNS = "b.id, b.name, b.team, b.year, b.price, b.era_id, b.quantity_available, b.image_url"
+_BATCH = 1000  # строк на executemany при импорте и на fetchmany при потоковом чтении
+
+
+def _tag_sql(node: Tuple[Any, ...]) -> Tuple[str, List[Any]]:
+    """Узел запроса по тегам (core.tags) -> условие SQL над строкой bolids b."""
+    kind = node[0]
+    if kind == 'tag':
+        return "EXISTS (SELECT 1 FROM bolid_tags t WHERE t.tag = ? AND t.bolid_id = b.id)", [node[1]]
+    if kind == 'not':
+        sql, params = _tag_sql(node[1])
+        return f"NOT {sql}", params
+    parts = [_tag_sql(child) for child in node[1:]]
+    joiner = " AND " if kind == 'and' else " OR "
+    return "(" + joiner.join(sql for sql, _ in parts) + ")", [p for _, params in parts for p in params]
+
+
+def predicate_sql(predicate: Predicate) -> Optional[Tuple[str, List[Any]]]:
+    """
+    Переводит дерево условий в WHERE над bolids b; None, если в нем есть
+    условие, которое нельзя выразить в SQL (Where с произвольной функцией).
+    """
+    if isinstance(predicate, EraIn):
+        if not predicate.era_ids:
+            return "0", []
+        # Один параметр-массив JSON вместо "?" на каждую эру: поддерево эр может быть любым
+        return "b.era_id IN (SELECT value FROM json_each(?))", [json.dumps(sorted(predicate.era_ids))]
+    if isinstance(predicate, TeamIs):
+        return "b.team = ?", [predicate.team]
+    if isinstance(predicate, PriceBetween):
+        return "b.price BETWEEN ? AND ?", [predicate.min_price, predicate.max_price]
+    if isinstance(predicate, HasTag):
+        return _tag_sql(('tag', predicate.tag))
+    if isinstance(predicate, TagsMatch):
+        return _tag_sql(predicate.node)
+    if isinstance(predicate, Not):
+        inner = predicate_sql(predicate.part)
+        return None if inner is None else (f"NOT ({inner[0]})", inner[1])
+    if isinstance(predicate, (And, Or)):
+        parts = [predicate_sql(part) for part in predicate.parts]
+        if any(part is None for part in parts):
+            return None
+        joiner = " AND " if isinstance(predicate, And) else " OR "
+        return "(" + joiner.join(sql for sql, _ in parts) + ")", [p for _, params in parts for p in params]
+    return None
+
+
+def _order_row(order: PurchaseOrder) -> Dict[str, Any]:
+    return {'id': order.id, 'collector_id': order.collector_id, 'total_price': order.total_price,
+            'timestamp': order.timestamp, 'items': [item._asdict() for item in order.items]}
+
+
+class SQLiteStore:
+    """
+    Данные магазина в локальной базе SQLite - альтернатива seed.json.
+    Через core.loader база читается тем же API, что и JSON (путь с расширением
+    .sqlite/.db), а фильтры каталога, гараж и аналитика выполняются запросами
+    с индексами по команде, эре, цене, коллекционеру, времени заказа и родителю эры.
+    Одно соединение на хранилище, общее для потоков: обращения к нему идут под блокировкой,
+    транзакция держит ее целиком, потоковое чтение берет ее на каждую пачку строк.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _query(self, sql: str, params: Sequence[Any] = ()) -> List[Tuple[Any, ...]]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _stream(self, sql: str, params: Sequence[Any] = ()) -> Iterator[Tuple[Any, ...]]:
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(_BATCH)
+            if not rows:
+                return
+            yield from rows
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # --- Загрузка ---
+
+    def import_records(self, records: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """Заменяет содержимое базы записями (раздел, словарь) в формате seed.json."""
+        with self._transaction() as conn:
+            self._replace_all(conn, records)
+
+    @classmethod
+    def _replace_all(cls, conn: sqlite3.Connection, records: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        # Записи вставляются потоком, пачками по _BATCH: в памяти не копится весь раздел.
+        for table in ('eras', 'bolids', 'bolid_tags', 'collectors', 'purchase_orders', 'order_items'):
+            conn.execute(f"DELETE FROM {table}")
+        # Заказы журнала удалены вместе с остальными - sync_journal перенесет их заново
+        conn.execute("DELETE FROM meta WHERE key = 'journal_applied'")
+        for section, group in groupby(records, key=itemgetter(0)):
+            rows = map(itemgetter(1), group)
+            if section == 'eras':
+                conn.executemany("INSERT INTO eras VALUES (?, ?, ?)",
+                                 ((r['id'], r['name'], r.get('parent')) for r in rows))
+            elif section == 'bolids':
+                cls._insert_bolids(conn, rows)
+            elif section == 'collectors':
+                conn.executemany("INSERT INTO collectors VALUES (?, ?, ?)",
+                                 ((r['id'], r['name'], r['tier']) for r in rows))
+            elif section == 'purchase_orders':
+                cls._insert_orders(conn, rows)
+
+    @staticmethod
+    def _insert_bolids(conn: sqlite3.Connection, rows: Iterable[Dict[str, Any]]) -> None:
+        for batch in chunked(_BATCH)(rows):
+            conn.executemany(
+                "INSERT INTO bolids VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                ((r['id'], r['name'], r['team'], r['year'], r['price'], r['era_id'], r['quantity_available'],
+                  r.get('image_url', "")) for r in batch))
+            conn.executemany("INSERT INTO bolid_tags VALUES (?, ?, ?)",
+                             ((r['id'], i, tag) for r in batch for i, tag in enumerate(r['tags'])))
+
+    @staticmethod
+    def _insert_orders(conn: sqlite3.Connection, rows: Iterable[Dict[str, Any]]) -> int:
+        """Дописывает заказы; возвращает их число."""
+        # id заказа не обязан быть уникальным (seed и журнал), позиции ссылаются на rowid.
+        first = conn.execute("SELECT COALESCE(MAX(rowid), 0) + 1 FROM purchase_orders").fetchone()[0]
+        stop = first
+        for batch in chunked(_BATCH)(enumerate(rows, first)):
+            stop = batch[-1][0] + 1
+            conn.executemany("INSERT INTO purchase_orders (rowid, id, collector_id, total_price, timestamp) "
+                             "VALUES (?, ?, ?, ?, ?)",
+                             ((rowid, r['id'], r['collector_id'], r['total_price'], r['timestamp'])
+                              for rowid, r in batch))
+            conn.executemany(
+                "INSERT INTO order_items VALUES (?, ?, ?, ?)",
+                ((rowid, i, item['bolid_id'], item['quantity'])
+                 for rowid, r in batch for i, item in enumerate(r['items'])))
+        return stop - first
+
+    def sync_from_seed(self, seed_path: str) -> bool:
+        """Переимпортирует seed.json, если он изменился с прошлого импорта; True - если импорт был."""
+        digest = source_stamp(seed_path).digest.hex()
+        # Проверка, импорт и отметка - одна транзакция: сбой не оставит отметку без данных и наоборот
+        with self._transaction() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'seed_digest'").fetchone()
+            if row is not None and row[0] == digest:
+                return False
+            self._replace_all(conn, iter_seed_records(seed_path))
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('seed_digest', ?)", (digest,))
+        return True
+
+    def add_orders(self, orders: Iterable[PurchaseOrder]) -> None:
+        with self._transaction() as conn:
+            self._insert_orders(conn, map(_order_row, orders))
+
+    def sync_journal(self, journal: Any) -> int:
+        """
+        Дописывает заказы журнала (core.journal.OrderJournal), которых еще нет в базе,
+        в том числе оформленные в режиме json. Число перенесенных заказов хранится в meta
+        в той же транзакции; возвращает, сколько добавлено сейчас.
+        """
+        with self._transaction() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'journal_applied'").fetchone()
+            applied = row[0] if row is not None else 0
+            added = self._insert_orders(conn, map(_order_row, journal.replay(applied)))
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('journal_applied', ?)", (applied + added,))
+        return added
+
+    def add_order(self, order: PurchaseOrder) -> None:
+        self.add_orders((order,))
+
+    # --- Чтение в формате seed.json (для core.loader) ---
+
+    def iter_records(self, sections: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Пары (раздел, запись) в порядке вставки - как iter_seed_records для seed.json."""
+        wanted = set(('eras', 'bolids', 'collectors', 'purchase_orders') if sections is None else sections)
+        if 'eras' in wanted:
+            for id, name, parent in self._stream("SELECT id, name, parent FROM eras ORDER BY rowid"):
+                yield 'eras', {'id': id, 'name': name, 'parent': parent}
+        if 'bolids' in wanted:
+            for bolid in self._bolids("SELECT " + _BOLID_COLUMNS + " FROM bolids b ORDER BY b.rowid", []):
+                yield 'bolids', bolid._asdict()
+        if 'collectors' in wanted:
+            for id, name, tier in self._stream("SELECT id, name, tier FROM collectors ORDER BY rowid"):
+                yield 'collectors', {'id': id, 'name': name, 'tier': tier}
+        if 'purchase_orders' in wanted:
+            for order in self.orders():
+                yield 'purchase_orders', {**order._asdict(), 'items': [item._asdict() for item in order.items]}
+
+    def _bolids(self, sql: str, params: Sequence[Any]) -> List[Bolid]:
+        rows = self._query(sql, params)
+        tags: Dict[str, List[str]] = {}
+        ids = [row[0] for row in rows]
+        # Теги одним запросом на пачку, а не по запросу на болид.
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            for bolid_id, tag in self._query(
+                    f"SELECT bolid_id, tag FROM bolid_tags WHERE bolid_id IN ({', '.join('?' * len(batch))}) "
+                    "ORDER BY bolid_id, position", batch):
+                tags.setdefault(bolid_id, []).append(tag)
+        return [Bolid(id, name, team, year, price, era_id, tags.get(id, []), quantity, image_url)
+                for id, name, team, year, price, era_id, quantity, image_url in rows]
+
+    def orders(self) -> Iterator[PurchaseOrder]:
+        items = groupby(self._stream(
+            "SELECT order_rowid, bolid_id, quantity FROM order_items ORDER BY order_rowid, position"),
+            key=itemgetter(0))
+        pending = next(items, None)
+        for rowid, id, collector_id, total_price, timestamp in self._stream(
+                "SELECT rowid, id, collector_id, total_price, timestamp FROM purchase_orders ORDER BY rowid"):
+            order_items = []
+            if pending is not None and pending[0] == rowid:
+                order_items = [GarageItem(bolid_id, quantity) for _, bolid_id, quantity in pending[1]]
+                pending = next(items, None)
+            yield PurchaseOrder(id, collector_id, order_items, total_price, timestamp)
+
+    # --- Каталог ---
+
+    def eras(self) -> Tuple[CarEra, ...]:
+        return tuple(CarEra(*row) for row in self._query("SELECT id, name, parent FROM eras ORDER BY rowid"))
+
+    def collectors(self) -> Tuple[Collector, ...]:
+        return tuple(Collector(*row) for row in
+                     self._query("SELECT id, name, tier FROM collectors ORDER BY rowid"))
+
+    def era_subtree(self, era_id: str) -> Tuple[str, ...]:
+        """Эра и все ее потомки - рекурсивным запросом по индексу eras(parent); циклы не зацикливают."""
+        rows = self._query(
+            "WITH RECURSIVE subtree(id) AS (SELECT ? UNION SELECT e.id FROM eras e JOIN subtree s ON e.parent = s.id) "
+            "SELECT id FROM subtree", (era_id,))
+        return tuple(row[0] for row in rows)
+
+    def teams(self) -> Tuple[str, ...]:
+        return tuple(row[0] for row in self._query("SELECT DISTINCT team FROM bolids ORDER BY team"))
+
+    def count(self, table: str) -> int:
+        if table not in ('eras', 'bolids', 'collectors', 'purchase_orders'):
+            raise ValueError(f"Unknown table: {table!r}")
+        return self._query(f"SELECT COUNT(*) FROM {table}")[0][0]
+
+    def _where(self, predicate: Predicate) -> Tuple[str, List[Any], List[Predicate]]:
+        parts = predicate.parts if isinstance(predicate, And) else (predicate,)
+        clauses, params, residual = [], [], []
+        for part in parts:
+            compiled = predicate_sql(part)
+            if compiled is None:
+                residual.append(part)
+            else:
+                clauses.append(compiled[0])
+                params.extend(compiled[1])
+        return " AND ".join(clauses) or "1", params, residual
+
+    def select_bolids(self, predicate: Predicate) -> Tuple[Bolid, ...]:
+        """
+        То же, что predicates.select(predicate, catalog): условия, выразимые в SQL,
+        выполняет база, остальные проверяются построчно над ее результатом.
+        """
+        where, params, residual = self._where(predicate)
+        bolids = self._bolids(f"SELECT {_BOLID_COLUMNS} FROM bolids b WHERE {where} ORDER BY b.rowid", params)
+        return tuple(b for b in bolids if all(check(b) for check in residual))
+
+    def explain(self, predicate: Predicate) -> str:
+        where, params, residual = self._where(predicate)
+        plan = self._query(
+            f"EXPLAIN QUERY PLAN SELECT {_BOLID_COLUMNS} FROM bolids b WHERE {where} ORDER BY b.rowid", params)
+        lines = [f"SQL WHERE {where}"] + [f"  {row[-1]}" for row in plan]
+        lines += [f"  scan   {check.describe()}" for check in residual]
+        return "\n".join(lines)
+
+    def get_bolids(self, bolid_ids: Iterable[str]) -> Dict[str, Bolid]:
+        ids = list(dict.fromkeys(bolid_ids))
+        result: Dict[str, Bolid] = {}
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            for bolid in self._bolids(
+                    f"SELECT {_BOLID_COLUMNS} FROM bolids b WHERE b.id IN ({', '.join('?' * len(batch))})", batch):
+                result[bolid.id] = bolid
+        return result
+
+    def stock_table(self) -> Dict[str, int]:
+        return dict(self._query("SELECT id, quantity_available FROM bolids ORDER BY rowid"))
+
+    # --- Гараж ---
+
+    def garage_total(self, garage: Garage) -> int:
+        """Стоимость гаража по ценам каталога; неизвестные болиды не учитываются."""
+        if not garage.items:
+            return 0
+        values = ", ".join("(?, ?)" for _ in garage.items)
+        params = [value for item in garage.items for value in item]
+        row = self._query(
+            f"WITH g(bolid_id, quantity) AS (VALUES {values}) "
+            "SELECT COALESCE(SUM(b.price * g.quantity), 0) FROM g JOIN bolids b ON b.id = g.bolid_id", params
+        )[0]
+        return row[0]
+
+    # --- Аналитика ---
+
+    def _order_filter(self, start: Optional[str], end: Optional[str],
+                      collector_id: Optional[str]) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("o.timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("o.timestamp < ?")
+            params.append(end)
+        if collector_id is not None:
+            clauses.append("o.collector_id = ?")
+            params.append(collector_id)
+        return " AND ".join(clauses) or "1", params
+
+    def order_stats(self, start: Optional[str] = None, end: Optional[str] = None,
+                    collector_id: Optional[str] = None) -> Tuple[int, int]:
+        """(число заказов, выручка) за [start, end); границы - строки ISO, как timestamp."""
+        where, params = self._order_filter(start, end, collector_id)
+        row = self._query(
+            f"SELECT COUNT(*), COALESCE(SUM(o.total_price), 0) FROM purchase_orders o WHERE {where}", params
+        )[0]
+        return row[0], row[1]
+
+    def revenue_by_month(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, int]:
+        where, params = self._order_filter(start, end, None)
+        return dict(self._query(
+            f"SELECT substr(o.timestamp, 1, 7) AS month, SUM(o.total_price) FROM purchase_orders o "
+            f"WHERE {where} GROUP BY month ORDER BY month", params))
+
+    def revenue_by_team(self) -> Dict[str, int]:
+        """
+        Выручка заказов, разделенная между командами пропорционально стоимости позиций
+        (как в analytics.SalesCube, но доля каждого заказа округляется вниз).
+        """
+        return dict(self._query(
+            "WITH lines AS (SELECT i.order_rowid, b.team, SUM(b.price * i.quantity) AS value "
+            "FROM order_items i JOIN bolids b ON b.id = i.bolid_id GROUP BY i.order_rowid, b.team), "
+            "totals AS (SELECT order_rowid, SUM(value) AS value FROM lines GROUP BY order_rowid) "
+            "SELECT l.team, SUM(o.total_price * l.value / t.value) AS revenue FROM lines l "
+            "JOIN totals t ON t.order_rowid = l.order_rowid JOIN purchase_orders o ON o.rowid = l.order_rowid "
+            "WHERE t.value > 0 GROUP BY l.team ORDER BY revenue DESC, l.team"))
+
+    def top_selling_bolids(self, k: int = 10) -> Tuple[Bolid, ...]:
+        """
+        То же, что transforms.top_selling_bolids: ничьи разрешаются порядком первой
+        продажи, болиды не из каталога занимают место в топе, но не выводятся.
+        """
+        rows = self._query(
+            "SELECT bolid_id, SUM(quantity) AS sold FROM order_items "
+            "GROUP BY bolid_id ORDER BY sold DESC, MIN(rowid) LIMIT ?", (k,)
+        )
+        bolids = self.get_bolids(row[0] for row in rows)
+        return tuple(bolids[row[0]] for row in rows if row[0] in bolids)
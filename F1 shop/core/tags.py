@@ -0,0 +1,150 @@
+import re
+from typing import AbstractSet, Dict, Iterable, Iterator, List, Tuple, Union
+
+from core import bitset
+
+# Узел разобранного запроса: ('tag', имя) | ('not', узел) | ('and', узлы...) | ('or', узлы...)
+TagQuery = Tuple[Union[str, 'TagQuery'], ...]
+
+_TOKEN = re.compile(r'\s*(?:(?P<op>[&|~()])|"(?P<quoted>[^"]*)"|(?P<word>[^\s&|~()"]+))')
+_WORD_OPS = {'and': '&', 'or': '|', 'not': '~'}
+
+
+class TagIndex:
+    """
+    Инвертированный индекс тегов: для каждого тега - битовая маска строк.
+    Булевы запросы по тегам считаются операциями над масками,
+    не трогая строки, которые в результат не попадают.
+    """
+
+    def __init__(self, tag_lists: Iterable[Iterable[str]]):
+        self.tags: List[str] = []
+        self._codes: Dict[str, int] = {}
+        # Маска тегов каждой строки (бит - код тега).
+        self.row_bits: List[int] = []
+        positions: List[List[int]] = []
+        for row, tags in enumerate(tag_lists):
+            bits = 0
+            for tag in tags:
+                code = self._codes.get(tag)
+                if code is None:
+                    code = self._codes[tag] = len(self.tags)
+                    self.tags.append(tag)
+                    positions.append([])
+                if not bits >> code & 1:
+                    positions[code].append(row)
+                bits |= 1 << code
+            self.row_bits.append(bits)
+        self.size = len(self.row_bits)
+        self._rows = [bitset.from_positions(rows) for rows in positions]
+
+    def mask(self, tag: str) -> int:
+        code = self._codes.get(tag)
+        return 0 if code is None else self._rows[code]
+
+    def evaluate(self, query: Union[str, TagQuery]) -> int:
+        """Маска строк, удовлетворяющих запросу вида 'V10 & Чемпионский & ~Гибрид'."""
+        node = parse_tag_query(query) if isinstance(query, str) else query
+        kind = node[0]
+        if kind == 'tag':
+            return self.mask(node[1])
+        if kind == 'not':
+            return bitset.full(self.size) & ~self.evaluate(node[1])
+        masks = (self.evaluate(child) for child in node[1:])
+        if kind == 'and':
+            result = bitset.full(self.size)
+            for mask in masks:
+                result &= mask
+                if not result:
+                    break
+            return result
+        result = 0
+        for mask in masks:
+            result |= mask
+        return result
+
+    def positions(self, query: Union[str, TagQuery]) -> Iterator[int]:
+        return bitset.iter_bits(self.evaluate(query))
+
+    def count(self, query: Union[str, TagQuery]) -> int:
+        return bitset.count(self.evaluate(query))
+
+
+def matches(query: Union[str, TagQuery], tags: AbstractSet[str]) -> bool:
+    """Построчная проверка того же запроса для одного набора тегов."""
+    node = parse_tag_query(query) if isinstance(query, str) else query
+    kind = node[0]
+    if kind == 'tag':
+        return node[1] in tags
+    if kind == 'not':
+        return not matches(node[1], tags)
+    if kind == 'and':
+        return all(matches(child, tags) for child in node[1:])
+    return any(matches(child, tags) for child in node[1:])
+
+
+def parse_tag_query(text: str) -> TagQuery:
+    """
+    Разбирает запрос по тегам. Операторы: & (and), | (or), ~ (not), скобки;
+    теги с пробелами берутся в двойные кавычки.
+    """
+    tokens = _tokenize(text)
+    node, pos = _parse_or(tokens, 0)
+    if pos != len(tokens):
+        raise ValueError(f"Unexpected {tokens[pos][1]!r} in tag query {text!r}")
+    return node
+
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if not match:
+            raise ValueError(f"Cannot parse tag query {text!r} at position {pos}")
+        pos = match.end()
+        if match.group('op'):
+            tokens.append(('op', match.group('op')))
+        elif match.group('quoted') is not None:
+            tokens.append(('tag', match.group('quoted')))
+        elif match.group('word').lower() in _WORD_OPS:
+            tokens.append(('op', _WORD_OPS[match.group('word').lower()]))
+        else:
+            tokens.append(('tag', match.group('word')))
+    return tokens
+
+
+def _parse_or(tokens: List[Tuple[str, str]], pos: int) -> Tuple[TagQuery, int]:
+    node, pos = _parse_and(tokens, pos)
+    children = [node]
+    while pos < len(tokens) and tokens[pos] == ('op', '|'):
+        node, pos = _parse_and(tokens, pos + 1)
+        children.append(node)
+    return (children[0] if len(children) == 1 else ('or', *children)), pos
+
+
+def _parse_and(tokens: List[Tuple[str, str]], pos: int) -> Tuple[TagQuery, int]:
+    node, pos = _parse_not(tokens, pos)
+    children = [node]
+    while pos < len(tokens) and tokens[pos] == ('op', '&'):
+        node, pos = _parse_not(tokens, pos + 1)
+        children.append(node)
+    return (children[0] if len(children) == 1 else ('and', *children)), pos
+
+
+def _parse_not(tokens: List[Tuple[str, str]], pos: int) -> Tuple[TagQuery, int]:
+    if pos >= len(tokens):
+        raise ValueError("Unexpected end of tag query")
+    kind, value = tokens[pos]
+    if (kind, value) == ('op', '~'):
+        node, pos = _parse_not(tokens, pos + 1)
+        return ('not', node), pos
+    if (kind, value) == ('op', '('):
+        node, pos = _parse_or(tokens, pos + 1)
+        if pos >= len(tokens) or tokens[pos] != ('op', ')'):
+            raise ValueError("Missing ')' in tag query")
+        return node, pos + 1
+    if kind == 'tag':
+        return ('tag', value), pos + 1
+    raise ValueError(f"Unexpected {value!r} in tag query")
@@ -1,41 +1,43 @@
-import json
-from functools import reduce, lru_cache
-from typing import Tuple, Callable
-import time
+from functools import reduce
+from typing import Dict, Iterable, Tuple
 import uuid
 
-from core.domain import CarEra, Bolid, Collector, PurchaseOrder, Garage, GarageItem
+from core.cache import fingerprint_cache
+from core.catalog import get_catalog
+from core.domain import CarEra, Bolid, Collector, PurchaseOrder, Garage
+from core.loader import SECTIONS, iter_seed
+from core.predicates import Predicate, EraIn, PriceBetween, HasTag, TagsMatch, TeamIs
 
 
 def load_seed_data(path: str) -> Tuple[
     Tuple[CarEra, ...], Tuple[Bolid, ...], Tuple[Collector, ...], Tuple[PurchaseOrder, ...]]:
-    with open(path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    sections = {name: [] for name in SECTIONS}
+    for section, obj in iter_seed(path):
+        sections[section].append(obj)
 
-    eras = tuple(CarEra(**e) for e in data.get('eras', []))
-    bolids = tuple(Bolid(**b) for b in data.get('bolids', []))
-    collectors = tuple(Collector(**c) for c in data.get('collectors', []))
-    orders = tuple(PurchaseOrder(**o) for o in data.get('purchase_orders', []))
+    eras = tuple(sections['eras'])
+    bolids = tuple(sections['bolids'])
+    collectors = tuple(sections['collectors'])
+    orders = tuple(sections['purchase_orders'])
 
     return eras, bolids, collectors, orders
 
 
 def add_to_garage(garage: Garage, bolid_id: str, quantity: int) -> Garage:
-    new_items = list(garage.items)
-    item_found = False
-    for i, item in enumerate(new_items):
-        if item.bolid_id == bolid_id:
-            new_items[i] = GarageItem(bolid_id, item.quantity + quantity)
-            item_found = True
-            break
-    if not item_found:
-        new_items.append(GarageItem(bolid_id, quantity))
-    return Garage(collector_id=garage.collector_id, items=new_items)
+    return garage.add(bolid_id, quantity)
+
+
+def remove_from_garage(garage: Garage, bolid_id: str) -> Garage:
+    return garage.remove(bolid_id)
+
+
+def update_garage_quantity(garage: Garage, bolid_id: str, quantity: int) -> Garage:
+    return garage.set_quantity(bolid_id, quantity)
 
 
 def finalize_purchase(garage: Garage, bolids: Tuple[Bolid, ...], timestamp: str) -> PurchaseOrder:
-    bolid_map = {b.id: b for b in bolids}
-    total_price = sum(bolid_map[item.bolid_id].price * item.quantity for item in garage.items)
+    catalog = get_catalog(bolids)
+    total_price = sum(catalog.price_of(item.bolid_id) * item.quantity for item in garage.items)
     return PurchaseOrder(
         id=str(uuid.uuid4()),
         collector_id=garage.collector_id,
@@ -51,31 +53,41 @@ def total_sales(orders: Tuple[PurchaseOrder, ...]) -> int:
     return reduce(lambda acc, order: acc + order.total_price, orders, 0)
 
 
-def by_era(era_id: str) -> Callable[[Bolid], bool]:
-    return lambda bolid: bolid.era_id == era_id
+def by_era(era_id: str) -> Predicate:
+    return EraIn((era_id,))
 
 
-def by_price_range(min_price: int, max_price: int) -> Callable[[Bolid], bool]:
-    return lambda bolid: min_price <= bolid.price <= max_price
+def by_price_range(min_price: int, max_price: int) -> Predicate:
+    return PriceBetween(min_price, max_price)
 
 
-def by_tag(tag: str) -> Callable[[Bolid], bool]:
-    return lambda bolid: tag in bolid.tags
+def by_tag(tag: str) -> Predicate:
+    return HasTag(tag)
 
 
-def by_team(team: str) -> Callable[[Bolid], bool]:
-    return lambda bolid: bolid.team == team
+def by_tags(query: str) -> Predicate:
+    """Булев запрос по тегам: by_tags('V10 & Чемпионский & ~Гибрид')."""
+    return TagsMatch(query)
 
 
-@lru_cache(maxsize=128)
-def top_selling_bolids(orders: Tuple[PurchaseOrder, ...], bolids: Tuple[Bolid, ...], k: int = 10) -> Tuple[Bolid, ...]:
-    time.sleep(2)
-    sales_count = {}
+def by_team(team: str) -> Predicate:
+    return TeamIs(team)
+
+
+def sales_counts(orders: Iterable[PurchaseOrder]) -> Dict[str, int]:
+    """Проданное количество по болидам, в порядке первого появления болида."""
+    sales_count: Dict[str, int] = {}
     for order in orders:
         for item in order.items:
             sales_count[item.bolid_id] = sales_count.get(item.bolid_id, 0) + item.quantity
+    return sales_count
+
+
+@fingerprint_cache(maxsize=128)
+def top_selling_bolids(orders: Tuple[PurchaseOrder, ...], bolids: Tuple[Bolid, ...], k: int = 10) -> Tuple[Bolid, ...]:
+    sales_count = sales_counts(orders)
 
     sorted_bolid_ids = sorted(sales_count.keys(), key=lambda bid: sales_count.get(bid, 0), reverse=True)[:k]
 
-    bolid_map = {b.id: b for b in bolids}
-    return tuple(bolid_map[bid] for bid in sorted_bolid_ids if bid in bolid_map)
\ No newline at end of file
+    catalog = get_catalog(bolids)
+    return tuple(catalog[bid] for bid in sorted_bolid_ids if bid in catalog)
\ No newline at end of file
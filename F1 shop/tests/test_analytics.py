@@ -0,0 +1,45 @@
+from datetime import date, datetime
+import pytest
+from core.analytics import SalesCube
+from core.domain import Bolid, Collector, GarageItem, PurchaseOrder
+
+
+@pytest.fixture
+def cube():
+    bolids = (
+        Bolid("bolid_1", "Ferrari F2004", "Ferrari", 2004, 300, "era_v10", [], 1),
+        Bolid("bolid_2", "Williams FW14B", "Williams", 1992, 100, "era_turbo", [], 1),
+    )
+    collectors = (Collector("coll_1", "Иван", "Paddock Club"), Collector("coll_2", "Анна", "Grandstand"))
+    orders = (
+        PurchaseOrder("order_1", "coll_1", [GarageItem("bolid_1", 1), GarageItem("bolid_2", 1)], 401,
+                      "2023-01-31T23:59:59"),
+        PurchaseOrder("order_2", "coll_2", [GarageItem("bolid_2", 2)], 200, "2023-02-01T00:00:00"),
+        PurchaseOrder("order_3", "coll_2", [], 50, "2023-03-15T10:30:00"),
+    )
+    return SalesCube(bolids, collectors, orders)
+
+
+def test_totals_match_orders(cube):
+    assert cube.total() == 651
+    assert cube.total("orders") == 3
+    assert cube.total("units") == 4
+    # 401 делится 300:100 - части целые и в сумме дают исходную выручку
+    assert cube.total(team="Ferrari") + cube.total(team="Williams") + cube.total(team=(None,)) == 651
+    assert cube.total(team="Ferrari") == 301
+
+
+def test_range_queries(cube):
+    assert cube.total(start=date(2023, 2, 1)) == 250
+    assert cube.total(start=datetime(2023, 1, 31, 23), end=datetime(2023, 2, 1, 1)) == 601
+    assert cube.total("orders", start=date(2023, 2, 1), tier="Grandstand") == 2
+    assert cube.total("units", end=date(2023, 2, 1), era="era_turbo") == 1
+    with pytest.raises(ValueError):
+        cube.total("orders", team="Ferrari")
+
+
+def test_incremental_update_and_series(cube):
+    cube.add_order(PurchaseOrder("order_4", "coll_1", [GarageItem("bolid_1", 1)], 300, "2023-02-10T12:00:00"))
+    assert cube.series("month") == {datetime(2023, 1, 1): 401, datetime(2023, 2, 1): 500, datetime(2023, 3, 1): 50}
+    assert cube.series("month", by="tier", start=date(2023, 2, 1), end=date(2023, 3, 1)) == {
+        datetime(2023, 2, 1): {"Grandstand": 200, "Paddock Club": 300}}
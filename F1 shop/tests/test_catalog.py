@@ -0,0 +1,72 @@
+import pytest
+from core.catalog import BolidCatalog, get_catalog
+from core.domain import Bolid
+from core.transforms import by_era, by_price_range, by_tag, by_team
+
+
+@pytest.fixture
+def bolids() -> tuple[Bolid, ...]:
+    return (
+        Bolid(id="b1", name="A", team="Ferrari", year=2000, price=100, era_id="e1", tags=["V10"], quantity_available=1),
+        Bolid(id="b2", name="B", team="Williams", year=2001, price=200, era_id="e2", tags=["Гибрид"], quantity_available=1),
+        Bolid(id="b3", name="C", team="Ferrari", year=2002, price=300, era_id="e1", tags=["V10", "Чемпионский"], quantity_available=1),
+        Bolid(id="b4", name="D", team="McLaren", year=2003, price=400, era_id="e3", tags=["Чемпионский"], quantity_available=1),
+        Bolid(id="b5", name="E", team="Ferrari", year=2004, price=250, era_id="e2", tags=[], quantity_available=1),
+    )
+
+
+def test_catalog_matches_lambda_filters(bolids):
+    catalog = BolidCatalog(bolids)
+    result = catalog.filter(era_ids={"e1", "e2"}, team="Ferrari", price=(150, 350))
+    expected = tuple(
+        b for b in bolids
+        if (by_era("e1")(b) or by_era("e2")(b)) and by_team("Ferrari")(b) and by_price_range(150, 350)(b)
+    )
+    assert result == expected
+    assert [b.id for b in result] == ["b3", "b5"]
+
+
+def test_catalog_tags_and_year(bolids):
+    catalog = BolidCatalog(bolids)
+    assert catalog.filter(tags=["V10", "Чемпионский"]) == tuple(
+        b for b in bolids if by_tag("V10")(b) and by_tag("Чемпионский")(b)
+    )
+    assert [b.id for b in catalog.filter(year=(2001, 2003))] == ["b2", "b3", "b4"]
+
+
+def test_catalog_unknown_values(bolids):
+    catalog = BolidCatalog(bolids)
+    assert catalog.filter(team="Jordan") == ()
+    assert catalog.filter() == bolids
+    assert BolidCatalog(()).filter(team="Ferrari") == ()
+
+
+def test_catalog_secondary_indexes(bolids):
+    catalog = BolidCatalog(bolids)
+    assert catalog["b3"].name == "C"
+    assert catalog.get("missing") is None
+    assert "b1" in catalog and "missing" not in catalog
+    assert catalog.price_of("b4") == 400
+    assert [b.id for b in catalog.with_team("Ferrari")] == ["b1", "b3", "b5"]
+    assert [b.id for b in catalog.with_era("e2")] == ["b2", "b5"]
+    assert [b.id for b in catalog.with_tag("Чемпионский")] == ["b3", "b4"]
+    # Диапазон цен отдается в порядке цены
+    assert [b.id for b in catalog.in_price_range(200, 300)] == ["b2", "b5", "b3"]
+
+
+def test_get_catalog_built_once_per_data_version(bolids):
+    assert get_catalog(bolids) is get_catalog(bolids)
+    assert get_catalog(bolids) is not get_catalog(bolids[:2])
+
+
+def test_get_catalog_skips_cache_for_lists(bolids):
+    get_catalog.cache_clear()
+    assert get_catalog(list(bolids)) is not get_catalog(list(bolids))
+    assert get_catalog.cache_info().currsize == 0
+
+
+def test_duplicate_ids_first_wins(bolids):
+    duplicate = bolids[1]._replace(id=bolids[0].id, quantity_available=99)
+    catalog = BolidCatalog(bolids + (duplicate,))
+    assert catalog[bolids[0].id] is bolids[0]
+    assert catalog.stock_table()[bolids[0].id] == bolids[0].quantity_available
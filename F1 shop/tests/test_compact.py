@@ -0,0 +1,42 @@
+from core.catalog import get_catalog
+from core.compact import CompactBolid, OrderTable
+from core.domain import Bolid, GarageItem, PurchaseOrder
+from core.transforms import sales_counts, top_selling_bolids, total_sales
+
+ORDERS = (
+    PurchaseOrder("order_1", "coll_1", [GarageItem("bolid_2", 1), GarageItem("bolid_1", 2)], 300, "2023-01-01"),
+    PurchaseOrder("order_2", "coll_2", [], 0, "2023-01-02"),
+    PurchaseOrder("order_3", "coll_1", [GarageItem("bolid_1", 1)], 100, "2023-01-03"),
+)
+
+
+def test_compact_bolid_roundtrip_and_shared_tags():
+    a = Bolid("bolid_1", "Ferrari F2004", "Ferrari", 2004, 100, "era_1", ["V10", "Чемпионский"], 1)
+    b = a._replace(id="bolid_2")
+    ca, cb = CompactBolid.from_bolid(a), CompactBolid.from_bolid(b)
+    assert ca.to_bolid() == a
+    assert ca.tags == ("V10", "Чемпионский") and ca.tags is cb.tags
+    assert get_catalog([ca, cb]).with_tag("V10") == (ca, cb)
+
+
+def test_order_table_is_attribute_compatible():
+    table = OrderTable(ORDERS)
+    assert len(table) == 3
+    assert [view.to_order() for view in table] == list(ORDERS)
+    assert table[-1].items == [GarageItem("bolid_1", 1)]
+    assert table[0].collector_id == "coll_1" and table[1].timestamp == "2023-01-02"
+    assert total_sales(table) == table.total_sales() == 400
+    assert list(table.sales_counts().items()) == list(sales_counts(table).items()) == [("bolid_2", 1), ("bolid_1", 3)]
+
+
+def test_order_table_cache_token_follows_appends():
+    table = OrderTable(ORDERS[:1])
+    bolids = (Bolid("bolid_1", "A", "Ferrari", 2004, 100, "era_1", [], 1),
+              Bolid("bolid_2", "B", "Ferrari", 2004, 100, "era_1", [], 1))
+    top_selling_bolids.cache_clear()
+    assert top_selling_bolids(table, bolids, 1) == bolids[:1]
+    assert top_selling_bolids(table, bolids, 1) == bolids[:1]
+    table.append(PurchaseOrder("order_4", "coll_2", [GarageItem("bolid_2", 5)], 500, "2023-01-04"))
+    assert top_selling_bolids(table, bolids, 1) == bolids[1:]
+    assert top_selling_bolids.cache_info().hits == 1
+    assert OrderTable(ORDERS).cache_token() != OrderTable(ORDERS).cache_token()
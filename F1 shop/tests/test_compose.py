@@ -0,0 +1,47 @@
+from itertools import count
+from core.compose import Pipeline, chunked, filtering, lazy_pipe, mapping, pipe, take, top_k
+
+
+def inc(x):
+    return x + 1
+
+
+def double(x):
+    return x * 2
+
+
+def test_pipe_applies_left_to_right():
+    assert pipe(inc, double)(3) == 8
+    assert pipe()(3) == 3
+
+
+def test_nested_pipes_are_flattened():
+    nested = pipe(pipe(inc, pipe(double)), inc)
+    assert isinstance(nested, Pipeline)
+    assert nested.funcs == (inc, double, inc)
+    assert nested(1) == 5
+
+
+def test_timed_pipe_counts_stages():
+    p = pipe(inc, double)
+    p(1)
+    assert [s.calls for s in p.stages] == [0, 0]
+    p.timed = True
+    for x in range(3):
+        p(x)
+    assert [(s.name, s.calls) for s in p.stages] == [("inc", 3), ("double", 3)]
+    assert all(s.seconds >= 0 for s in p.stages)
+    p.reset_stats()
+    assert [s.calls for s in p.stages] == [0, 0]
+
+
+def test_lazy_pipe_reads_only_what_it_needs():
+    # count() бесконечен - конвейер завершится, только если стадии ленивые
+    p = lazy_pipe(filtering(lambda x: x % 3 == 0), mapping(lambda x: x * x), take(5), chunked(2), list)
+    assert p(count()) == [(0, 9), (36, 81), (144,)]
+
+
+def test_top_k_matches_sorted():
+    values = [5, -3, 5, 8, 0, -8, 2]
+    assert lazy_pipe(top_k(3, key=abs))(values) == sorted(values, key=abs, reverse=True)[:3]
+    assert lazy_pipe(mapping(str), top_k(10))([1, 2]) == ["2", "1"]
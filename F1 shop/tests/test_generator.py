@@ -0,0 +1,48 @@
+import json
+import pytest
+from core.generator import MockSpec, order_lines, order_records, write_dataset
+from core.snapshot import Snapshot
+from core.transforms import load_seed_data
+
+ERAS = [{"id": "era_1", "name": "V10", "parent": None}, {"id": "era_2", "name": "Гибриды", "parent": None}]
+SPEC = MockSpec(bolids=30, collectors=10, orders=250, seed=3, shard_size=64)
+
+
+def test_orders_are_priced_from_catalog(tmp_path):
+    path = write_dataset(str(tmp_path / "seed.json"), SPEC, ERAS)
+    eras, bolids, collectors, orders = load_seed_data(path)
+    assert (len(eras), len(bolids), len(collectors), len(orders)) == (2, 30, 10, 250)
+    prices = {b.id: b.price for b in bolids}
+    collector_ids = {c.id for c in collectors}
+    for order in orders:
+        assert order.collector_id in collector_ids
+        assert len({item.bolid_id for item in order.items}) == len(order.items) > 0
+        assert order.total_price == sum(prices[item.bolid_id] * item.quantity for item in order.items)
+    assert [o.id for o in orders] == [f"order_{i}" for i in range(1, 251)]
+
+
+def test_lines_match_records():
+    for shard in range(SPEC.shards()):
+        assert list(map(json.loads, order_lines(SPEC, shard))) == order_records(SPEC, shard)
+
+
+@pytest.mark.parametrize("name", ["data.jsonl", "data.snap"])
+def test_formats_load_the_same(tmp_path, name):
+    expected = load_seed_data(write_dataset(str(tmp_path / "seed.json"), SPEC, ERAS))
+    path = write_dataset(str(tmp_path / name), SPEC, ERAS)
+    if name.endswith(".snap"):
+        snapshot = Snapshot(path)
+        assert (tuple(snapshot.bolids), tuple(snapshot.purchase_orders)) == (expected[1], expected[3])
+        snapshot.close()
+    else:
+        assert load_seed_data(path) == expected
+
+
+def test_sharded_run_is_identical(tmp_path):
+    single = write_dataset(str(tmp_path / "one.jsonl"), SPEC, ERAS, workers=1)
+    sharded = write_dataset(str(tmp_path / "two.jsonl"), SPEC, ERAS, workers=2)
+    with open(single, "rb") as a, open(sharded, "rb") as b:
+        assert a.read() == b.read()
+    assert write_dataset(str(tmp_path / "other.jsonl"), SPEC._replace(seed=4), ERAS)
+    with open(single, "rb") as a, open(tmp_path / "other.jsonl", "rb") as b:
+        assert a.read() != b.read()
@@ -0,0 +1,83 @@
+import threading
+import pytest
+from core.domain import Bolid, Garage, GarageItem
+from core.inventory import InventoryService, MemoryInventory, SQLiteInventory
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def service(request, tmp_path):
+    stock = {"bolid_1": 50, "bolid_2": 1}
+    if request.param == "memory":
+        yield InventoryService(MemoryInventory(stock))
+    else:
+        store = SQLiteInventory(str(tmp_path / "inventory.sqlite"))
+        store.load(stock)
+        yield InventoryService(store)
+        store.close()
+
+
+def test_reserve_is_all_or_nothing(service):
+    assert not service.reserve([GarageItem("bolid_1", 5), GarageItem("bolid_2", 2)])
+    assert service.available("bolid_1") == 50
+    assert service.reserve([GarageItem("bolid_1", 5), GarageItem("bolid_2", 1)])
+    assert service.available("bolid_1") == 45
+    assert service.available("bolid_2") == 0
+    assert not service.reserve([GarageItem("bolid_404", 1)])
+
+
+def test_no_oversell_under_threads(service):
+    sold = []
+
+    def buyer():
+        while service.reserve([GarageItem("bolid_1", 1)]):
+            sold.append(1)
+
+    threads = [threading.Thread(target=buyer) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(sold) == 50
+    assert service.available("bolid_1") == 0
+
+
+def test_checkout_creates_order_only_when_in_stock(service):
+    bolids = (Bolid(id="bolid_2", name="B", team="T", year=2000, price=10, era_id="e1", tags=[], quantity_available=1),)
+    garage = Garage("coll_1", [GarageItem("bolid_2", 1)])
+    order = service.checkout(garage, bolids, "ts")
+    assert order is not None and order.total_price == 10
+    assert service.checkout(garage, bolids, "ts") is None
+
+
+def test_sqlite_load_keeps_existing_rows(tmp_path):
+    store = SQLiteInventory(str(tmp_path / "inventory.sqlite"))
+    store.load({"bolid_1": 3})
+    InventoryService(store).reserve([GarageItem("bolid_1", 1)])
+    store.load({"bolid_1": 3, "bolid_2": 7}, replace=False)
+    assert store.read("bolid_1") == (2, 1)
+    assert store.read("bolid_2") == (7, 0)
+    store.close()
+
+
+def test_sqlite_replace_bumps_version(tmp_path):
+    store = SQLiteInventory(str(tmp_path / "inventory.sqlite"))
+    store.load({"bolid_1": 3})
+    assert store.compare_and_swap("bolid_1", 0, 2)
+    quantity, version = store.read("bolid_1")
+    store.load({"bolid_1": 3})
+    # Остаток вернулся к прежнему значению, но версия другая - устаревший CAS не пройдет
+    assert store.read("bolid_1") == (3, version + 1)
+    assert not store.compare_and_swap("bolid_1", version, quantity - 1)
+    store.close()
+
+
+def test_reserve_releases_on_contention():
+    class Contended(MemoryInventory):
+        def compare_and_swap(self, bolid_id, expected_version, quantity):
+            return bolid_id != "bolid_2" and super().compare_and_swap(bolid_id, expected_version, quantity)
+
+    service = InventoryService(Contended({"bolid_1": 5, "bolid_2": 5}), max_retries=3)
+    with pytest.raises(RuntimeError):
+        service.reserve([GarageItem("bolid_1", 2), GarageItem("bolid_2", 1)])
+    assert service.available("bolid_1") == 5
+    assert service.conflicts == 3
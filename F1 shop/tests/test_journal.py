@@ -0,0 +1,105 @@
+import os
+import pytest
+from core.domain import GarageItem, PurchaseOrder
+from core.journal import JournalCorrupted, OrderJournal
+
+ORDERS = [
+    PurchaseOrder(f"order_{i}", f"coll_{i % 3}", [GarageItem(f"bolid_{i % 7}", i % 4 + 1)] * (i % 3),
+                  1000 * i, f"2023-01-{i % 28 + 1:02d}T10:00:00")
+    for i in range(200)
+]
+
+
+def segments(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".log"))
+
+
+def test_append_rotate_and_replay(tmp_path):
+    with OrderJournal(str(tmp_path), segment_bytes=2048) as journal:
+        for order in ORDERS:
+            journal.append(order)
+        assert list(journal.replay()) == ORDERS
+    assert len(segments(tmp_path)) > 1
+    with OrderJournal(str(tmp_path)) as journal:
+        assert list(journal.replay()) == ORDERS
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    with OrderJournal(str(tmp_path)) as journal:
+        for order in ORDERS[:10]:
+            journal.append(order)
+    last = tmp_path / segments(tmp_path)[-1]
+    with open(last, "ab") as f:
+        f.write(b"\x40\x00\x00\x00\x00\x00\x00\x00{\"id\"")  # запись оборвалась посреди нагрузки
+    with OrderJournal(str(tmp_path)) as journal:
+        journal.append(ORDERS[10])
+        assert list(journal.replay()) == ORDERS[:11]
+
+
+def test_zero_filled_tail_is_truncated(tmp_path):
+    with OrderJournal(str(tmp_path)) as journal:
+        for order in ORDERS[:10]:
+            journal.append(order)
+    last = tmp_path / segments(tmp_path)[-1]
+    size = last.stat().st_size
+    with open(last, "ab") as f:
+        f.write(bytes(16))  # файл удлинился, а данные не дошли до диска
+    (tmp_path / "base-00000001.snap.tmp").write_bytes(b"partial")
+    with OrderJournal(str(tmp_path)) as journal:
+        assert last.stat().st_size == size
+        assert not (tmp_path / "base-00000001.snap.tmp").exists()
+        journal.append(ORDERS[10])
+        assert list(journal.replay()) == ORDERS[:11]
+
+
+def test_corruption_in_sealed_segment_raises(tmp_path):
+    with OrderJournal(str(tmp_path), segment_bytes=2048) as journal:
+        for order in ORDERS:
+            journal.append(order)
+    first = tmp_path / segments(tmp_path)[0]
+    data = bytearray(first.read_bytes())
+    data[20] ^= 0xFF
+    first.write_bytes(bytes(data))
+    with OrderJournal(str(tmp_path)) as journal:
+        with pytest.raises(JournalCorrupted):
+            list(journal.replay())
+
+
+def test_compaction_folds_sealed_segments(tmp_path):
+    with OrderJournal(str(tmp_path), segment_bytes=2048) as journal:
+        for order in ORDERS[:100]:
+            journal.append(order)
+        upto = journal.compact()
+        assert upto == journal.base() > 0
+        assert segments(tmp_path) == [f"segment-{upto + 1:08d}.log"]
+        for order in ORDERS[100:]:
+            journal.append(order)
+        assert journal.compact() > upto
+        assert list(journal.replay()) == ORDERS
+    with OrderJournal(str(tmp_path)) as journal:
+        assert list(journal.replay()) == ORDERS
+
+
+def test_replay_from_position_spans_base_and_segments(tmp_path):
+    with OrderJournal(str(tmp_path), segment_bytes=2048) as journal:
+        for order in ORDERS[:100]:
+            journal.append(order)
+        journal.compact()
+        for order in ORDERS[100:]:
+            journal.append(order)
+        for start in (0, 1, 57, 99, 100, 150, 199, 200, 500):
+            assert list(journal.replay(start)) == ORDERS[start:]
+
+
+def test_compaction_waits_for_running_replay(tmp_path):
+    with OrderJournal(str(tmp_path), segment_bytes=2048) as journal:
+        for order in ORDERS[:100]:
+            journal.append(order)
+        before = segments(tmp_path)
+        replay = journal.replay()
+        assert next(replay) == ORDERS[0]
+        upto = journal.compact()
+        assert segments(tmp_path) == before  # сегменты еще читаются
+        assert [ORDERS[0]] + list(replay) == ORDERS[:100]
+        assert segments(tmp_path) == [f"segment-{upto + 1:08d}.log"]
+        assert list(journal.replay()) == ORDERS[:100]
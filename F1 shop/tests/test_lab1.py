@@ -1,57 +1,75 @@
 import pytest
 from datetime import datetime
-from core.domain import Cart, CartItem, Product, Order
-from core.transforms import add_to_cart, remove_from_cart, checkout, total_sales
+from core.domain import Garage, GarageItem, Bolid, PurchaseOrder
+from core.checkout import batch_checkout
+from core.transforms import add_to_garage, remove_from_garage, update_garage_quantity, finalize_purchase, total_sales
 
 # Фикстуры для тестов
 @pytest.fixture
-def sample_cart() -> Cart:
-    return Cart(user_id="user_1", items=[
-        CartItem(product_id="prod_1", quantity=2),
-        CartItem(product_id="prod_2", quantity=1)
+def sample_garage() -> Garage:
+    return Garage(collector_id="coll_1", items=[
+        GarageItem(bolid_id="bolid_1", quantity=2),
+        GarageItem(bolid_id="bolid_2", quantity=1)
     ])
 
 @pytest.fixture
-def sample_products() -> tuple[Product, ...]:
+def sample_bolids() -> tuple[Bolid, ...]:
     return (
-        Product(id="prod_1", name="Laptop", price=1000, category_id="cat_1", tags=[], stock=10),
-        Product(id="prod_2", name="Mouse", price=25, category_id="cat_1", tags=[], stock=10),
-        Product(id="prod_3", name="Keyboard", price=75, category_id="cat_1", tags=[], stock=10),
+        Bolid(id="bolid_1", name="Ferrari F2004", team="Ferrari", year=2004, price=1000, era_id="era_1", tags=[], quantity_available=10),
+        Bolid(id="bolid_2", name="Williams FW14B", team="Williams", year=1992, price=25, era_id="era_1", tags=[], quantity_available=10),
+        Bolid(id="bolid_3", name="McLaren MP4/4", team="McLaren", year=1988, price=75, era_id="era_1", tags=[], quantity_available=10),
     )
 
 @pytest.fixture
-def sample_orders() -> tuple[Order, ...]:
+def sample_orders() -> tuple[PurchaseOrder, ...]:
     return (
-        Order(id="order_1", user_id="user_1", items=[], total_price=1500, timestamp="..."),
-        Order(id="order_2", user_id="user_2", items=[], total_price=500, timestamp="..."),
-        Order(id="order_3", user_id="user_1", items=[], total_price=2000, timestamp="..."),
+        PurchaseOrder(id="order_1", collector_id="coll_1", items=[], total_price=1500, timestamp="..."),
+        PurchaseOrder(id="order_2", collector_id="coll_2", items=[], total_price=500, timestamp="..."),
+        PurchaseOrder(id="order_3", collector_id="coll_1", items=[], total_price=2000, timestamp="..."),
     )
 
 # Тесты для Лабы №1
-def test_add_to_cart_new_item(sample_cart):
-    new_cart = add_to_cart(sample_cart, "prod_3", 1)
-    assert len(new_cart.items) == 3
-    assert new_cart is not sample_cart  # Проверка иммутабельности
-    assert any(item.product_id == "prod_3" and item.quantity == 1 for item in new_cart.items)
-
-def test_add_to_cart_existing_item(sample_cart):
-    new_cart = add_to_cart(sample_cart, "prod_1", 1)
-    assert len(new_cart.items) == 2
-    item = next(item for item in new_cart.items if item.product_id == "prod_1")
+def test_add_to_garage_new_item(sample_garage):
+    new_garage = add_to_garage(sample_garage, "bolid_3", 1)
+    assert len(new_garage.items) == 3
+    assert new_garage is not sample_garage  # Проверка иммутабельности
+    assert len(sample_garage.items) == 2
+    assert any(item.bolid_id == "bolid_3" and item.quantity == 1 for item in new_garage.items)
+
+def test_add_to_garage_existing_item(sample_garage):
+    new_garage = add_to_garage(sample_garage, "bolid_1", 1)
+    assert len(new_garage.items) == 2
+    item = next(item for item in new_garage.items if item.bolid_id == "bolid_1")
     assert item.quantity == 3
+    # Позиция сохраняет свое место в гараже
+    assert [i.bolid_id for i in new_garage.items] == ["bolid_1", "bolid_2"]
+    assert sample_garage.quantity("bolid_1") == 2
+
+def test_remove_from_garage(sample_garage):
+    new_garage = remove_from_garage(sample_garage, "bolid_1")
+    assert len(new_garage.items) == 1
+    assert new_garage is not sample_garage # Проверка иммутабельности
+    assert all(item.bolid_id != "bolid_1" for item in new_garage.items)
+    assert "bolid_1" in sample_garage
+
+def test_update_garage_quantity(sample_garage):
+    assert update_garage_quantity(sample_garage, "bolid_2", 5).quantity("bolid_2") == 5
+    assert "bolid_2" not in update_garage_quantity(sample_garage, "bolid_2", 0)
 
-def test_remove_from_cart(sample_cart):
-    new_cart = remove_from_cart(sample_cart, "prod_1")
-    assert len(new_cart.items) == 1
-    assert new_cart is not sample_cart # Проверка иммутабельности
-    assert all(item.product_id != "prod_1" for item in new_cart.items)
+def test_large_garage_structural_sharing():
+    garage = Garage("coll_1")
+    for i in range(2000):
+        garage = add_to_garage(garage, f"bolid_{i}", 1)
+    smaller = remove_from_garage(garage, "bolid_1000")
+    assert len(garage) == 2000 and len(smaller) == 1999
+    assert [i.bolid_id for i in smaller.items][999:1001] == ["bolid_999", "bolid_1001"]
 
-def test_checkout(sample_cart, sample_products):
+def test_finalize_purchase(sample_garage, sample_bolids):
     ts = datetime.now().isoformat()
-    order = checkout(sample_cart, sample_products, ts)
-    assert order.user_id == "user_1"
+    order = finalize_purchase(sample_garage, sample_bolids, ts)
+    assert order.collector_id == "coll_1"
     assert len(order.items) == 2
-    # 2 * 1000 (Laptop) + 1 * 25 (Mouse) = 2025
+    # 2 * 1000 (Ferrari) + 1 * 25 (Williams) = 2025
     assert order.total_price == 2025
     assert order.timestamp == ts
 
@@ -60,4 +78,29 @@ def test_total_sales(sample_orders):
     assert total == 1500 + 500 + 2000
 
 def test_total_sales_empty():
-    assert total_sales(tuple()) == 0
\ No newline at end of file
+    assert total_sales(tuple()) == 0
+
+def test_batch_checkout_reserves_stock(sample_garage, sample_bolids):
+    garages = [
+        sample_garage,
+        Garage("coll_2", [GarageItem("bolid_1", 9)]),      # на складе осталось 8
+        Garage("coll_3", [GarageItem("bolid_404", 1)]),
+        Garage("coll_4"),
+        Garage("coll_5", [GarageItem("bolid_1", 8), GarageItem("bolid_3", 1)]),
+    ]
+    result = batch_checkout(garages, sample_bolids, "2024-01-01T00:00:00")
+
+    assert [o.collector_id for o in result.orders] == ["coll_1", "coll_5"]
+    assert [o.total_price for o in result.orders] == [2025, 8075]
+    assert [(f.garage_index, f.reason, f.bolid_id) for f in result.failures] == [
+        (1, "out_of_stock", "bolid_1"),
+        (2, "unknown_bolid", "bolid_404"),
+        (3, "empty", None),
+    ]
+    assert result.stock == {"bolid_1": 0, "bolid_2": 9, "bolid_3": 9}
+    assert result.stats.garages == 5 and result.stats.orders == 2
+
+def test_batch_checkout_matches_finalize_purchase(sample_garage, sample_bolids):
+    order = batch_checkout([sample_garage], sample_bolids, "ts").orders[0]
+    expected = finalize_purchase(sample_garage, sample_bolids, "ts")
+    assert order._replace(id="") == expected._replace(id="")
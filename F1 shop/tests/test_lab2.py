@@ -1,60 +1,84 @@
 import pytest
-from core.domain import Product, Category
-from core.transforms import by_category, by_price_range, by_tag
-from core.recursion import flatten_categories, collect_products_recursive
+from core.domain import Bolid, CarEra
+from core.transforms import by_era, by_price_range, by_tag
+from core.recursion import EraTree, flatten_eras, iter_eras, collect_bolids_recursive
 
 @pytest.fixture
-def products_for_filtering() -> tuple[Product, ...]:
+def bolids_for_filtering() -> tuple[Bolid, ...]:
     return (
-        Product(id="p1", name="A", price=100, category_id="c1", tags=['new'], stock=1),
-        Product(id="p2", name="B", price=200, category_id="c2", tags=['sale'], stock=1),
-        Product(id="p3", name="C", price=300, category_id="c1", tags=['new', 'eco'], stock=1),
-        Product(id="p4", name="D", price=400, category_id="c3", tags=['eco'], stock=1),
+        Bolid(id="b1", name="A", team="Ferrari", year=2000, price=100, era_id="e1", tags=['V10'], quantity_available=1),
+        Bolid(id="b2", name="B", team="Williams", year=2001, price=200, era_id="e2", tags=['Гибрид'], quantity_available=1),
+        Bolid(id="b3", name="C", team="Ferrari", year=2002, price=300, era_id="e1", tags=['V10', 'Чемпионский'], quantity_available=1),
+        Bolid(id="b4", name="D", team="McLaren", year=2003, price=400, era_id="e3", tags=['Чемпионский'], quantity_available=1),
     )
 
-def test_filter_by_category(products_for_filtering):
-    filter_c1 = by_category("c1")
-    result = list(filter(filter_c1, products_for_filtering))
+def test_filter_by_era(bolids_for_filtering):
+    filter_e1 = by_era("e1")
+    result = list(filter(filter_e1, bolids_for_filtering))
     assert len(result) == 2
-    assert all(p.category_id == "c1" for p in result)
+    assert all(b.era_id == "e1" for b in result)
 
-def test_filter_by_price_range(products_for_filtering):
+def test_filter_by_price_range(bolids_for_filtering):
     filter_price = by_price_range(150, 350)
-    result = list(filter(filter_price, products_for_filtering))
+    result = list(filter(filter_price, bolids_for_filtering))
     assert len(result) == 2
-    assert {p.id for p in result} == {"p2", "p3"}
+    assert {b.id for b in result} == {"b2", "b3"}
 
-def test_filter_by_tag(products_for_filtering):
-    filter_eco = by_tag("eco")
-    result = list(filter(filter_eco, products_for_filtering))
+def test_filter_by_tag(bolids_for_filtering):
+    filter_champ = by_tag("Чемпионский")
+    result = list(filter(filter_champ, bolids_for_filtering))
     assert len(result) == 2
-    assert {p.id for p in result} == {"p3", "p4"}
+    assert {b.id for b in result} == {"b3", "b4"}
 
 @pytest.fixture
-def category_tree() -> tuple[Category, ...]:
+def era_tree() -> tuple[CarEra, ...]:
     return (
-        Category(id="c1", name="Электроника", parent=None),
-        Category(id="c2", name="Смартфоны", parent="c1"),
-        Category(id="c3", name="Ноутбуки", parent="c1"),
-        Category(id="c4", name="Аксессуары", parent="c2"),
-        Category(id="c5", name="Одежда", parent=None),
+        CarEra(id="e1", name="Атмосферная эра", parent=None),
+        CarEra(id="e2", name="Эра V10", parent="e1"),
+        CarEra(id="e3", name="Эра V8", parent="e1"),
+        CarEra(id="e4", name="Поздние V10", parent="e2"),
+        CarEra(id="e5", name="Гибридная эра", parent=None),
     )
 
-def test_flatten_categories_recursive(category_tree):
-    # Уплощаем все подкатегории "Электроники"
-    flat_list = flatten_categories(category_tree, "c1")
-    # Должны быть c1, c2, c3, c4
-    assert len(flat_list) == 4
-    assert {c.id for c in flat_list} == {"c1", "c2", "c3", "c4"}
-
-def test_collect_products_recursive(category_tree):
-    products = (
-        Product(id="p1", name="Смартфон X", price=1, category_id="c2", tags=[], stock=1),
-        Product(id="p2", name="Чехол для X", price=1, category_id="c4", tags=[], stock=1),
-        Product(id="p3", name="Ноутбук Y", price=1, category_id="c3", tags=[], stock=1),
-        Product(id="p4", name="Футболка Z", price=1, category_id="c5", tags=[], stock=1),
+def test_flatten_eras_recursive(era_tree):
+    # Уплощаем все под-эры "Атмосферной эры"
+    flat_list = flatten_eras(era_tree, "e1")
+    # Должны быть e1, e2, e4, e3 - в порядке прямого обхода
+    assert [e.id for e in flat_list] == ["e1", "e2", "e4", "e3"]
+
+def test_flatten_eras_from_top(era_tree):
+    flat_list = flatten_eras(era_tree, None)
+    assert [e.id for e in flat_list] == ["e1", "e2", "e4", "e3", "e5"]
+
+def test_collect_bolids_recursive(era_tree):
+    bolids = (
+        Bolid(id="b1", name="X", team="T", year=2000, price=1, era_id="e2", tags=[], quantity_available=1),
+        Bolid(id="b2", name="Y", team="T", year=2000, price=1, era_id="e4", tags=[], quantity_available=1),
+        Bolid(id="b3", name="Z", team="T", year=2000, price=1, era_id="e3", tags=[], quantity_available=1),
+        Bolid(id="b4", name="W", team="T", year=2000, price=1, era_id="e5", tags=[], quantity_available=1),
     )
-    # Собираем все товары из категории "Электроника" и ее подкатегорий
-    collected = collect_products_recursive(category_tree, products, "c1")
+    # Собираем все болиды "Атмосферной эры" и её под-эр
+    collected = collect_bolids_recursive(era_tree, bolids, "e1")
     assert len(collected) == 3
-    assert {p.id for p in collected} == {"p1", "p2", "p3"}
\ No newline at end of file
+    assert {b.id for b in collected} == {"b1", "b2", "b3"}
+
+def test_era_tree_index(era_tree):
+    tree = EraTree(era_tree)
+    assert [e.id for e in tree.children("e1")] == ["e2", "e3"]
+    assert [e.id for e in tree.descendants("e2")] == ["e4"]
+    assert tree.is_under("e4", "e1")
+    assert tree.is_under("e1", "e1")
+    assert not tree.is_under("e5", "e1")
+    assert not tree.is_under("e1", "e4")
+    assert tree.subtree_ids("e2") == frozenset({"e2", "e4"})
+
+def test_flatten_eras_deep_hierarchy():
+    # Глубина заметно больше лимита рекурсии Python
+    deep = tuple(CarEra(id=f"e{i}", name="", parent=f"e{i - 1}" if i else None) for i in range(5000))
+    assert len(flatten_eras(deep, "e0")) == 5000
+
+def test_iter_eras_cycle_and_early_stop():
+    cyclic = (CarEra(id="a", name="", parent="b"), CarEra(id="b", name="", parent="a"))
+    assert [e.id for e in flatten_eras(cyclic, "a")] == ["a", "b"]
+    first = next(iter_eras(cyclic, "a"))
+    assert first.id == "a"
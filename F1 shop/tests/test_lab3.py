@@ -1,89 +1,125 @@
 import pytest
-import time
-from core.domain import Order, Product, CartItem
-from core.transforms import top_products_memoized
+from core.domain import PurchaseOrder, Bolid, GarageItem
+from core.cache import fingerprint_cache
+from core.sales import SalesAggregator
+from core.transforms import top_selling_bolids
 
 
 @pytest.fixture
-def orders_for_top() -> tuple[Order, ...]:
+def orders_for_top() -> tuple[PurchaseOrder, ...]:
     return (
-        Order(id="o1", user_id="u1", items=[CartItem("p1", 5), CartItem("p2", 2)], total_price=1, timestamp=""),
-        Order(id="o2", user_id="u2", items=[CartItem("p2", 3), CartItem("p3", 10)], total_price=1, timestamp=""),
-        Order(id="o3", user_id="u1", items=[CartItem("p3", 8), CartItem("p1", 2)], total_price=1, timestamp=""),
+        PurchaseOrder(id="o1", collector_id="c1", items=[GarageItem("b1", 5), GarageItem("b2", 2)], total_price=1, timestamp=""),
+        PurchaseOrder(id="o2", collector_id="c2", items=[GarageItem("b2", 3), GarageItem("b3", 10)], total_price=1, timestamp=""),
+        PurchaseOrder(id="o3", collector_id="c1", items=[GarageItem("b3", 8), GarageItem("b1", 2)], total_price=1, timestamp=""),
     )
     # Итоги продаж:
-    # p1: 5 + 2 = 7
-    # p2: 2 + 3 = 5
-    # p3: 10 + 8 = 18
-    # Ожидаемый порядок: p3, p1, p2
+    # b1: 5 + 2 = 7
+    # b2: 2 + 3 = 5
+    # b3: 10 + 8 = 18
+    # Ожидаемый порядок: b3, b1, b2
 
 
 @pytest.fixture
-def products_for_top() -> tuple[Product, ...]:
+def bolids_for_top() -> tuple[Bolid, ...]:
     return (
-        Product(id="p1", name="A", price=1, category_id="c1", tags=[], stock=1),
-        Product(id="p2", name="B", price=1, category_id="c1", tags=[], stock=1),
-        Product(id="p3", name="C", price=1, category_id="c1", tags=[], stock=1),
+        Bolid(id="b1", name="A", team="T", year=2000, price=1, era_id="e1", tags=[], quantity_available=1),
+        Bolid(id="b2", name="B", team="T", year=2000, price=1, era_id="e1", tags=[], quantity_available=1),
+        Bolid(id="b3", name="C", team="T", year=2000, price=1, era_id="e1", tags=[], quantity_available=1),
     )
 
 
-def test_top_products_logic(orders_for_top, products_for_top):
-    top_products_memoized.cache_clear()
-    top_2 = top_products_memoized(orders_for_top, products_for_top, k=2)
+def test_top_bolids_logic(orders_for_top, bolids_for_top):
+    top_selling_bolids.cache_clear()
+    top_2 = top_selling_bolids(orders_for_top, bolids_for_top, k=2)
     assert len(top_2) == 2
-    assert top_2[0].id == "p3"
-    assert top_2[1].id == "p1"
+    assert top_2[0].id == "b3"
+    assert top_2[1].id == "b1"
 
 
-def test_top_products_memoization_speed(orders_for_top, products_for_top):
-    top_products_memoized.cache_clear()
+def test_top_bolids_memoization(orders_for_top, bolids_for_top):
+    top_selling_bolids.cache_clear()
 
-    # Первый вызов - медленный
-    start_first = time.monotonic()
-    top_products_memoized(orders_for_top, products_for_top, k=3)
-    end_first = time.monotonic()
-    duration_first = end_first - start_first
+    first = top_selling_bolids(orders_for_top, bolids_for_top, k=3)
+    second = top_selling_bolids(orders_for_top, bolids_for_top, k=3)
 
-    # Второй вызов - быстрый (из кеша)
-    start_second = time.monotonic()
-    top_products_memoized(orders_for_top, products_for_top, k=3)
-    end_second = time.monotonic()
-    duration_second = end_second - start_second
+    assert second is first
+    info = top_selling_bolids.cache_info()
+    assert info.hits == 1
+    assert info.misses == 1
 
-    # Проверяем, что первый вызов был "дорогим" (дольше 2 сек)
-    assert duration_first > 2.0
-    # Проверяем, что второй вызов был значительно быстрее
-    assert duration_second < 0.01
 
+def test_top_bolids_unhashable_inputs(bolids_for_top):
+    """Списки заказов не кешируются (версию списка не узнать), кортежи - кешируются."""
+    top_selling_bolids.cache_clear()
 
-def test_top_products_immutable_keys(products_for_top):
-    """Проверяет, что функция работает с иммутабельными ключами (кортежами)."""
-    top_products_memoized.cache_clear()
-
-    # Создаем изменяемый список заказов
     mutable_orders = [
-        Order(id="o1", user_id="u1", items=[CartItem("p1", 5)], total_price=1, timestamp="")
+        PurchaseOrder(id="o1", collector_id="c1", items=[GarageItem("b1", 5)], total_price=1, timestamp="")
     ]
+    result = top_selling_bolids(mutable_orders, bolids_for_top, k=1)
+    assert len(result) == 1
+    assert result[0].id == "b1"
+    assert top_selling_bolids.cache_info().currsize == 0
+
+    # Тот же набор данных в виде кортежа кешируется
+    frozen = tuple(mutable_orders)
+    assert top_selling_bolids(frozen, bolids_for_top, k=1) == result
+    assert top_selling_bolids(frozen, bolids_for_top, k=1) == result
+    assert top_selling_bolids.cache_info().hits == 1
+    # Изменённый список не отдает устаревший результат
+    mutable_orders.append(
+        PurchaseOrder(id="o2", collector_id="c1", items=[GarageItem("b2", 9)], total_price=1, timestamp="")
+    )
+    assert top_selling_bolids(mutable_orders, bolids_for_top, k=1)[0].id == "b2"
 
-    # Ожидаем ошибку, если передать изменяемый список
-    with pytest.raises(TypeError):
-        top_products_memoized(mutable_orders, products_for_top, k=1)
 
-    # Проверяем, что с кортежем все работает
-    immutable_orders = tuple(mutable_orders)
-    result = top_products_memoized(immutable_orders, products_for_top, k=1)
-    assert len(result) == 1
-    assert result[0].id == "p1"
+def test_top_bolids_positional_and_keyword_share_key(orders_for_top, bolids_for_top):
+    top_selling_bolids.cache_clear()
+    first = top_selling_bolids(orders_for_top, bolids_for_top, 2)
+    assert top_selling_bolids(orders_for_top, bolids_for_top, k=2) is first
+    assert top_selling_bolids(orders=orders_for_top, bolids=bolids_for_top, k=2) is first
+    assert top_selling_bolids.cache_info() == (2, 1, 128, 1)
 
 
-def test_top_products_k_parameter(orders_for_top, products_for_top):
-    top_products_memoized.cache_clear()
-    top_1 = top_products_memoized(orders_for_top, products_for_top, k=1)
+def test_top_bolids_k_parameter(orders_for_top, bolids_for_top):
+    top_selling_bolids.cache_clear()
+    top_1 = top_selling_bolids(orders_for_top, bolids_for_top, k=1)
     assert len(top_1) == 1
-    assert top_1[0].id == "p3"
+    assert top_1[0].id == "b3"
+
+
+def test_top_bolids_empty_orders(bolids_for_top):
+    top_selling_bolids.cache_clear()
+    result = top_selling_bolids(tuple(), bolids_for_top, k=5)
+    assert len(result) == 0
+
+
+def test_fingerprint_cache_eviction():
+    calls = []
+
+    @fingerprint_cache(maxsize=2)
+    def square(x):
+        calls.append(x)
+        return x * x
+
+    square(1); square(2); square(1); square(3)
+    # 2 вытеснен как наименее недавно использованный
+    square(2)
+    assert calls == [1, 2, 3, 2]
+    assert square.cache_info().currsize == 2
+
+
+def test_sales_aggregator_matches_batch(orders_for_top, bolids_for_top):
+    aggregator = SalesAggregator(bolids_for_top)
+    for i, order in enumerate(orders_for_top, start=1):
+        aggregator.add_order(order)
+        for k in (1, 2, 3):
+            assert aggregator.top_bolids(k) == top_selling_bolids(orders_for_top[:i], bolids_for_top, k=k)
+    assert aggregator.count("b3") == 18
 
 
-def test_top_products_empty_orders(products_for_top):
-    top_products_memoized.cache_clear()
-    result = top_products_memoized(tuple(), products_for_top, k=5)
-    assert len(result) == 0
\ No newline at end of file
+def test_sales_aggregator_ties_follow_first_sale(bolids_for_top):
+    orders = (PurchaseOrder(id="o1", collector_id="c1", items=[GarageItem("b3", 1), GarageItem("b1", 1)],
+                            total_price=1, timestamp=""),)
+    aggregator = SalesAggregator(bolids_for_top, orders)
+    assert [b.id for b in aggregator.top_bolids(3)] == ["b3", "b1"]
+    assert aggregator.top_bolids(3) == top_selling_bolids(orders, bolids_for_top, k=3)
@@ -1,6 +1,8 @@
+import copy
+import pickle
 import pytest
-from core.ftypes import Maybe, safe_product_find, validate_order
-from core.domain import Product, Order, CartItem, Discount
+from core.ftypes import Maybe, MaybeChain, safe_product_find, validate_order, validate_orders, validation_mask
+from core.domain import Bolid, PurchaseOrder, GarageItem, Discount
 from core.compose import pipe
 
 
@@ -41,9 +43,36 @@ def test_maybe_bind():
     assert nothing.is_nothing()
 
 
+def test_nothing_is_shared():
+    assert Maybe.Nothing() is Maybe(None) is Maybe.Some(1).bind(lambda x: Maybe.Nothing())
+
+
+def test_maybe_survives_pickle_and_copy():
+    for clone in (lambda m: pickle.loads(pickle.dumps(m)), copy.copy, copy.deepcopy):
+        assert clone(Maybe.Some(5)).get_or_else(0) == 5
+        assert clone(Maybe.Nothing()) is Maybe.Nothing()
+        assert Maybe.Nothing().is_nothing() and Maybe(None).is_nothing()
+    with pytest.raises(AttributeError):
+        Maybe.Some(1).extra = 2  # __slots__, без __dict__
+
+
+def test_maybe_chain_matches_step_by_step():
+    def half(x):
+        return Maybe.Some(x // 2) if x % 2 == 0 else Maybe.Nothing()
+
+    chain = MaybeChain().map(lambda x: x * 3).bind(half).map(str)
+    for value in (None, 1, 2, 4):
+        expected = Maybe(value).map(lambda x: x * 3).bind(half).map(str)
+        assert repr(chain(Maybe(value))) == repr(expected)
+    assert chain.run(4).get_or_else("") == "6"
+    assert chain.run(1) is Maybe.Nothing()
+    with pytest.raises(ValueError):
+        MaybeChain().map(lambda x: None).run(1)
+
+
 # Тесты для функций с Maybe
 def test_safe_product_find():
-    products = (Product(id="p1", name="A", price=1, category_id="c1", tags=[], stock=1),)
+    products = (Bolid(id="p1", name="A", team="Ferrari", year=2004, price=1, era_id="era_1", tags=[], quantity_available=1),)
 
     found = safe_product_find(products, "p1")
     assert found.is_some()
@@ -55,17 +84,17 @@ def test_safe_product_find():
 
 # Тесты для пайплайна
 def test_validation_pipeline_success():
-    order = Order("o1", "u1", [CartItem("p1", 2)], 200, "")
+    order = PurchaseOrder("o1", "u1", [GarageItem("p1", 2)], 200, "")
     stock = {"p1": 5, "p2": 10}
     discounts = tuple()
 
-    def check_stock(o: Order) -> Maybe[Order]:
+    def check_stock(o: PurchaseOrder) -> Maybe[PurchaseOrder]:
         for item in o.items:
-            if stock.get(item.product_id, 0) < item.quantity:
+            if stock.get(item.bolid_id, 0) < item.quantity:
                 return Maybe.Nothing()
         return Maybe.Some(o)
 
-    def process_payment(o: Order) -> Maybe[str]:
+    def process_payment(o: PurchaseOrder) -> Maybe[str]:
         return Maybe.Some(f"Payment successful for order {o.id}")
 
     pipeline = pipe(check_stock, lambda m: m.bind(process_payment))
@@ -76,16 +105,34 @@ def test_validation_pipeline_success():
 
 
 def test_validation_pipeline_failure():
-    order = Order("o1", "u1", [CartItem("p1", 10)], 1000, "")  # Хотим 10, на складе 5
+    order = PurchaseOrder("o1", "u1", [GarageItem("p1", 10)], 1000, "")  # Хотим 10, на складе 5
     stock = {"p1": 5}
 
-    def check_stock(o: Order) -> Maybe[Order]:
+    def check_stock(o: PurchaseOrder) -> Maybe[PurchaseOrder]:
         for item in o.items:
-            if stock.get(item.product_id, 0) < item.quantity:
+            if stock.get(item.bolid_id, 0) < item.quantity:
                 return Maybe.Nothing()
         return Maybe.Some(o)
 
     pipeline = pipe(check_stock)
 
     result = pipeline(order)
-    assert result.is_nothing()
\ No newline at end of file
+    assert result.is_nothing()
+
+
+# Тесты для пакетной валидации
+def test_validate_orders_matches_single():
+    stock = {"p1": 5, "p2": 1}
+    discounts = (Discount("p1", 0.1), Discount("p3", 0.5))
+    orders = (
+        PurchaseOrder("o1", "u1", [GarageItem("p1", 2), GarageItem("p2", 1)], 0, ""),
+        PurchaseOrder("o2", "u1", [GarageItem("p2", 2)], 0, ""),  # p2 не хватает
+        PurchaseOrder("o3", "u2", [], 0, ""),
+        PurchaseOrder("o4", "u2", [GarageItem("p3", 1)], 0, ""),  # p3 только в скидках
+        PurchaseOrder("o5", "u3", [GarageItem("p9", 0)], 0, ""),
+    )
+    expected = [validate_order(o, stock, discounts) for o in orders]
+    bulk = validate_orders(orders, stock, discounts)
+    assert [repr(m) for m in bulk] == [repr(m) for m in expected]
+    assert validation_mask(orders, stock, discounts) == (True, False, True, False, True)
+    assert bulk[0].get_or_else({})["items"][0]["discount"] == 0.1
@@ -0,0 +1,83 @@
+import json
+import pytest
+from core.domain import CarEra, GarageItem
+from core.loader import iter_seed_records, iter_section
+from core.transforms import load_seed_data
+
+
+@pytest.fixture
+def seed_file(tmp_path):
+    data = {
+        "meta": {"version": [1, 2, {"note": "]"}]},
+        "eras": [{"id": "era_1", "name": "Эра \"V10\"", "parent": None}],
+        "bolids": [
+            {"id": "bolid_1", "name": "A", "team": "Ferrari", "year": 2004, "price": 1234567,
+             "era_id": "era_1", "tags": ["V10"], "quantity_available": 2, "image_url": "x.jpg"},
+        ],
+        "collectors": [{"id": "coll_1", "name": "Иван", "tier": "Grandstand"}],
+        "purchase_orders": [
+            {"id": "order_1", "collector_id": "coll_1", "items": [{"bolid_id": "bolid_1", "quantity": 1}],
+             "total_price": 1234567, "timestamp": "2020-10-01T13:32:37"},
+        ],
+    }
+    path = tmp_path / "seed.json"
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    return str(path), data
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 16, 1 << 16])
+def test_iter_seed_records_any_chunk_size(seed_file, chunk_size):
+    path, data = seed_file
+    records = list(iter_seed_records(path, chunk_size=chunk_size))
+    expected = [(key, r) for key in ("eras", "bolids", "collectors", "purchase_orders") for r in data[key]]
+    assert records == expected
+
+
+def test_iter_section_yields_domain_objects(seed_file):
+    path, _ = seed_file
+    assert list(iter_section(path, "eras")) == [CarEra("era_1", "Эра \"V10\"", None)]
+
+
+def test_load_seed_data(seed_file):
+    path, _ = seed_file
+    eras, bolids, collectors, orders = load_seed_data(path)
+    assert len(eras) == len(bolids) == len(collectors) == len(orders) == 1
+    assert bolids[0].image_url == "x.jpg"
+    assert orders[0].items == [GarageItem("bolid_1", 1)]
+
+
+def test_truncated_file_raises(tmp_path):
+    path = tmp_path / "seed.json"
+    path.write_text('{"eras": [{"id": "era_1"', encoding="utf-8")
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_seed_records(str(path)))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 5, 1 << 16])
+def test_skipped_values_with_brackets_and_escapes(tmp_path, chunk_size):
+    path = tmp_path / "seed.json"
+    path.write_text('{"meta": {"a": ["]}\\"\\\\", "x\\\\"], "b": "{["}, "note": "\\"}", "n": -1.5e3, '
+                    '"eras": [{"id": "era_1", "name": "V10", "parent": null}]}', encoding="utf-8")
+    assert list(iter_seed_records(str(path), ("eras",), chunk_size)) == [
+        ("eras", {"id": "era_1", "name": "V10", "parent": None})]
+
+
+def test_reading_stops_after_last_wanted_section(tmp_path):
+    path = tmp_path / "seed.json"
+    path.write_text('{"eras": [{"id": "era_1", "name": "V10", "parent": null}], "bolids": [{"id": ', encoding="utf-8")
+    assert [r["id"] for _, r in iter_seed_records(str(path), ("eras",))] == ["era_1"]
+    lines = tmp_path / "seed.jsonl"
+    lines.write_text('["eras",{"id":"era_1","name":"V10","parent":null}]\n["bolids",{"id":\n', encoding="utf-8")
+    assert [r["id"] for _, r in iter_seed_records(str(lines), ("eras",))] == ["era_1"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 4, 5, 8, 13])
+def test_numbers_split_by_chunk_boundary(tmp_path, chunk_size):
+    path = tmp_path / "seed.json"
+    path.write_text('{"x": 1.5, "y": -2.25e-3, "z": 1E+10, '
+                    '"eras": [{"id": "era_1", "name": "V10", "parent": null, "w": 12.5e2}], "n": 7}', encoding="utf-8")
+    assert list(iter_seed_records(str(path), ("eras",), chunk_size)) == [
+        ("eras", {"id": "era_1", "name": "V10", "parent": None, "w": 1250.0})]
+    # Без выбора разделов скаляры верхнего уровня разбираются до конца файла
+    assert [r for _, r in iter_seed_records(str(path), chunk_size=chunk_size)] == [
+        {"id": "era_1", "name": "V10", "parent": None, "w": 1250.0}]
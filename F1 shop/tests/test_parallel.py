@@ -0,0 +1,65 @@
+import pickle
+import random
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from core.domain import GarageItem, PurchaseOrder
+from core.parallel import ORDERS, PLAIN, ParallelExecutor, _bounded_map, parallel_sales_counts, parallel_total_sales
+from core.transforms import sales_counts, total_sales
+
+
+@pytest.fixture(scope="module")
+def orders():
+    rng = random.Random(7)
+    return [
+        PurchaseOrder(f"order_{i}", f"coll_{i % 13}",
+                      [GarageItem(f"bolid_{rng.randrange(40)}", rng.randint(1, 3)) for _ in range(rng.randint(0, 4))],
+                      rng.randrange(10 ** 7), f"2023-01-{i % 28 + 1:02d}")
+        for i in range(2000)
+    ]
+
+
+def test_order_codec_roundtrip(orders):
+    assert ORDERS.decode(ORDERS.encode(orders)) == orders
+    assert ORDERS.decode(ORDERS.encode([])) == []
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parallel_matches_serial_bytes(orders, workers):
+    with ParallelExecutor(workers, chunk_size=137) as executor:
+        counts = parallel_sales_counts(orders, executor)
+        total = parallel_total_sales(orders, executor)
+    assert pickle.dumps(counts) == pickle.dumps(sales_counts(orders))
+    assert total == total_sales(orders)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parallel_total_sales_with_float_totals(orders, workers):
+    priced = [order._replace(total_price=order.total_price + 0.25) if n % 3 else order
+              for n, order in enumerate(orders)]
+    assert ORDERS.decode(ORDERS.encode(priced)) == priced
+    with ParallelExecutor(workers, chunk_size=137) as executor:
+        total = parallel_total_sales(priced, executor)
+    # Суммы по чанкам и подряд могут расходиться в последних битах
+    assert total == pytest.approx(total_sales(priced), rel=1e-12)
+
+
+def test_executor_without_with_block(orders):
+    executor = ParallelExecutor(2, chunk_size=500)
+    assert list(executor.map(len, orders, ORDERS)) == [500, 500, 500, 500]
+    assert parallel_total_sales([], executor) == 0
+
+
+def test_in_flight_chunks_are_bounded():
+    drawn = []
+
+    def payloads():
+        for n in range(50):
+            drawn.append(n)
+            yield [n]
+
+    with ThreadPoolExecutor(2) as pool:
+        results = _bounded_map(pool, sum, PLAIN, payloads(), 4)
+        for n, result in enumerate(results):
+            assert result == n
+            assert len(drawn) <= n + 4
+    assert len(drawn) == 50
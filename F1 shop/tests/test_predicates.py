@@ -0,0 +1,58 @@
+import pytest
+from core.catalog import BolidCatalog
+from core.domain import Bolid
+from core.predicates import Predicate, Where, compile_plan, select
+from core.transforms import by_era, by_price_range, by_tag, by_team
+
+
+@pytest.fixture
+def bolids() -> tuple[Bolid, ...]:
+    return (
+        Bolid(id="b1", name="A", team="Ferrari", year=2000, price=100, era_id="e1", tags=["V10"], quantity_available=1),
+        Bolid(id="b2", name="B", team="Williams", year=2001, price=200, era_id="e2", tags=["Гибрид"], quantity_available=0),
+        Bolid(id="b3", name="C", team="Ferrari", year=2002, price=300, era_id="e1", tags=["V10", "Чемпионский"], quantity_available=1),
+        Bolid(id="b4", name="D", team="McLaren", year=2003, price=400, era_id="e3", tags=["Чемпионский"], quantity_available=2),
+    )
+
+
+def test_predicates_compose_like_functions(bolids):
+    criteria = (by_era("e1") | by_team("McLaren")) & ~by_tag("V10")
+    assert [b.id for b in filter(criteria, bolids)] == ["b4"]
+
+
+def test_plan_matches_plain_filter(bolids):
+    catalog = BolidCatalog(bolids)
+    in_stock = Where(lambda b: b.quantity_available > 0)
+    criteria = by_price_range(150, 450) & (by_tag("Чемпионский") | by_team("Williams")) & in_stock
+    assert select(criteria, catalog) == tuple(filter(criteria, bolids))
+    assert [b.id for b in select(criteria, catalog)] == ["b3", "b4"]
+
+
+def test_plan_orders_index_terms_by_selectivity(bolids):
+    catalog = BolidCatalog(bolids)
+    plan = compile_plan(by_price_range(0, 1000) & by_team("McLaren") & Where(lambda b: True), catalog)
+    assert [t.describe() for t in plan.index_terms] == ["team == 'McLaren'", "price in [0, 1000]"]
+    assert len(plan.residual) == 1
+    explanation = plan.explain()
+    assert "index  team == 'McLaren'" in explanation
+    assert "scan   where(<lambda>)" in explanation
+
+
+def test_functions_combine_from_either_side(bolids):
+    cheap = lambda b: b.price < 250
+    assert [b.id for b in filter(cheap & by_team("Ferrari"), bolids)] == ["b1"]
+    assert [b.id for b in filter(cheap | by_team("McLaren"), bolids)] == ["b1", "b2", "b4"]
+    with pytest.raises(TypeError):
+        Predicate()
+
+
+def test_plan_reuses_masks_computed_for_estimates(bolids, monkeypatch):
+    catalog = BolidCatalog(bolids)
+    calls = []
+    tag_mask = catalog.tag_mask
+    monkeypatch.setattr(catalog, "tag_mask", lambda tag: calls.append(tag) or tag_mask(tag))
+    criteria = by_tag("Чемпионский") & ~by_tag("V10") & by_price_range(0, 1000)
+    plan = compile_plan(criteria, catalog)
+    assert [b.id for b in plan.execute()] == ["b4"]
+    assert "index  ~'V10' in tags  ~2 rows" in plan.explain()
+    assert sorted(calls) == ["V10", "Чемпионский"]
@@ -0,0 +1,83 @@
+import json
+import os
+import pytest
+from core import snapshot as snapshot_module
+from core.snapshot import Snapshot, load_snapshot, write_snapshot
+from core.transforms import load_seed_data
+
+
+@pytest.fixture
+def seed_path(tmp_path):
+    data = {
+        "eras": [
+            {"id": "era_1", "name": "V10", "parent": None},
+            {"id": "era_2", "name": "Поздние V10", "parent": "era_1"},
+        ],
+        "bolids": [
+            {"id": "bolid_1", "name": "Ferrari F2004", "team": "Ferrari", "year": 2004, "price": 4000000,
+             "era_id": "era_2", "tags": ["V10", "Чемпионский"], "quantity_available": 1, "image_url": "f.jpg"},
+            {"id": "bolid_2", "name": "Williams FW26", "team": "Williams", "year": 2004, "price": 900000,
+             "era_id": "era_2", "tags": [], "quantity_available": 0},
+        ],
+        "collectors": [{"id": "coll_1", "name": "Иван", "tier": "Paddock Club"}],
+        "purchase_orders": [
+            {"id": "order_1", "collector_id": "coll_1",
+             "items": [{"bolid_id": "bolid_1", "quantity": 1}, {"bolid_id": "bolid_2", "quantity": 2}],
+             "total_price": 5800000, "timestamp": "2023-03-23T13:14:10"},
+        ],
+    }
+    path = tmp_path / "seed.json"
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+def test_snapshot_roundtrip(seed_path):
+    snapshot = load_snapshot(seed_path)
+    eras, bolids, collectors, orders = load_seed_data(seed_path)
+    assert tuple(snapshot.eras) == eras
+    assert tuple(snapshot.bolids) == bolids
+    assert tuple(snapshot.collectors) == collectors
+    assert tuple(snapshot.purchase_orders) == orders
+    assert snapshot.bolids[-1].image_url == ""
+    snapshot.close()
+
+
+def test_snapshot_staleness(seed_path):
+    write_snapshot(seed_path)
+    snapshot = Snapshot(seed_path + ".snap")
+    # Смена mtime без смены содержимого не делает снапшот устаревшим
+    os.utime(seed_path, ns=(0, 0))
+    assert snapshot.is_fresh(seed_path)
+    with open(seed_path, "a", encoding="utf-8") as f:
+        f.write("\n")
+    assert not snapshot.is_fresh(seed_path)
+    snapshot.close()
+    # load_snapshot пересобирает устаревший снапшот
+    assert load_snapshot(seed_path).is_fresh(seed_path)
+
+
+def test_load_snapshot_restamps_after_digest_match(seed_path, monkeypatch):
+    write_snapshot(seed_path)
+    os.utime(seed_path, ns=(0, 10 ** 9))
+    load_snapshot(seed_path).close()
+    snapshot = Snapshot(seed_path + ".snap")
+    assert snapshot.stamp.mtime_ns == 10 ** 9
+    # Повторное открытие обходится сравнением mtime, без хеширования исходника
+    monkeypatch.setattr(snapshot_module, "_file_digest", lambda path: pytest.fail("digest recomputed"))
+    assert snapshot.is_fresh(seed_path)
+    snapshot.close()
+
+
+
+def test_truncated_snapshot_is_rebuilt(seed_path):
+    path = write_snapshot(seed_path)
+    with open(path, "rb") as f:
+        data = f.read()
+    expected = load_seed_data(seed_path)
+    # Обрывы в заголовке, в каталоге колонок и посреди колонок любой ширины
+    for keep in range(0, len(data), 13):
+        with open(path, "wb") as f:
+            f.write(data[:keep])
+        snapshot = load_snapshot(seed_path)
+        assert (tuple(snapshot.bolids), tuple(snapshot.purchase_orders)) == (expected[1], expected[3])
+        snapshot.close()
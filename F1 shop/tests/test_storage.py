@@ -0,0 +1,134 @@
+import random
+import threading
+import pytest
+from core.catalog import BolidCatalog
+from core.domain import Garage, GarageItem, PurchaseOrder
+from core.journal import OrderJournal
+from core.loader import iter_seed_records
+from core.predicates import EraIn, Where, select
+from core.recursion import build_era_tree
+from core.storage import SQLiteStore
+from core.transforms import by_price_range, by_tag, by_tags, by_team, load_seed_data, top_selling_bolids
+
+SEED = "data/seed.json"
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteStore(str(tmp_path / "f1.sqlite"))
+    store.sync_from_seed(SEED)
+    yield store
+    store.close()
+
+
+def test_loader_reads_database_like_json(store):
+    assert load_seed_data(store.path) == load_seed_data(SEED)
+
+
+def test_sync_imports_only_changed_seed(store):
+    assert store.sync_from_seed(SEED) is False
+    assert store.count("bolids") == len(load_seed_data(SEED)[1])
+
+
+def test_pushdown_matches_in_memory_select(store):
+    eras, bolids, _, _ = load_seed_data(SEED)
+    catalog = BolidCatalog(bolids)
+    tree = build_era_tree(eras)
+    teams = sorted({b.team for b in bolids})
+    tags = sorted({t for b in bolids for t in b.tags})
+    rng = random.Random(7)
+    for _ in range(200):
+        era = rng.choice(eras).id
+        assert set(store.era_subtree(era)) == set(tree.subtree_ids(era))
+        low = rng.randrange(0, 10_000_000)
+        criteria = EraIn(tree.subtree_ids(era)) & by_price_range(low, low + rng.randrange(20_000_000))
+        if rng.random() < 0.5:
+            criteria = criteria | by_team(rng.choice(teams))
+        if rng.random() < 0.5:
+            criteria = criteria & ~by_tag(rng.choice(tags))
+        if rng.random() < 0.3:
+            criteria = criteria & by_tags(f"{rng.choice(tags)} | !{rng.choice(tags)}")
+        if rng.random() < 0.3:
+            criteria = criteria & Where(lambda b: b.year % 2 == 0)
+        assert store.select_bolids(criteria) == select(criteria, catalog)
+
+
+def test_garage_and_analytics_queries(store):
+    _, bolids, _, orders = load_seed_data(SEED)
+    garage = Garage("coll_1", [GarageItem(bolids[0].id, 2), GarageItem(bolids[3].id, 1), GarageItem("missing", 5)])
+    assert store.garage_total(garage) == bolids[0].price * 2 + bolids[3].price
+    for k in (1, 5, 50):
+        assert store.top_selling_bolids(k) == top_selling_bolids(orders, bolids, k)
+    assert store.order_stats() == (len(orders), sum(o.total_price for o in orders))
+    by_team = store.revenue_by_team()
+    assert 0 <= sum(o.total_price for o in orders) - sum(by_team.values()) < len(orders) * len(by_team)
+
+    order = PurchaseOrder(orders[0].id, "coll_x", [GarageItem(bolids[1].id, 1000)], 7, "2031-05-01T00:00:00")
+    store.add_order(order)
+    assert store.top_selling_bolids(1) == (bolids[1],)
+    assert store.order_stats(start="2031-01-01", collector_id="coll_x") == (1, 7)
+    assert store.revenue_by_month(start="2031-01-01") == {"2031-05": 7}
+    assert list(store.orders())[-1] == order
+
+
+def test_era_filter_beyond_sql_variable_limit(store):
+    eras, bolids, _, _ = load_seed_data(SEED)
+    many = EraIn([e.id for e in eras] + [f"era_x{i}" for i in range(40_000)])
+    assert store.select_bolids(many) == tuple(bolids)
+
+
+def test_failed_sync_keeps_previous_import(store, tmp_path, monkeypatch):
+    broken = tmp_path / "seed.json"
+    broken.write_text('{"eras": [{"id": "era_1", "name": "V10", "parent": null}], "bolids": [', encoding="utf-8")
+    before = store.count("bolids")
+    with pytest.raises(ValueError):
+        store.sync_from_seed(str(broken))
+    assert store.count("bolids") == before and store.count("eras") > 1
+    assert store.sync_from_seed(SEED) is False
+
+
+def test_store_is_shared_between_threads(store):
+    orders = [PurchaseOrder(f"t_{n}", "coll_1", [GarageItem("bolid_1", 1)], 1, "2024-01-01T00:00:00")
+              for n in range(200)]
+    before = store.order_stats()[0]
+    errors = []
+
+    def worker(chunk):
+        try:
+            for order in chunk:
+                store.add_order(order)
+                store.order_stats()
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(orders[n::4],)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert store.order_stats()[0] == before + len(orders)
+
+
+def test_sync_journal_applies_each_order_once(store, tmp_path):
+    journal = OrderJournal(str(tmp_path / "journal"))
+    orders = [PurchaseOrder(f"j_{n}", "coll_1", [GarageItem("bolid_1", 1)], 10, "2024-01-01T00:00:00")
+              for n in range(5)]
+    before = store.order_stats()[0]
+    for order in orders[:3]:
+        journal.append(order)
+    assert store.sync_journal(journal) == 3
+    assert store.sync_journal(journal) == 0
+    # Заказы, дописанные в журнал другим процессом (режим json), переносятся при следующем открытии
+    for order in orders[3:]:
+        journal.append(order)
+    reopened = SQLiteStore(store.path)
+    assert reopened.sync_journal(journal) == 2
+    assert [o.id for o in reopened.orders()][-5:] == [o.id for o in orders]
+    assert reopened.order_stats()[0] == before + 5
+    # Импорт seed.json заменяет заказы - журнал переносится заново целиком
+    reopened.import_records(iter_seed_records(SEED))
+    assert reopened.sync_journal(journal) == 5
+    assert reopened.order_stats()[0] == before + 5
+    reopened.close()
+    journal.close()
@@ -0,0 +1,50 @@
+import pytest
+from core.catalog import BolidCatalog
+from core.domain import Bolid
+from core.predicates import select
+from core.tags import TagIndex, parse_tag_query
+from core.transforms import by_tags
+
+
+@pytest.fixture
+def tag_lists() -> list[list[str]]:
+    return [
+        ["V10"],
+        ["V10", "Чемпионский"],
+        ["Гибрид", "Чемпионский"],
+        [],
+        ["V10", "Чемпионский", "Гибрид"],
+    ]
+
+
+def test_parse_tag_query():
+    assert parse_tag_query('V10 and (Чемпионский | "Ground effect") & not Гибрид') == (
+        "and",
+        ("tag", "V10"),
+        ("or", ("tag", "Чемпионский"), ("tag", "Ground effect")),
+        ("not", ("tag", "Гибрид")),
+    )
+
+
+@pytest.mark.parametrize("query", ["", "V10 &", "(V10", "V10 )", "& V10"])
+def test_parse_tag_query_errors(query):
+    with pytest.raises(ValueError):
+        parse_tag_query(query)
+
+
+def test_tag_index_boolean_queries(tag_lists):
+    index = TagIndex(tag_lists)
+    assert list(index.positions("V10 & Чемпионский & ~Гибрид")) == [1]
+    assert list(index.positions("~V10")) == [2, 3]
+    assert index.count("V10 | Гибрид") == 4
+    assert index.count("Турбо") == 0
+
+
+def test_tag_query_predicate_matches_plain_filter(tag_lists):
+    bolids = tuple(
+        Bolid(id=f"b{i}", name="", team="T", year=2000, price=1, era_id="e1", tags=tags, quantity_available=1)
+        for i, tags in enumerate(tag_lists)
+    )
+    criteria = by_tags("Чемпионский & ~(V10 & Гибрид)")
+    assert select(criteria, BolidCatalog(bolids)) == tuple(filter(criteria, bolids))
+    assert [b.id for b in BolidCatalog(bolids).with_tags("Гибрид")] == ["b2", "b4"]